@@ -19,13 +19,16 @@ Created on Sat Jun 15 08:01:44 2019
 
 from datetime import datetime
 from datetime import timedelta
+from datetime import timezone
 
 # from distutils import util
 from enum import Enum, auto
 
 import debugging
+import utils_clock
 import utils_wx
 import utils_mos
+import utils_runway
 import utils
 
 
@@ -68,6 +71,7 @@ class Airport:
     _processed_metar_object = None
 
     _uses_neighbor = False
+    _fallback_station = None
 
     # Application Status for Airport
     _purpose = UNUSED
@@ -98,9 +102,18 @@ class Airport:
     _mos_forecast = None
 
     # Runway data
+    _runway_ends = None
+    # Incremented by set_runway_data() ; part of metar_fingerprint()
+    _runway_serial = 0
     _best_runway = None
     _best_runway_deg = None
     _best_runway_width = None
+    _best_runway_headwind = None
+    _best_runway_crosswind = None
+    _best_runway_index = -1
+    # Cached runway wind components ; rebuilt when the METAR fingerprint changes
+    _runway_wind = None
+    _runway_wind_key = None
 
     # HeatMap
     _hm_index = 0
@@ -125,18 +138,24 @@ class Airport:
         # Airport Configuration
         self._wxsrc = None
         self._metar = metar
-        self._metar_date = datetime.now() - timedelta(days=1)  # Make initial date "old"
+        self._metar_date = utils_clock.now() - timedelta(days=1)  # Make initial date "old"
         self._observation = None
         self._observation_time = None
         self._runway_dataset = None
+        self._runway_ends = utils_runway.RunwayEnds()
+        self._runway_serial = 0
+        self._best_runway_index = -1
+        self._runway_wind = None
+        self._runway_wind_key = None
 
         self._uses_neighbor = False
+        self._fallback_station = None
 
         # Application Status for Airport
         self._purpose = self.UNUSED
         self._active_led = None
         self._led_index = None
-        self._updated_time = datetime.now()
+        self._updated_time = utils_clock.now()
 
         # XML Data
         self._flight_category = None
@@ -221,7 +240,7 @@ class Airport:
 
     def update_coordinates(self, lon, lat):
         """Update Coordinates"""
-        debugging.debug(f"coord update {self._icao} {lon}/{lat}")
+        debugging.debug("coord update %s %s/%s", self._icao, lon, lat)
         if not self._coordinates:
             self._latitude = lat
             self._longitude = lon
@@ -248,7 +267,7 @@ class Airport:
         # debugging.info(f"Metar set for {self._icao} to :{metartext}")
         # Track the shortest update interval
         self._metar_update_count += 1
-        time_now = datetime.now()
+        time_now = utils_clock.now()
 
         if self._metar_date is not None:
             update_timedelta = time_now - self._metar_date
@@ -291,6 +310,53 @@ class Airport:
         """Return Timestamp of METAR."""
         return self._metar_date
 
+    def observation_time(self):
+        """Return observation time from the METAR feed as a UTC datetime ; None if unknown."""
+        if not self._observation_time or self._observation_time == "Missing":
+            return None
+        try:
+            return datetime.strptime(
+                self._observation_time, "%Y-%m-%dT%H:%M:%SZ"
+            ).replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+    def metar_fresh(self, max_age_hours) -> bool:
+        """Is the last reported observation newer than max_age_hours."""
+        if self._metar is None or self._metar == "Missing":
+            return False
+        observation_time = self.observation_time()
+        if observation_time is None:
+            return False
+        observation_age = utils_clock.now(timezone.utc) - observation_time
+        return observation_age <= timedelta(hours=max_age_hours)
+
+    def wxsrc_station(self) -> str:
+        """Return ICAO code of the station providing weather for this airport."""
+        if self._wxsrc is not None and self._wxsrc.startswith("neigh"):
+            return self._wxsrc.split(":")[1]
+        return self._icao
+
+    def fallback_station(self):
+        """Return ICAO code of the nearby station currently used as fallback ; None if not in use."""
+        return self._fallback_station
+
+    def use_fallback_metar(self, station_icao, metartext):
+        """Use METAR from a nearby reporting station in place of missing or stale local data."""
+        if self._fallback_station != station_icao:
+            debugging.info("%s using fallback wx from %s", self._icao, station_icao)
+        self._fallback_station = station_icao
+        # Bypass update_metar(); it ignores repeated updates within a short interval
+        self._metar = metartext
+        self._updated_time = utils_clock.now()
+        utils_wx.calculate_wx_from_metar(self)
+
+    def clear_fallback(self):
+        """Stop using fallback station data."""
+        if self._fallback_station is not None:
+            debugging.info("%s no longer using fallback wx", self._icao)
+        self._fallback_station = None
+
     def wxconditions(self):
         """Return list of weather conditions at Airport."""
         return self._wx_conditions
@@ -376,76 +442,62 @@ class Airport:
     def best_runway(self):
         return self._best_runway
 
-    def refresh_best_runway(self):
-        """Examine the list of known runways to find the best alignment to the wind."""
-        best_runway_deg = None
-        best_delta = None
-        best_runway_width = 0
-        best_runway_ident = "No Runway Found"
-        best_runway_length = 0
-        if self._runway_dataset is None or self._wind_dir_degrees is None:
-            self._best_runway = best_runway_ident
-            self._best_runway_deg = best_runway_deg
-            self._best_runway_width = best_runway_width
+    def best_runway_wind(self):
+        """Return (headwind, crosswind) on the best runway ; (None, None) if unknown."""
+        return (self._best_runway_headwind, self._best_runway_crosswind)
+
+    def set_best_runway(self, runway_index, headwind=None, crosswind=None):
+        """Set best runway from index into runway_ends() ; -1 if no runway found."""
+        self._best_runway_index = int(runway_index)
+        if runway_index < 0:
+            self._best_runway = "No Runway Found"
+            self._best_runway_deg = None
+            self._best_runway_width = 0
+            self._best_runway_headwind = None
+            self._best_runway_crosswind = None
             return
+        self._best_runway = self._runway_ends.ident(runway_index)
+        self._best_runway_deg = int(round(self._runway_ends.heading()[runway_index]))
+        self._best_runway_width = int(self._runway_ends.width()[runway_index])
+        self._best_runway_headwind = float(headwind)
+        self._best_runway_crosswind = float(crosswind)
+
+    def metar_fingerprint(self):
+        """Return tuple identifying the METAR and runway data that derived wind data depends on."""
+        return (
+            self._metar,
+            self._wind_dir_degrees,
+            self._wind_speed_kt,
+            self.wx_windgust(),
+            self._runway_serial,
+            self._best_runway_index,
+        )
 
-        for runway in self._runway_dataset:
-            if runway["closed"] == "1":
-                continue
-
-            runway_direction_le_str = runway["le_heading_degT"]
-            if runway_direction_le_str.isnumeric():
-                runway_direction_le = int(runway_direction_le_str)
-            else:
-                # TODO: Need an escape here when we can't properly parse one of a set of runways
-                runway_direction_le = 0
-
-            runway_direction_he_str = runway["he_heading_degT"]
-            if runway_direction_he_str.isnumeric():
-                runway_direction_he = int(runway_direction_he_str)
-            else:
-                runway_direction_he = 0
-
-            runway_wind_delta_le = abs(runway_direction_le - self._wind_dir_degrees)
-            runway_wind_delta_he = abs(runway_direction_he - self._wind_dir_degrees)
-            better_delta = min(runway_wind_delta_le, runway_wind_delta_he)
-
-            # TODO: Would be nice when an airport has two parallel runways to pick a *better* one.
-            # At this stage we have access to runway length information - so perhaps prioritize longer runways
-            # Would be fantastic at some magical future time to pick runway based on any knowledge aboutv published IFR approach details.
-
-            if type(runway["length_ft"]) is str:
-                result, better_runway_length = utils.str2int(runway["length_ft"])
-            else:
-                better_runway_length = runway["length_ft"]
-
-            if type(runway["length_ft"]) is str:
-                result, better_runway_width = utils.str2int(runway["length_ft"])
-            else:
-                better_runway_width = runway["length_ft"]
+    def runway_wind(self):
+        """Return headwind / crosswind / gust components for every runway end.
+
+        See utils_runway.runway_wind_table() ; the result is cached until the METAR
+        fingerprint changes and must be treated as read only.
+        """
+        wind_key = self.metar_fingerprint()
+        if wind_key != self._runway_wind_key:
+            self._runway_wind = utils_runway.runway_wind_table(
+                self._runway_ends,
+                self._wind_dir_degrees,
+                self._wind_speed_kt,
+                self.wx_windgust(),
+                self._best_runway_index,
+            )
+            self._runway_wind_key = wind_key
+        return self._runway_wind
 
-            if runway_wind_delta_le < runway_direction_he:
-                better_runway = runway_direction_le
-                better_runway_ident = runway["le_ident"]
-            else:
-                better_runway = runway_direction_he
-                better_runway_ident = runway["he_ident"]
-            if (
-                (best_runway_deg is None)
-                or (better_delta < best_delta)
-                or (
-                    (better_delta <= best_delta)
-                    and (better_runway_length > best_runway_length)
-                )
-            ):
-                best_runway_deg = better_runway
-                best_delta = better_delta
-                best_runway_ident = better_runway_ident
-                best_runway_width = better_runway_width
-                best_runway_length = better_runway_length
-        self._best_runway = best_runway_ident
-        self._best_runway_deg = best_runway_deg
-        self._best_runway_width = best_runway_width
+    def refresh_best_runway(self):
+        """Examine the list of known runways to find the best alignment to the wind."""
+        # AirportDB.refresh_best_runways() does this for many airports at once
+        best_index, headwind, crosswind = utils_runway.best_runways(
+            [self._runway_ends], [self._wind_dir_degrees], [self._wind_speed_kt]
+        )
+        self.set_best_runway(best_index[0], headwind[0], crosswind[0])
 
     def set_wx_category(self, wx_category_str):
         """Set WX Category to ENUM based on current wx_category_str."""
@@ -469,9 +521,17 @@ class Airport:
         """Update Runway Data."""
         return self._runway_dataset
 
-    def set_runway_data(self, runway_dataset):
-        """Update Runway Data."""
+    def runway_ends(self):
+        """Return parsed runway ends (utils_runway.RunwayEnds)."""
+        return self._runway_ends
+
+    def set_runway_data(self, runway_dataset, runway_ends=None):
+        """Update Runway Data ; runway_ends is the pre-parsed form of runway_dataset."""
         self._runway_dataset = runway_dataset
+        if runway_ends is None:
+            runway_ends = utils_runway.RunwayEnds(runway_dataset)
+        self._runway_ends = runway_ends
+        self._runway_serial += 1
 
     def wx_windspeed(self):
         """Return reported windspeed."""
@@ -479,6 +539,15 @@ class Airport:
             return -1
         return self._wind_speed_kt
 
+    def wx_windgust(self):
+        """Return reported wind gust ; 0 if none."""
+        # XML updates set _wind_gust_kt ; METAR parsing sets _wx_wind_gust
+        wind_gust = 0
+        for gust_value in (self._wind_gust_kt, self._wx_wind_gust):
+            if isinstance(gust_value, (int, float)) and gust_value > wind_gust:
+                wind_gust = gust_value
+        return wind_gust
+
     def get_adds_metar(self, metar_airport_dict):
         """Try to get Fresh METAR data from local Aviation Digital Data Service (ADDS) download."""
         debugging.debug("get_adds_metar WX from adds for " + self._icao)
@@ -4,9 +4,16 @@ Created on Oct 28 - 2021.
 
 @author: chris.higgins@alternoc.net
 """
+import ast
+import datetime
 import logging
 import re
+import sys
 import configparser
+from collections import namedtuple
+from types import MappingProxyType
+
+import pytz
 
 from logzero import loglevel
 
@@ -43,17 +50,244 @@ class Features(Enum):
     ENABLE_LIGHTSENSOR = auto()
     ENABLE_GPIO_MOD = auto()
 
+# Typed configuration snapshot
+#
+# CONF_SCHEMA lists, for each section, attribute -> (config key, type).
+# Conf.snapshot() returns an immutable object built from it every time the
+# config is saved ; hot paths read attributes from it instead of going through
+# configparser and interpolation on every access
+#   eg. app_conf.snapshot().metar.mos_probability
+# "color" entries are also available as (r, g, b) tuples in snapshot.colors_rgb
+# Missing or invalid values fall back to CONF_DEFAULTS, then CONF_TYPE_DEFAULTS
+CONF_SCHEMA = {
+    "default": {
+        "led_count": ("led_count", "int"),
+        "timezone": ("timezone", "str"),
+        "tzinfo": ("timezone", "timezone"),
+        "first_setup_complete": ("first_setup_complete", "bool"),
+        "adminuser": ("adminuser", "str"),
+        "adminpass": ("adminpass", "str"),
+        "nightly_reboot": ("nightly_reboot", "bool"),
+        "nightly_reboot_hr": ("nightly_reboot_hr", "time"),
+    },
+    "urls": {
+        "use_proxies": ("use_proxies", "bool"),
+        "http_proxy": ("http_proxy", "str"),
+        "https_proxy": ("https_proxy", "str"),
+    },
+    "metar": {
+        "max_wind_speed": ("max_wind_speed", "int"),
+        "wx_update_interval": ("wx_update_interval", "int"),
+        "metar_age": ("metar_age", "float"),
+        "nearest_fallback": ("nearest_fallback", "bool"),
+        "nearest_fallback_nm": ("nearest_fallback_nm", "float"),
+        "mos_probability": ("mos_probability", "int"),
+    },
+    "schedule": {
+        "usetimer": ("usetimer", "bool"),
+        "offtime": ("offtime", "time"),
+        "ontime": ("ontime", "time"),
+        "tempsleepon": ("tempsleepon", "int"),
+    },
+    "colors": {
+        "color_vfr": ("color_vfr", "color"),
+        "color_mvfr": ("color_mvfr", "color"),
+        "color_ifr": ("color_ifr", "color"),
+        "color_lifr": ("color_lifr", "color"),
+        "color_nowx": ("color_nowx", "color"),
+        "color_black": ("color_black", "color"),
+        "color_lghtn": ("color_lghtn", "color"),
+        "color_snow1": ("color_snow1", "color"),
+        "color_snow2": ("color_snow2", "color"),
+        "color_rain1": ("color_rain1", "color"),
+        "color_rain2": ("color_rain2", "color"),
+        "color_frrain1": ("color_frrain1", "color"),
+        "color_frrain2": ("color_frrain2", "color"),
+        "color_dustsandash1": ("color_dustsandash1", "color"),
+        "color_dustsandash2": ("color_dustsandash2", "color"),
+        "color_fog1": ("color_fog1", "color"),
+        "color_fog2": ("color_fog2", "color"),
+        "color_homeport": ("color_homeport", "color"),
+        "fade_color1": ("fade_color1", "color"),
+        "allsame_color1": ("allsame_color1", "color"),
+        "allsame_color2": ("allsame_color2", "color"),
+        "shuffle_color1": ("shuffle_color1", "color"),
+        "shuffle_color2": ("shuffle_color2", "color"),
+        "radar_color1": ("radar_color1", "color"),
+        "radar_color2": ("radar_color2", "color"),
+        "circle_color1": ("circle_color1", "color"),
+        "circle_color2": ("circle_color2", "color"),
+        "square_color1": ("square_color1", "color"),
+        "square_color2": ("square_color2", "color"),
+        "updn_color1": ("updn_color1", "color"),
+        "updn_color2": ("updn_color2", "color"),
+        "rabbit_color1": ("rabbit_color1", "color"),
+        "rabbit_color2": ("rabbit_color2", "color"),
+        "checker_color1": ("checker_color1", "color"),
+        "checker_color2": ("checker_color2", "color"),
+        "homeport_colors": ("homeport_colors", "list"),
+    },
+    "morse": {
+        "color_dot": ("color_dot", "color"),
+        "color_dash": ("color_dash", "color"),
+        "message": ("message", "str"),
+    },
+    "activelights": {
+        "high_wind_blink": ("high_wind_blink", "bool"),
+        "high_wind_limit": ("high_wind_limit", "int"),
+    },
+    "lights": {
+        "lghtnflash": ("lghtnflash", "bool"),
+        "rainshow": ("rainshow", "bool"),
+        "frrainshow": ("frrainshow", "bool"),
+        "snowshow": ("snowshow", "bool"),
+        "dustsandashshow": ("dustsandashshow", "bool"),
+        "fogshow": ("fogshow", "bool"),
+        "homeport": ("homeport", "bool"),
+        "homeport_pin": ("homeport_pin", "int"),
+        "homeport_display": ("homeport_display", "int"),
+        "dim_value": ("dim_value", "int"),
+        "rgb_grb": ("rgb_grb", "bool"),
+        "rev_rgb_grb": ("rev_rgb_grb", "intlist"),
+        "dimmed_value": ("dimmed_value", "int"),
+        "bright_value": ("bright_value", "int"),
+    },
+    "rotaryswitch": {
+        "hour_to_display": ("hour_to_display", "int"),
+        "prob": ("prob", "int"),
+        "bin_grad": ("bin_grad", "bool"),
+        "use_homeap": ("use_homeap", "bool"),
+        "fade_yesno": ("fade_yesno", "bool"),
+        "data_sw0": ("data_sw0", "int"),
+        "time_sw0": ("time_sw0", "int"),
+    },
+}
+
+
+def _conf_time(value):
+    """Parse HH:MM into datetime.time."""
+    time_split = value.split(":")
+    return datetime.time(int(time_split[0]), int(time_split[1]), 0, 0)
+
+
+def _conf_list(value):
+    """Parse python literal list."""
+    return ast.literal_eval(value)
+
+
+def _conf_intlist(value):
+    """Parse all integers in a string into a tuple (eg. "[1, 4]" -> (1, 4))."""
+    return tuple(int(number) for number in re.findall(r"\d+", value))
+
+
+CONF_TYPES = {
+    "str": lambda value: value,
+    "int": int,
+    "float": float,
+    "bool": utils.str2bool,
+    "color": lambda value: value.strip(),
+    "time": _conf_time,
+    "list": _conf_list,
+    "intlist": _conf_intlist,
+    "timezone": pytz.timezone,
+}
+
+# Typed fallback for values that are missing or fail to parse
+CONF_TYPE_DEFAULTS = {
+    "str": None,
+    "int": 0,
+    "float": 0.0,
+    "bool": False,
+    "color": None,
+    "time": datetime.time(0, 0),
+    "list": [],
+    "intlist": (),
+    "timezone": pytz.utc,
+}
+
+# (section, attribute) -> fallback where the type default would misbehave
+CONF_DEFAULTS = {
+    ("default", "led_count"): 80,
+    ("default", "nightly_reboot_hr"): datetime.time(1, 0),
+    ("metar", "max_wind_speed"): 20,
+    ("metar", "wx_update_interval"): 30,
+    ("metar", "metar_age"): 2.5,
+    ("metar", "nearest_fallback_nm"): 25.0,
+    ("metar", "mos_probability"): 50,
+    ("schedule", "offtime"): datetime.time(23, 30),
+    ("schedule", "ontime"): datetime.time(6, 30),
+    ("schedule", "tempsleepon"): 5,
+    ("activelights", "high_wind_limit"): 20,
+    ("lights", "dim_value"): 75,
+    ("lights", "dimmed_value"): 30,
+    ("lights", "bright_value"): 255,
+    ("rotaryswitch", "hour_to_display"): 1,
+    ("rotaryswitch", "prob"): 50,
+}
+
+
+def conf_default(section, attribute, value_type):
+    """Return fallback value for a schema entry."""
+    return CONF_DEFAULTS.get((section, attribute), CONF_TYPE_DEFAULTS[value_type])
+
+
+def build_snapshot(configfile, serial=0, errors=None):
+    """Build immutable typed snapshot of configfile from CONF_SCHEMA.
+
+    Parse errors are appended to errors ; logging may not be set up yet.
+    """
+    sections = {}
+    colors_rgb = {}
+    for section, section_schema in CONF_SCHEMA.items():
+        values = {}
+        for attribute, (key, value_type) in section_schema.items():
+            raw_value = configfile.get(section, key, fallback=None)
+            value = conf_default(section, attribute, value_type)
+            if raw_value is not None:
+                try:
+                    value = CONF_TYPES[value_type](raw_value)
+                except (
+                    ValueError,
+                    TypeError,
+                    IndexError,
+                    SyntaxError,
+                    pytz.UnknownTimeZoneError,
+                ) as err:
+                    if errors is not None:
+                        errors.append(
+                            f"Config: [{section}] {key} = {raw_value} : {err} ;"
+                            f" using {value}"
+                        )
+            values[attribute] = value
+            if value_type == "color" and value is not None:
+                colors_rgb[attribute] = utils_colors.rgb_color(value)
+        section_tuple = namedtuple(f"Conf_{section}", section_schema.keys())
+        sections[section] = section_tuple(**values)
+    sections["colors_rgb"] = MappingProxyType(colors_rgb)
+    sections["serial"] = serial
+    return namedtuple("ConfSnapshot", sections.keys())(**sections)
+
 
 class Conf:
     """Configuration Class."""
 
-    cache = {}
+    _snapshot = None
+    # Raw (interpolated) values at the last rebuild ; used to work out what a save changed
+    _config_values = {}
+    # (callback, set of (section, key)) ; see subscribe()
+    _subscribers = []
     config_filename = None
     configfile = None
     _features = ()
+    _cache_serial = 0
+    # Snapshot parse errors not yet logged ; see log_config_errors()
+    _config_errors = []
 
     def __init__(self):
         """Initialize and load configuration."""
+        self._config_values = {}
+        self._subscribers = []
+        self._config_errors = []
         self.config_filename = "config.ini"
         self.configfile = configparser.ConfigParser()
         self.configfile._interpolation = configparser.ExtendedInterpolation()
@@ -201,47 +435,81 @@ class Conf:
     def active_features(self):
         return self._features
 
+    def cache_serial(self) -> int:
+        """Return counter that increments every time the conf cache is rebuilt."""
+        return self._cache_serial
+
     def update_confcache(self):
-        """Update class local variables to cache conf data."""
-        # This is a performance improvement cache of conf data
-        # TODO: Move in the rest of the data that gets accessed regularly
-        # Would be useful to have usage stats for the conf data to prioritize new additions
-        self.cache["first_setup_complete"] = self.get_bool(
-            "default", "first_setup_complete"
-        )
-        self.cache["adminuser"] = self.get_string("default", "adminuser")
-        self.cache["adminpass"] = self.get_string("default", "adminpass")
-        self.cache["use_proxies"] = self.get_bool("urls", "use_proxies")
-        self.cache["http_proxy"] = self.get_string("urls", "http_proxy")
-        self.cache["https_proxy"] = self.get_string("urls", "https_proxy")
-
-        self.cache["color_vfr"] = utils_colors.cat_vfr(self)
-        self.cache["color_mvfr"] = utils_colors.cat_mvfr(self)
-        self.cache["color_ifr"] = utils_colors.cat_ifr(self)
-        self.cache["color_lifr"] = utils_colors.cat_lifr(self)
-        self.cache["color_nowx"] = utils_colors.wx_noweather(self)
-        self.cache["lights_highwindblink"] = self.get_bool(
-            "activelights", "high_wind_blink"
-        )
-        self.cache["metar_maxwindspeed"] = self.get_int(
-            "activelights", "high_wind_limit"
-        )
-        self.cache["lights_lghtnflash"] = self.get_bool("lights", "lghtnflash")
-        self.cache["lights_snowshow"] = self.get_bool("lights", "snowshow")
-        self.cache["lights_rainshow"] = self.get_bool("lights", "rainshow")
-        self.cache["lights_frrainshow"] = self.get_bool("lights", "frrainshow")
-        self.cache["lights_dustsandashshow"] = self.get_bool(
-            "lights", "dustsandashshow"
-        )
-        self.cache["lights_fogshow"] = self.get_bool("lights", "fogshow")
-        self.cache["lights_homeportpin"] = self.get_int("lights", "homeport_pin")
-        self.cache["lights_homeport"] = self.get_int("lights", "homeport")
-        self.cache["lights_homeport_display"] = self.get_int(
-            "lights", "homeport_display"
+        """Rebuild the typed config snapshot ; called on load and on every save."""
+        previous_values = self._config_values
+        self._config_values = self.config_values()
+        self._cache_serial += 1
+        config_errors = []
+        self._snapshot = build_snapshot(
+            self.configfile, self._cache_serial, config_errors
         )
-        self.cache["rgb_grb"] = self.get_bool("lights", "rgb_grb")
-        self.cache["rev_rgb_grb"] = self.get_string("lights", "rev_rgb_grb")
-        self.cache["usetimer"] = self.get_bool("schedule", "usetimer")
+        self._config_errors.extend(config_errors)
+        if debugging.logging_active():
+            self.log_config_errors()
+        else:
+            # Conf() runs before loginit ; logged once loginit has run
+            for config_error in config_errors:
+                print(config_error, file=sys.stderr, flush=True)
+        if not previous_values:
+            return
+        changes = {}
+        for section_key in previous_values.keys() | self._config_values.keys():
+            old_value = previous_values.get(section_key)
+            new_value = self._config_values.get(section_key)
+            if old_value != new_value:
+                changes[section_key] = (old_value, new_value)
+        if changes:
+            self.notify_subscribers(changes)
+
+    def log_config_errors(self):
+        """Log snapshot parse errors held back until logging was set up."""
+        if not debugging.logging_active():
+            return
+        for config_error in self._config_errors:
+            debugging.error(config_error)
+        self._config_errors = []
+
+    def config_values(self) -> dict:
+        """Return dict of (section, key) -> interpolated value string."""
+        config_values = {}
+        for section in self.configfile.sections():
+            for key, value in self.configfile.items(section):
+                config_values[(section, key)] = value
+        return config_values
+
+    def subscribe(self, callback, section_keys):
+        """Register callback(changes) for config keys ; called on save when any of them change.
+
+        section_keys is a list of (section, key) ; key "*" matches the whole section.
+        changes is a dict of (section, key) -> (old value, new value) for the
+        subscribed keys only. The snapshot is already rebuilt when it is called.
+        """
+        self._subscribers.append((callback, set(section_keys)))
+
+    def notify_subscribers(self, changes):
+        """Pass changed keys to interested subscribers."""
+        debugging.info(f"Config: changed {sorted(changes.keys())}")
+        for callback, section_keys in self._subscribers:
+            subscriber_changes = {
+                (section, key): change
+                for (section, key), change in changes.items()
+                if (section, key) in section_keys or (section, "*") in section_keys
+            }
+            if not subscriber_changes:
+                continue
+            try:
+                callback(subscriber_changes)
+            except Exception as err:
+                debugging.error(f"Config: subscriber {callback} failed: {err}")
+
+    def snapshot(self):
+        """Return immutable typed config snapshot ; see CONF_SCHEMA."""
+        return self._snapshot
 
     def gen_settings_dict(self) -> dict:
         """Generate settings template to pass to flask."""
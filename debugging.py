@@ -1,19 +1,81 @@
 # -*- coding: utf-8 -*- #
-"""Support Debugging Printing"""
+"""Support Debugging Printing
 
+Log calls only queue the record ; a listener thread formats and writes to the
+logfile, console and an in-memory ring buffer (used by the web log viewer).
+Use lazy arguments on hot paths so disabled messages are never formatted :
+    debugging.debug("airport %s now %s", icao, category)
+"""
+
+import atexit
 import time
 import sys
 import datetime
 import logging
 import logging.handlers
 import pprint
+import queue
+import threading
+from collections import deque
+
+# Records waiting for the listener ; new records are dropped when full
+LOG_QUEUE_SIZE = 10000
+# Lines kept in memory for /stream_log
+LOG_RING_SIZE = 1000
 
 __logger = None
+__listener = None
+__handlers = []
+__log_ring = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records rather than blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        """Queue record without blocking."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogRing(logging.Handler):
+    """Keep the most recent formatted log lines ; readers can wait for new lines."""
+
+    def __init__(self, size=LOG_RING_SIZE):
+        """Create ring buffer of size lines."""
+        super().__init__()
+        self._lines = deque(maxlen=size)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    def emit(self, record):
+        """Append formatted record ; called from the listener thread."""
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._condition:
+            self._last_id += 1
+            self._lines.append((self._last_id, line))
+            self._condition.notify_all()
+
+    def lines_since(self, line_id, timeout=None):
+        """Wait for lines newer than line_id ; returns (last id, list of lines)."""
+        with self._condition:
+            if timeout is not None:
+                self._condition.wait_for(lambda: self._last_id > line_id, timeout)
+            lines = [line for lid, line in self._lines if lid > line_id]
+            return self._last_id, lines
 
 
 def loginit(app_conf):
     """Init logging data."""
-    global __logger
+    global __logger, __listener, __handlers, __log_ring
     # FIXME: Move filename to config
     __logger = logging.getLogger()
     __logger.setLevel(logging.INFO)
@@ -31,15 +93,26 @@ def loginit(app_conf):
 
     log_console_handler.setLevel(console_loglevel)
 
-    __logger.addHandler(logfile_handler)
-    __logger.addHandler(log_console_handler)
-
     formatter = logging.Formatter("%(asctime)s livemap: %(message)s", "%b %d %H:%M:%S")
     formatter.converter = time.gmtime
 
     logfile_handler.setFormatter(formatter)
     log_console_handler.setFormatter(formatter)
 
+    __log_ring = LogRing()
+    __log_ring.setLevel(logfile_loglevel)
+    __log_ring.setFormatter(formatter)
+
+    # Callers only queue records ; file and console writes happen on the listener thread
+    __handlers = [logfile_handler, log_console_handler, __log_ring]
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    __logger.addHandler(DroppingQueueHandler(log_queue))
+    __listener = logging.handlers.QueueListener(
+        log_queue, *__handlers, respect_handler_level=True
+    )
+    __listener.start()
+    atexit.register(__listener.stop)
+
     # Disable PIL debug logs by default
     # Should eliminate STREAM b'IHDR' and STREAM b'IDAT' unnecessary logs
     logging.getLogger("PIL").setLevel(logging.WARNING)
@@ -67,6 +140,8 @@ def listloggers() -> str:
     logger_data = f"loginit: {rootlogger}\n"
     for h in rootlogger.handlers:
         logger_data += f"loginit:\t{h}"
+    for h in __handlers:
+        logger_data += f"loginit:\t(queued) {h}"
 
     for nm, lgr in logging.Logger.manager.loggerDict.items():
         logger_data += f"loginit: + [%-20s] {nm}  % {lgr}"
@@ -84,6 +159,8 @@ def setLogLevel(newlevel):
     __logger.setLevel(newlevel)
     for handler in __logger.handlers:
         handler.setLevel(newlevel)
+    for handler in __handlers:
+        handler.setLevel(newlevel)
 
 
 def crash(args):
@@ -112,28 +189,55 @@ def dprint(args):
     print(logtime, appname, "PRINT:", args, flush=True)
 
 
-def info(args):
-    """Passthrough call to __logger."""
+def info(args, *fmt_args):
+    """Passthrough call to __logger ; fmt_args are %-formatted only if logged."""
     global __logger
-    __logger.info(args)
+    __logger.info(args, *fmt_args)
 
 
-def warn(args):
-    """Passthrough call to __logger."""
+def warn(args, *fmt_args):
+    """Passthrough call to __logger ; fmt_args are %-formatted only if logged."""
     global __logger
-    __logger.warning(args)
+    __logger.warning(args, *fmt_args)
 
 
-def error(args):
-    """Passthrough call to __logger."""
+def error(args, *fmt_args):
+    """Passthrough call to __logger ; fmt_args are %-formatted only if logged."""
     global __logger
-    __logger.error(args)
+    __logger.error(args, *fmt_args)
 
 
-def debug(args):
-    """Passthrough call to __logger."""
+def debug(args, *fmt_args):
+    """Passthrough call to __logger ; fmt_args are %-formatted only if logged."""
     global __logger
-    __logger.debug(args)
+    __logger.debug(args, *fmt_args)
+
+
+def debug_enabled() -> bool:
+    """Is debug logging on ; guard for expensive debug-only work."""
+    global __logger
+    return __logger.isEnabledFor(logging.DEBUG)
+
+
+def logging_active() -> bool:
+    """Has loginit run ; log calls fail before then."""
+    return __logger is not None
+
+
+def log_ring():
+    """Return in-memory LogRing ; None before loginit."""
+    return __log_ring
+
+
+def stats():
+    """Return string containing pertinent stats."""
+    queued = 0
+    if __listener is not None:
+        queued = __listener.queue.qsize()
+    dropped = sum(
+        getattr(handler, "dropped", 0) for handler in logging.getLogger().handlers
+    )
+    return f"Logging Stats:\n\tqueued: {queued}\n\tdropped: {dropped}"
 
 
 def prettify_dict(args):
@@ -26,6 +26,7 @@ import conf  # Config.py holds user settings used by the various scripts
 
 import utils
 import utils_i2c
+import utils_metrics
 import sysinfo
 
 import update_datasets
@@ -47,6 +48,7 @@ if __name__ == "__main__":
 
     # Setup Logging
     debugging.loginit(app_conf)
+    app_conf.log_config_errors()
 
     # Check for working Internet
     if utils.wait_for_internet():
@@ -119,6 +121,12 @@ if __name__ == "__main__":
         target=LEDmgmt.update_loop, name="led management", args=()
     )
 
+    # i2c bus scheduler ; owns the bus for OLED and light sensor transactions
+    debugging.info("Starting i2c scheduler thread")
+    i2c_thread = threading.Thread(
+        target=i2cbus.update_loop, name="i2c scheduler", args=()
+    )
+
     # Updating LightSensor
     debugging.info("Starting Light Sensor thread")
     lightsensor_thread = threading.Thread(
@@ -158,6 +166,7 @@ if __name__ == "__main__":
     debugging.info("Starting threads")
     dataset_thread.start()
     airport_thread.start()
+    i2c_thread.start()
     if conf.Features.ENABLE_LED in app_conf.active_features():
         led_thread.start()
     if conf.Features.ENABLE_GPIO_MOD in app_conf.active_features():
@@ -170,6 +179,13 @@ if __name__ == "__main__":
         zeroconf_thread.start()
     flask_thread.start()
 
+    # Per thread liveness for /metrics
+    utils_metrics.gauge(
+        "livemap_thread_running", "Running threads by name", ("thread",)
+    ).set_function(
+        lambda: {(thread_obj.name,): 1 for thread_obj in threading.enumerate()}
+    )
+
     MAIN_LOOP_SLEEP = 5
     loop_counter = 0
 
@@ -187,13 +203,16 @@ if __name__ == "__main__":
             app_info.refresh()
             sysdata.refresh()
 
-        # TODO: We should get around to generating and reporting health
-        # metrics in this loop.
+        # Health metrics are served on /metrics and /api/v1/metrics ;
+        # the stats() summaries are kept for the logfile.
         debugging.info(airport_database.stats())
         debugging.info(i2cbus.stats())
         debugging.info(dataset_sync.stats())
         debugging.info(zeroconf.stats())
         debugging.info(LuxSensor.stats())
+        debugging.info(OLEDmgmt.stats())
+        debugging.info(web_app.stats())
+        debugging.info(debugging.stats())
 
         (online_status, ipaddr) = utils.is_connected()
         if online_status:
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*- #
+
+"""Replay a recorded archive of weather datasets through the app.
+
+Record an archive by setting [filenames] dataset_archive in config.ini ; every
+dataset DataSets downloads is then kept under that directory. Replay it with :
+
+    python replay.py /path/to/archive --step 60 --record day.ledrec
+
+The replay runs in a scratch copy of basedir (airports.json, hmdata and
+oled_conf.json are copied across), so the live data files are never touched.
+LEDs use the in memory strip ; --record writes the frames (with simulated
+timestamps) to a recording that utils_ledstrip.replay_recording() can play
+back. --profile samples the replay with the sampling profiler and writes the
+collapsed stacks for a flame graph.
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+
+import debugging
+import conf
+import update_datasets
+import update_airports
+import update_leds
+import utils_clock
+import utils_profiler
+import utils_replay
+from update_leds import LedMode
+
+# Airport and display configuration copied into the scratch basedir
+CONFIG_FILES = ("airports_json", "heatmap_file", "oled_conf_json")
+
+
+def parse_time(time_str):
+    """Parse ISO 8601 time ; naive times are UTC."""
+    parsed_time = datetime.datetime.fromisoformat(time_str)
+    if parsed_time.tzinfo is None:
+        parsed_time = parsed_time.replace(tzinfo=datetime.timezone.utc)
+    return parsed_time
+
+
+def replay_conf(scratch_dir, record_file):
+    """Return app config with data files in scratch_dir, and the in memory LED strip."""
+    app_conf = conf.Conf()
+    for subdir in ("data", "logs", "static"):
+        os.makedirs(os.path.join(scratch_dir, subdir), exist_ok=True)
+    live_files = {key: app_conf.get_string("filenames", key) for key in CONFIG_FILES}
+    app_conf.set_string("filenames", "basedir", scratch_dir)
+    for key, live_file in live_files.items():
+        if os.path.isfile(live_file):
+            shutil.copyfile(live_file, app_conf.get_string("filenames", key))
+    app_conf.set_string("filenames", "dataset_archive", "")
+    app_conf.set_string("filenames", "led_recording", record_file or "")
+    app_conf.set_string("lights", "led_backend", "memory")
+    # Logging first ; applying the changes logs them
+    debugging.loginit(app_conf)
+    app_conf.update_confcache()
+    return app_conf
+
+
+def create_oled_mgmt(app_conf, airport_database, led_mgmt):
+    """Return OLED manager driving the attached OLEDs ; None if not available."""
+    try:
+        import sysinfo
+        import update_oled
+        import utils_i2c
+    except ImportError as err:
+        debugging.warn(f"Replay: OLEDs not available: {err}")
+        return None
+    i2cbus = utils_i2c.I2CBus(app_conf)
+    return update_oled.UpdateOLEDs(
+        app_conf, sysinfo.SystemData(), airport_database, i2cbus, led_mgmt
+    )
+
+
+def main():
+    """Run replay from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", help="dataset archive directory")
+    parser.add_argument("--start", help="replay start (ISO 8601, UTC)")
+    parser.add_argument("--end", help="replay end (ISO 8601, UTC)")
+    parser.add_argument(
+        "--step", type=int, default=60, help="simulated seconds per step"
+    )
+    parser.add_argument(
+        "--frames", type=int, default=6, help="LED frames rendered per step"
+    )
+    parser.add_argument(
+        "--mode",
+        default="METAR",
+        choices=[led_mode.name for led_mode in LedMode],
+        help="LED mode",
+    )
+    parser.add_argument("--record", help="write LED frames to this recording file")
+    parser.add_argument("--profile", help="write collapsed profiler stacks here")
+    parser.add_argument("--oled", action="store_true", help="drive attached OLEDs")
+    args = parser.parse_args()
+    if not os.path.isdir(args.archive):
+        parser.error(f"{args.archive} is not a directory")
+    # Paths are given relative to the caller ; main() changes directory below
+    args.archive = os.path.abspath(args.archive)
+    for path_arg in ("record", "profile"):
+        if getattr(args, path_arg):
+            setattr(args, path_arg, os.path.abspath(getattr(args, path_arg)))
+
+    start_time = parse_time(args.start) if args.start else None
+    end_time = parse_time(args.end) if args.end else None
+    snapshots = utils_replay.list_snapshots(args.archive)
+    if not snapshots:
+        print(f"No dataset snapshots in {args.archive}")
+        return 1
+    # Components start up in simulated time too
+    utils_clock.set_clock(utils_clock.ReplayClock(start_time or snapshots[0][0]))
+
+    # Conf() reads config.ini from the application directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory(prefix="livemap-replay-") as scratch_dir:
+        app_conf = replay_conf(scratch_dir, args.record)
+        dataset = update_datasets.DataSets(app_conf)
+        airport_database = update_airports.AirportDB(app_conf, dataset)
+        led_mgmt = update_leds.UpdateLEDs(app_conf, airport_database)
+        led_mgmt.set_ledmode(LedMode[args.mode])
+        oled_mgmt = None
+        if args.oled:
+            oled_mgmt = create_oled_mgmt(app_conf, airport_database, led_mgmt)
+        replay_driver = utils_replay.ReplayDriver(
+            app_conf,
+            dataset,
+            airport_database,
+            led_mgmt,
+            oled_mgmt,
+            step=args.step,
+            frames=args.frames,
+        )
+
+        profiler = None
+        if args.profile:
+            profiler = utils_profiler.SamplingProfiler(
+                app_conf.get_float("logging", "profiler_interval"), max_duration=86400
+            )
+            profiler.start()
+        replayed = replay_driver.run(args.archive, start_time, end_time)
+        if profiler is not None:
+            profiler.stop()
+            with open(args.profile, "w", encoding="utf-8") as profile_file:
+                profile_file.write(profiler.collapsed())
+            print(profiler.stats())
+
+        print(replay_driver.stats())
+        print(led_mgmt.strip.stats())
+        led_mgmt.strip.close()
+    return 0 if replayed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*- #
+
+"""Offline benchmarks for the weather processing and display hot paths.
+
+Runs against the weather fixtures in tests/fixtures, so no network access or
+LED hardware is needed. The LEDs are driven through a MemoryStrip.
+
+    python tests/benchmark.py --output bench.json
+    python tests/benchmark.py --compare bench.json --output bench-new.json
+
+Each benchmark runs --repeat times and the min / median / mean / max times are
+written to the JSON results along with the python version, git commit and
+fixture checksums. With --compare, any benchmark whose median is more than
+--threshold times the previous median is reported as a regression and the exit
+status is 1.
+
+The fixtures are a frozen set of feed files in the formats the app downloads :
+    metar.xml.gz    - aviationweather.gov METAR cache (xml)
+    tafs.xml.gz     - aviationweather.gov TAF cache (xml)
+    GFSMAV.t00z.gz  - NWS GFS MOS MAV bulletin (text)
+    runways.csv.gz  - OurAirports runways.csv
+    airports.csv.gz - OurAirports airports.csv
+    airports.json   - 150 LED map airport configuration
+    hmdata          - heat map visit counts
+The app clock is frozen at FIXTURE_TIME, so TAF / MOS lookups and METAR age
+checks see the fixtures as current.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(REPO_DIR, "tests", "fixtures")
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+import conf
+import debugging
+import update_airports
+import update_datasets
+import update_leds
+import utils_clock
+import utils_ledstrip
+import utils_mos
+
+# Fixture file -> location under the benchmark basedir ; .gz files are decompressed
+FIXTURES = {
+    "metar.xml.gz": "data/metar.xml",
+    "tafs.xml.gz": "data/tafs.xml",
+    "GFSMAV.t00z.gz": "data/GFSMAV.t00z",
+    "runways.csv.gz": "data/runways.csv",
+    "airports.csv.gz": "data/airports.csv",
+    "airports.json": "data/airports.json",
+    "hmdata": "data/hmdata",
+}
+
+# LEDs in fixtures/airports.json
+LED_COUNT = 150
+
+# Time the fixture feeds were issued for
+FIXTURE_TIME = datetime(2025, 6, 15, 18, 0, tzinfo=timezone.utc)
+
+
+def install_fixtures(basedir) -> dict:
+    """Copy fixtures into basedir ; return dict of fixture name -> sha1."""
+    for subdir in ("data", "logs", "static"):
+        os.makedirs(os.path.join(basedir, subdir), exist_ok=True)
+    checksums = {}
+    for fixture, target in FIXTURES.items():
+        fixture_path = os.path.join(FIXTURE_DIR, fixture)
+        with open(fixture_path, "rb") as fixture_file:
+            checksums[fixture] = hashlib.sha1(fixture_file.read()).hexdigest()
+        target_path = os.path.join(basedir, target)
+        if fixture.endswith(".gz"):
+            with gzip.open(fixture_path, "rb") as source, open(
+                target_path, "wb"
+            ) as dest:
+                shutil.copyfileobj(source, dest)
+        else:
+            shutil.copyfile(fixture_path, target_path)
+    # AppInfo reads the installed and git repo versions from basedir
+    shutil.copyfile(
+        os.path.join(REPO_DIR, "VERSION.txt"), os.path.join(basedir, "VERSION.txt")
+    )
+    return checksums
+
+
+def benchmark_conf(basedir):
+    """Return app config with all data files redirected to basedir."""
+    # Conf() reads config.ini from the current directory
+    os.chdir(REPO_DIR)
+    app_conf = conf.Conf()
+    app_conf.set_string("filenames", "basedir", basedir)
+    app_conf.set_string("filenames", "gitrepo", basedir)
+    app_conf.set_string("filenames", "led_recording", "")
+    app_conf.set_string("default", "led_count", LED_COUNT)
+    # Logging first ; applying the changes logs them
+    debugging.loginit(app_conf)
+    app_conf.update_confcache()
+    return app_conf
+
+
+def time_calls(function, repeat) -> list:
+    """Call function repeat times ; return list of elapsed seconds."""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def summarize(times) -> dict:
+    """Return timing summary for list of elapsed seconds."""
+    return {
+        "repeat": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+    }
+
+
+def git_commit():
+    """Return git commit of the tree being benchmarked ; None if unknown."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Benchmarks:
+    """Fixture backed instances of the app components, and the benchmarks run against them."""
+
+    def __init__(self, basedir, repeat, frames):
+        """Load fixtures and build components ; nothing is timed here."""
+        self.repeat = repeat
+        self.frames = frames
+        self.results = {}
+        self.skipped = {}
+        self.fixture_checksums = install_fixtures(basedir)
+        self.app_conf = benchmark_conf(basedir)
+        utils_clock.set_clock(utils_clock.ReplayClock(FIXTURE_TIME))
+
+        self.dataset = update_datasets.DataSets(self.app_conf)
+        self.dataset.load_mos_forecast()
+        self.airport_db = update_airports.AirportDB(self.app_conf, self.dataset)
+        # Same order as the first pass of AirportDB.update_loop
+        self.airport_db.update_airportdb_metar_xml()
+        self.airport_db.update_fallback_candidates()
+        self.airport_db.apply_nearest_fallbacks()
+        self.airport_db.update_airport_taf_xml()
+        self.airport_db.import_runways()
+        self.airport_db.update_airport_runways()
+        self.airport_db.import_airport_geo_data()
+        self.airport_db.update_airport_lon_lat()
+        self.airport_db.update_fallback_candidates()
+        self.airport_db.refresh_dirty_airports()
+
+        self.led_mgmt = update_leds.UpdateLEDs(
+            self.app_conf,
+            self.airport_db,
+            strip=utils_ledstrip.MemoryStrip(LED_COUNT),
+        )
+        self.led_mgmt.update_active_led_list()
+        self.led_mgmt.ledmode_radar_setup()
+        self.led_mgmt.ledmode_geometry_setup()
+
+    def record(self, name, times):
+        """Record timing summary for benchmark name."""
+        self.results[name] = summarize(times)
+        print(
+            f"{name:50} median {self.results[name]['median'] * 1000:10.3f}ms"
+            f"  min {self.results[name]['min'] * 1000:10.3f}ms",
+            flush=True,
+        )
+
+    def run_parsers(self):
+        """Time dataset parsing ; each run re-reads the fixture files."""
+        parsers = {
+            "datasets.mos_analyze_datafile": lambda: utils_mos.mos_analyze_datafile(
+                self.app_conf
+            ),
+            "airports.update_airportdb_metar_xml": (
+                self.airport_db.update_airportdb_metar_xml
+            ),
+            "airports.update_airport_taf_xml": self.airport_db.update_airport_taf_xml,
+            "airports.import_runways": self.airport_db.import_runways,
+            "airports.update_airport_runways": self.airport_db.update_airport_runways,
+            "airports.update_airport_lon_lat": self.airport_db.update_airport_lon_lat,
+        }
+        for name, function in parsers.items():
+            self.record(name, time_calls(function, self.repeat))
+
+    def run_led_modes(self):
+        """Time each LED mode ; one sample per rendered and pushed frame."""
+        for led_mode, renderer in self.led_mgmt.mode_renderers().items():
+            # Start each mode from an empty strip, as after a mode change
+            self.led_mgmt._pixel_data = None
+            times = []
+            for clock_tick in range(1, self.frames + 1):
+                start_time = time.perf_counter()
+                self.led_mgmt.update_ledstring(renderer(clock_tick))
+                times.append(time.perf_counter() - start_time)
+            self.record(f"leds.{led_mode.name.lower()}", times)
+
+    def skip_maps(self, reason):
+        """Record map benchmarks as skipped."""
+        for name in (
+            "maps.build_led_map",
+            "maps.build_heat_map",
+            "maps.route_led_map",
+            "maps.route_heat_map",
+        ):
+            self.skipped[name] = reason
+            print(f"{name:50} skipped ; {reason}", flush=True)
+
+    def run_maps(self):
+        """Time folium map generation and the cached /map/<mapname> route."""
+        try:
+            import appinfo
+            import sysinfo
+            import webviews
+        except ImportError as err:
+            self.skip_maps(f"import failed: {err}")
+            return
+
+        try:
+            web_app = webviews.WebViews(
+                self.app_conf,
+                sysinfo.SystemData(),
+                self.airport_db,
+                appinfo.AppInfo(self.app_conf),
+                self.led_mgmt,
+                None,
+            )
+        except Exception as err:
+            self.skip_maps(f"WebViews setup failed: {err!r}")
+            return
+        self.record("maps.build_led_map", time_calls(web_app.build_led_map, self.repeat))
+        self.record(
+            "maps.build_heat_map", time_calls(web_app.build_heat_map, self.repeat)
+        )
+        client = web_app.app.test_client()
+        for mapname in ("led_map", "heat_map"):
+            # First request builds the map ; timed requests are served from MapCache
+            client.get(f"/map/{mapname}")
+            self.record(
+                f"maps.route_{mapname}",
+                time_calls(lambda: client.get(f"/map/{mapname}"), self.repeat),
+            )
+
+    def run(self) -> dict:
+        """Run all benchmarks ; return results document."""
+        self.run_parsers()
+        self.run_led_modes()
+        self.run_maps()
+        return {
+            "metadata": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "git_commit": git_commit(),
+                "repeat": self.repeat,
+                "frames": self.frames,
+                "fixtures": self.fixture_checksums,
+            },
+            "benchmarks": self.results,
+            "skipped": self.skipped,
+        }
+
+
+def compare_results(previous, current, threshold) -> list:
+    """Print median change per benchmark ; return list of regressed benchmark names."""
+    regressions = []
+    if previous["metadata"].get("fixtures") != current["metadata"]["fixtures"]:
+        print("Warning: fixtures differ from the previous run")
+    print(f"\n{'benchmark':50} {'previous':>12} {'current':>12} {'ratio':>7}")
+    for name, result in current["benchmarks"].items():
+        previous_result = previous["benchmarks"].get(name)
+        if previous_result is None or previous_result["median"] <= 0:
+            continue
+        ratio = result["median"] / previous_result["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:50} {previous_result['median'] * 1000:10.3f}ms"
+            f" {result['median'] * 1000:10.3f}ms {ratio:7.2f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    """Run benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument(
+        "--frames", type=int, default=200, help="frames per LED mode benchmark"
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="median slowdown ratio reported as a regression",
+    )
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as compare_file:
+            previous = json.load(compare_file)
+
+    with tempfile.TemporaryDirectory(prefix="livemap-bench-") as basedir:
+        results = Benchmarks(basedir, args.repeat, args.frames).run()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if previous is not None:
+        regressions = compare_results(previous, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
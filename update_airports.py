@@ -31,7 +31,7 @@ Created on Sat Jun 15 08:01:44 2019.
 
 
 # import os
-import time
+import threading
 from datetime import datetime
 import shutil
 
@@ -46,9 +46,18 @@ from lxml import etree
 import debugging
 
 import utils
+import utils_clock
+import utils_coord
+import utils_geoindex
+import utils_metrics
+import utils_runway
 import utils_taf
 import airport
 
+PARSE_TIME = utils_metrics.histogram(
+    "livemap_parse_seconds", "Time to parse / apply a dataset", ("dataset",)
+)
+
 
 class AirportDB:
     """Airport Database - Keeping track of interesting sets of airport data."""
@@ -58,6 +67,13 @@ class AirportDB:
 
     _dataset_changed = False
 
+    # Bumped when the tracked airport set / airport settings change, and when
+    # airport weather is refreshed ; lets consumers cache data derived from them
+    _airport_set_version = 0
+    _wx_version = 0
+    # Callbacks run with a change type ("airports" / "wx" / "metar") when data changes
+    _change_listeners = []
+
     _metar_serial = -1
     _taf_serial = -1
     _mos_serial = -1
@@ -71,6 +87,34 @@ class AirportDB:
     # Subset of airport_json_list that is active for LEDs
     _airport_led_dict = {}
 
+    # Spatial index over the LED airports
+    _led_geo_index = None
+
+    # Weather source dependency graph ; source station -> airports using it as neigh: wx source
+    _wx_dependents = {}
+    # Airports waiting for refresh_airport() ; refreshed sources first, then dependents
+    _dirty_airports = set()
+    # Airports whose settings changed in the web form ; their runways and the
+    # led / web dicts are rebuilt on the update thread
+    _settings_changed = set()
+    # Guards _dirty_airports and _settings_changed ; the web thread marks, the
+    # update thread refreshes
+    _dirty_lock = None
+
+    # Nearest reporting station fallback
+    # Spatial index over every station with coordinates, and for each tracked airport
+    # the list of (distance_nm, station) candidates ; nearest first
+    _station_geo_index = None
+    _fallback_candidates = {}
+    _fallback_key = None
+    _fallback_enabled = False
+    _fallback_radius_nm = 25
+    _metar_max_age = 2.5
+    _fallback_conf_changed = False
+    _update_interval = 5
+    _wakeup = None
+    FALLBACK_CANDIDATES = 5
+
     # Copy of raw json entries loaded from config
     _airport_master_list = []
 
@@ -85,6 +129,9 @@ class AirportDB:
     # Primary Data Sets - Imported from Internet/External Sources
     _runway_data = None
     _airport_data = None
+    # runways.csv rows grouped by airport, and parsed RunwayEnds for each airport
+    _runway_index = {}
+    _runway_ends = {}
 
     # Debug
     _debug_airport_list = ["kbfi", "11s", "w04"]
@@ -108,6 +155,10 @@ class AirportDB:
         self._runway_serial = -1
         self._airport_serial = -1
 
+        self._airport_set_version = 0
+        self._wx_version = 0
+        self._change_listeners = []
+
         # Active Airport Information
         # All lists use lowercase key information to identify airports
         # Full list of interesting Airports loaded from JSON data
@@ -118,6 +169,33 @@ class AirportDB:
 
         # Subset of airport_json_list that is active for LEDs
         self._airport_led_dict = {}
+        self._led_geo_index = utils_geoindex.GeoIndex()
+
+        self._wx_dependents = {}
+        self._dirty_airports = set()
+        self._settings_changed = set()
+        self._dirty_lock = threading.Lock()
+
+        self._station_geo_index = utils_geoindex.GeoIndex()
+        self._fallback_candidates = {}
+        self._fallback_key = None
+        self._fallback_enabled = self._app_conf.get_bool("metar", "nearest_fallback")
+        self._fallback_radius_nm = self._app_conf.get_float(
+            "metar", "nearest_fallback_nm"
+        )
+        self._metar_max_age = self._app_conf.get_float("metar", "metar_age")
+        self._fallback_conf_changed = False
+        self._update_interval = self._app_conf.get_int("metar", "wx_update_interval")
+        self._wakeup = threading.Event()
+        self._app_conf.subscribe(
+            self.conf_changed,
+            [
+                ("metar", "nearest_fallback"),
+                ("metar", "nearest_fallback_nm"),
+                ("metar", "metar_age"),
+                ("metar", "wx_update_interval"),
+            ],
+        )
 
         # Copy of raw json entries loaded from config
         self._airport_master_list = []
@@ -134,6 +212,8 @@ class AirportDB:
         # Primary Data Sets - Imported from Internet/External Sources
         # Runway Data
         self._runway_data = None
+        self._runway_index = {}
+        self._runway_ends = {}
         # Airport Data
         self._airport_data = None
 
@@ -163,7 +243,10 @@ class AirportDB:
         """Return string containing pertinent stats."""
         min_metar_update_interval = 10000
         max_airport_update_count = 0
+        fallback_count = 0
         for airport_icao, airport_obj in self._airport_master_dict.items():
+            if airport_obj.fallback_station() is not None:
+                fallback_count += 1
             aprt_min_update_interval = airport_obj.min_update_interval()
             aprt_max_update_count = airport_obj.update_count()
             if aprt_min_update_interval < min_metar_update_interval:
@@ -175,6 +258,7 @@ class AirportDB:
             f"Statistics:\n\tairport master dict {len(self._airport_master_dict)} entries\n\tairport_web_dict: {len(self._airport_web_dict)}"
             + f"\n\tairport_led_dict: {len(self._airport_led_dict)}\n\tmax_metar_count: {max_airport_update_count}"
             + f"\n\tmin_update_interval: {min_metar_update_interval}\n\terror_count: {self._error_count}"
+            + f"\n\tfallback_wx: {fallback_count}"
         )
 
     def create_new_airport_record(self, station_id, metar_data):
@@ -218,6 +302,31 @@ class AirportDB:
         """Return Airport LED dict."""
         return self._airport_led_dict
 
+    def led_geo_index(self):
+        """Return spatial index of LED airports ; rebuilt if any coordinates have changed."""
+        self._led_geo_index.update_from_airports(self._airport_led_dict)
+        return self._led_geo_index
+
+    def airport_set_version(self) -> int:
+        """Return version of the tracked airport set ; changes on any airport settings update."""
+        return self._airport_set_version
+
+    def wx_version(self) -> int:
+        """Return version of the airport weather snapshot ; changes when airports are refreshed."""
+        return self._wx_version
+
+    def add_change_listener(self, callback):
+        """Register callback(change_type) ; called from the airport update thread."""
+        self._change_listeners.append(callback)
+
+    def notify_change(self, change_type):
+        """Tell change listeners that airport data has changed."""
+        for callback in self._change_listeners:
+            try:
+                callback(change_type)
+            except Exception as err:
+                debugging.error(f"Change listener failed for {change_type}: {err}")
+
     def get_metar_update_time(self):
         """Return last update time of metar data."""
         return self._metar_update_time
@@ -282,6 +391,7 @@ class AirportDB:
                 debugging.info(
                     f"airport_webform_update: {airport_icao} not in airport_master_dict, creating new airport"
                 )
+                previous_settings = None
 
                 # Need to see if led_index exists and is associated with a different airport in _airport_master_dict
                 # If it is; then we need to remove the led_index assignment, and set the purpose to _unused_
@@ -300,6 +410,12 @@ class AirportDB:
                     new_metarsrc_data = "adds"
             else:
                 new_airport_object = self._airport_master_dict[airport_icao]
+                previous_settings = (
+                    new_airport_object.wxsrc(),
+                    new_airport_object.purpose(),
+                    new_airport_object.get_led_index(),
+                    new_airport_object.active(),
+                )
                 new_metarsrc_data = metarsrc_data[led_index]
                 if new_metarsrc_data == "":
                     new_metarsrc_data = self._airport_master_dict[airport_icao].wxsrc()
@@ -310,13 +426,20 @@ class AirportDB:
 
             new_airport_object.loaded_from_config(True)
             new_airport_object.set_active()
-            debugging.info(
-                f"airport_webform_update: {airport_icao} triggering update_wx()"
+            new_settings = (
+                new_airport_object.wxsrc(),
+                new_airport_object.purpose(),
+                new_airport_object.get_led_index(),
+                new_airport_object.active(),
             )
-            new_airport_object.update_wx(self._airport_master_dict)
+            if new_settings != previous_settings:
+                debugging.info(
+                    f"airport_webform_update: {airport_icao} changed ; triggering refresh"
+                )
+                self.mark_airport_settings_changed(airport_icao)
 
-        self.airport_dicts_update()
-        self.update_airport_runways()
+        # Changed airports are refreshed on the update thread
+        self._wakeup.set()
         debugging.info(f"Completed processing dict from webform")
 
         return
@@ -330,7 +453,7 @@ class AirportDB:
             self._airport_master_list.append(json_airport)
             airport_icao = json_airport["icao"]
             airport_icao = airport_icao.lower()
-            debugging.info(f"Parsing Json Airport List : {airport_icao}")
+            debugging.debug("Parsing Json Airport List : %s", airport_icao)
 
             if airport_icao in ("null", "lgnd"):
                 # Need a Primary Key if icao code is null or lgnd
@@ -338,7 +461,7 @@ class AirportDB:
                 airport_icao = f"{airport_icao}:{ledindex}"
 
             if airport_icao not in self._airport_master_dict.keys():
-                debugging.info(f"Adding {airport_icao} to airport_master_dict")
+                debugging.debug("Adding %s to airport_master_dict", airport_icao)
                 new_airport_object = self.create_new_airport_record(airport_icao, None)
                 self._airport_master_dict.update({airport_icao: new_airport_object})
             else:
@@ -359,9 +482,10 @@ class AirportDB:
             new_airport_object.set_heatmap_index(json_airport["heatmap"])
 
             new_airport_object.loaded_from_config(True)
+            self.mark_airport_dirty(airport_icao)
 
             if utils.str2bool(json_airport["active"]):
-                debugging.info(f"Loaded and activated airport :{airport_icao}:")
+                debugging.debug("Loaded and activated airport :%s:", airport_icao)
                 new_airport_object.set_active()
             else:
                 new_airport_object.set_inactive()
@@ -380,8 +504,10 @@ class AirportDB:
         debugging.info(
             f"Copying master dict to other lists {len(self._airport_master_dict)} items"
         )
+        previous_led_airports = set(self._airport_led_dict.keys())
+        previous_web_airports = set(self._airport_web_dict.keys())
         for airport_icao, airport_obj in list(self._airport_master_dict.items()):
-            debugging.debug(f"Airport dicts update for : {airport_icao} :")
+            debugging.debug("Airport dicts update for : %s :", airport_icao)
             airport_purpose = airport_obj.purpose()
             if airport_purpose in ("unused"):
                 self._airport_led_dict.pop(airport_icao, None)
@@ -392,6 +518,14 @@ class AirportDB:
             if airport_purpose in ("web", "all"):
                 self._airport_web_dict.update({airport_icao: airport_obj})
                 debugging.info(f"Adding airport to airport_web_dict : {airport_icao}")
+        self.update_wx_dependencies()
+        self._airport_set_version += 1
+        self.notify_change("airports")
+        # Only reload the datasets when the set of tracked airports changed ;
+        # setting changes for existing airports are handled by refresh_dirty_airports()
+        if (previous_led_airports != set(self._airport_led_dict.keys())) or (
+            previous_web_airports != set(self._airport_web_dict.keys())
+        ):
             self._dataset_changed = True
         return True
 
@@ -438,6 +572,7 @@ class AirportDB:
         with open(airport_json_new, "w", encoding="utf-8") as json_file:
             json.dump(json_save_data, json_file, sort_keys=False, indent=4)
         shutil.move(airport_json_new, airport_json)
+        self._airport_set_version += 1
 
     def update_airportdb_metar_xml(self):
         """Update Airport METAR DICT from XML."""
@@ -465,6 +600,7 @@ class AirportDB:
         debugging.debug("Updating Airports: XML Parse Complete")
         metar_data = []
         display_counter = 0
+        changed_stations = []
 
         for metar_data in root.iter("METAR"):
             if metar_data is None:
@@ -484,12 +620,19 @@ class AirportDB:
                     station_id, metar_raw
                 )
                 self._airport_master_dict[station_id] = new_airport_object
+                previous_metar = None
+            else:
+                previous_metar = self._airport_master_dict[station_id].raw_metar()
             self._airport_master_dict[station_id].update_from_adds_xml(
                 station_id, metar_data
             )
+            if self._airport_master_dict[station_id].raw_metar() != previous_metar:
+                changed_stations.append(station_id)
 
+        self.mark_wx_changed(changed_stations)
         self._metar_xml_dict = metar_data
-        self._metar_update_time = datetime.now(pytz.utc)
+        self._metar_update_time = utils_clock.now(pytz.utc)
+        self.notify_change("metar")
         debugging.debug("Updating Airports: METAR from XML Complete")
         return True
 
@@ -497,7 +640,6 @@ class AirportDB:
         """Process contents of TAF forecast."""
         # TODO: Consider moving to airport object
 
-        taf_forecast = []
         fcast = {
             "start": forecast.find("fcst_time_from").text,
             "end": forecast.find("fcst_time_to").text,
@@ -615,8 +757,7 @@ class AirportDB:
                 debugging.debug("Wind Gust - " + fcast["wind_gust_kt"])
 
         fcast["flightcategory"] = flightcategory
-        taf_forecast.append(fcast)
-        return taf_forecast
+        return fcast
 
     def update_airport_taf_xml(self):
         """Update Airport TAF DICT from XML."""
@@ -674,7 +815,7 @@ class AirportDB:
             debugging.debug(f"TAF: {station_id} - {issue_time} - {fcast_index - 1}")
 
         self._taf_xml_dict = taf_dict
-        self._taf_update_time = datetime.now(pytz.utc)
+        self._taf_update_time = utils_clock.now(pytz.utc)
         debugging.info("Updating Airport TAF from XML")
         return True
 
@@ -682,39 +823,35 @@ class AirportDB:
         """Get taf for future state"""
         airport_taf = self.get_airport_taf(airport_id)
         if airport_taf is None:
-            debugging.info(f"Airport TAF {airport_id} not found")
+            debugging.debug("Airport TAF %s not found", airport_id)
             return None
-        debugging.info(f"airport_taf_future:{airport_id}:+{hour_increment}hr")
         time_taf = utils_taf.future_taf_time(self._app_conf, hour_increment)
-        debugging.info(f"airport_taf time_taf:{airport_id}:{time_taf}")
+        debugging.debug(
+            "airport_taf_future:%s:+%shr time_taf:%s", airport_id, hour_increment, time_taf
+        )
         future_taf = None
         for forecast in airport_taf["forecast"]:
             fcast_start = datetime.strptime(forecast["start"], "%Y-%m-%dT%H:%M:%SZ")
             fcast_end = datetime.strptime(forecast["end"], "%Y-%m-%dT%H:%M:%SZ")
-            debugging.info(
-                f"airport_taf forecast:{airport_id}:  s:{fcast_start}:  e:{fcast_end}"
-            )
             if utils.time_in_range(fcast_start, fcast_end, time_taf):
-                debugging.info(f"{airport_id}:*:{forecast}")
+                debugging.debug("%s:*:%s", airport_id, forecast)
                 future_taf = forecast
             else:
-                debugging.info(f"{airport_id}:.:{forecast}")
+                debugging.debug("%s:.:%s", airport_id, forecast)
         return future_taf
 
     def get_airport_runway_data(self, airport_id):
         """Find Airport data in Runway DICT."""
-        runway_set = []
-        if self._runway_data is None:
-            return runway_set
-        airport_id_upper = airport_id.upper()
-        airport_id_lower = airport_id.lower()
-        for runway_info in self._runway_data:
-            if (runway_info["airport_ident"] == airport_id_upper) or (
-                runway_info["airport_ident"] == airport_id_lower
-            ):
-                debugging.debug(f"Airport Runway Data Found: {runway_info}")
-                runway_set.append(runway_info)
-        return runway_set
+        return self._runway_index.get(airport_id.lower(), [])
+
+    def get_airport_runway_ends(self, airport_id):
+        """Return parsed runway ends for airport ; parsed on first use."""
+        airport_id = airport_id.lower()
+        runway_ends = self._runway_ends.get(airport_id)
+        if runway_ends is None:
+            runway_ends = utils_runway.RunwayEnds(self.get_airport_runway_data(airport_id))
+            self._runway_ends[airport_id] = runway_ends
+        return runway_ends
 
     def import_runways(self):
         """Load CSV Runways file."""
@@ -729,7 +866,17 @@ class AirportDB:
             runway_data = list(csv.DictReader(rway_file))
             index_counter += 1
         debugging.debug(f"CSV Load found {index_counter} rows")
+        runway_index = {}
+        for runway_info in runway_data:
+            runway_index.setdefault(runway_info["airport_ident"].lower(), []).append(
+                runway_info
+            )
         self._runway_data = runway_data
+        self._runway_index = runway_index
+        # Pre-parse runway headings and lengths for known airports ; others are parsed on demand
+        self._runway_ends = {}
+        for airport_icao in self._airport_master_dict:
+            self.get_airport_runway_ends(airport_icao)
         return True
 
     def import_airport_geo_data(self):
@@ -787,19 +934,240 @@ class AirportDB:
 
     def update_airport_runways(self):
         """Update airport RUNWAY data for each known Airport."""
+        for icao in self._airport_master_dict:
+            self.update_airport_runway(icao)
+        debugging.info(f"Airport Runway Updated")
+
+    def update_airport_runway(self, icao):
+        """Update airport RUNWAY data for a single Airport."""
+        airport_obj = self._airport_master_dict.get(icao)
+        if airport_obj is None or not airport_obj.active():
+            return
+        debugging.debug("Updating Runway for %s", icao)
+        try:
+            runway_dataset = self.get_airport_runway_data(icao)
+            airport_obj.set_runway_data(
+                runway_dataset, self.get_airport_runway_ends(icao)
+            )
+        except Exception as err:
+            self._error_count += 1
+            debug_string = f"Error: update_airport_runways Exception handling for {airport_obj.icao_code()}"
+            debugging.error(debug_string)
+            debugging.crash(err)
+
+    def conf_changed(self, changes):
+        """Apply updated metar settings ; the update loop is woken to act on them."""
+        self._fallback_enabled = self._app_conf.get_bool("metar", "nearest_fallback")
+        self._fallback_radius_nm = self._app_conf.get_float(
+            "metar", "nearest_fallback_nm"
+        )
+        self._metar_max_age = self._app_conf.get_float("metar", "metar_age")
+        self._update_interval = self._app_conf.get_int("metar", "wx_update_interval")
+        if ("metar", "wx_update_interval") not in changes or len(changes) > 1:
+            self._fallback_conf_changed = True
+        self._wakeup.set()
+
+    def tracked_airports(self):
+        """Return set of ICAO codes for airports shown on LEDs or the web."""
+        return set(self._airport_led_dict.keys()) | set(self._airport_web_dict.keys())
+
+    def update_fallback_candidates(self):
+        """Precompute nearest reporting station candidates for each tracked airport."""
+        self._station_geo_index.update(
+            (icao, airport_obj.longitude(), airport_obj.latitude())
+            for icao, airport_obj in self._airport_master_dict.items()
+            if airport_obj.valid_coordinates()
+        )
+        tracked = self.tracked_airports()
+        tracked_coordinates = tuple(
+            (icao, self._station_geo_index.position(icao)) for icao in sorted(tracked)
+        )
+        fallback_key = (
+            self._station_geo_index.serial(),
+            tracked_coordinates,
+            self._fallback_radius_nm,
+        )
+        if fallback_key == self._fallback_key:
+            return
+        self._fallback_key = fallback_key
+
+        fallback_candidates = {}
+        for icao, position in tracked_coordinates:
+            if position is None:
+                continue
+            (lon, lat) = position
+            candidates = []
+            for distance, station_icao in self._station_geo_index.nearest(
+                lon,
+                lat,
+                self.FALLBACK_CANDIDATES + 1,
+                self._fallback_radius_nm / 60,
+                scale_lon=True,
+            ):
+                if station_icao == icao:
+                    continue
+                station_lon, station_lat = self._station_geo_index.position(
+                    station_icao
+                )
+                distance_nm = utils_coord.distance_nm(
+                    lon, lat, station_lon, station_lat
+                )
+                if distance_nm <= self._fallback_radius_nm:
+                    candidates.append((distance_nm, station_icao))
+            candidates.sort()
+            fallback_candidates[icao] = candidates[: self.FALLBACK_CANDIDATES]
+        self._fallback_candidates = fallback_candidates
+        debugging.info(
+            f"Fallback wx candidates updated for {len(fallback_candidates)} airports"
+        )
+
+    def apply_nearest_fallback(self, airport_obj):
+        """Use the nearest fresh reporting station if the airport has no fresh METAR."""
+        if not self._fallback_enabled:
+            airport_obj.clear_fallback()
+            return
+        source_obj = self._airport_master_dict.get(airport_obj.wxsrc_station())
+        if source_obj is not None and source_obj.metar_fresh(self._metar_max_age):
+            airport_obj.clear_fallback()
+            return
+        for distance_nm, station_icao in self._fallback_candidates.get(
+            airport_obj.icao_code(), ()
+        ):
+            station_obj = self._airport_master_dict.get(station_icao)
+            if station_obj is not None and station_obj.metar_fresh(
+                self._metar_max_age
+            ):
+                airport_obj.use_fallback_metar(station_icao, station_obj.raw_metar())
+                return
+        airport_obj.clear_fallback()
+
+    def apply_nearest_fallbacks(self):
+        """Apply nearest station fallback to all tracked airports."""
+        if not self._fallback_enabled:
+            return
+        fallback_airports = []
+        for icao in self.tracked_airports():
+            airport_obj = self._airport_master_dict.get(icao)
+            if airport_obj is not None and airport_obj.active():
+                self.apply_nearest_fallback(airport_obj)
+                if airport_obj.fallback_station() is not None:
+                    fallback_airports.append(icao)
+        self.refresh_best_runways(fallback_airports)
+        self._wx_version += 1
+        self.notify_change("wx")
+
+    def refresh_best_runways(self, icao_list):
+        """Recompute best runway and wind components for a set of airports in one pass."""
+        airport_list = [
+            self._airport_master_dict[icao]
+            for icao in icao_list
+            if icao in self._airport_master_dict
+        ]
+        if not airport_list:
+            return
+        best_index, headwind, crosswind = utils_runway.best_runways(
+            [airport_obj.runway_ends() for airport_obj in airport_list],
+            [airport_obj.winddir_degrees() for airport_obj in airport_list],
+            [max(airport_obj.wx_windspeed(), 0) for airport_obj in airport_list],
+        )
+        for position, airport_obj in enumerate(airport_list):
+            airport_obj.set_best_runway(
+                best_index[position], headwind[position], crosswind[position]
+            )
+
+    def update_wx_dependencies(self):
+        """Rebuild graph of weather source station to dependent airports."""
+        wx_dependents = {}
         for icao, airport_obj in self._airport_master_dict.items():
-            debugging.debug(f"Updating Runway for {airport_obj.icao_code()}")
-            if not airport_obj.active():
+            if airport_obj.wxsrc_neighbor():
+                wx_dependents.setdefault(airport_obj.wxsrc_station(), set()).add(icao)
+        self._wx_dependents = wx_dependents
+
+    def mark_airport_dirty(self, icao_code):
+        """Queue airport (and anything using it as a wx source) for refresh."""
+        with self._dirty_lock:
+            self._dirty_airports.add(icao_code)
+
+    def mark_airport_settings_changed(self, icao_code):
+        """Queue airport for refresh after its web form settings changed."""
+        with self._dirty_lock:
+            self._settings_changed.add(icao_code)
+            self._dirty_airports.add(icao_code)
+
+    def mark_wx_changed(self, station_list):
+        """Queue refresh for stations with a new METAR that are tracked or used as a wx source."""
+        tracked = self.tracked_airports()
+        changed = [
+            station_icao
+            for station_icao in station_list
+            if station_icao in tracked or station_icao in self._wx_dependents
+        ]
+        with self._dirty_lock:
+            self._dirty_airports.update(changed)
+
+    def wx_refresh_order(self, icao_codes):
+        """Return icao_codes plus all their dependents ; sources before dependents."""
+        # Collect the affected part of the graph
+        affected = set()
+        pending = list(icao_codes)
+        while pending:
+            icao = pending.pop()
+            if icao in affected:
                 continue
-            try:
-                runway_dataset = self.get_airport_runway_data(icao)
-                airport_obj.set_runway_data(runway_dataset)
-            except Exception as err:
-                self._error_count += 1
-                debug_string = f"Error: update_airport_runways Exception handling for {airport_obj.icao_code()}"
-                debugging.error(debug_string)
-                debugging.crash(err)
-        debugging.info(f"Airport Runway Updated")
+            affected.add(icao)
+            pending.extend(self._wx_dependents.get(icao, ()))
+
+        # Topological sort (Kahn) of the affected airports
+        indegree = dict.fromkeys(affected, 0)
+        for icao in affected:
+            for dependent in self._wx_dependents.get(icao, ()):
+                indegree[dependent] += 1
+        ready = sorted(icao for icao, count in indegree.items() if count == 0)
+        refresh_order = []
+        while ready:
+            icao = ready.pop()
+            refresh_order.append(icao)
+            for dependent in sorted(self._wx_dependents.get(icao, ())):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(refresh_order) < len(affected):
+            wx_cycle = sorted(affected.difference(refresh_order))
+            debugging.warn(f"neigh: wx source loop between {wx_cycle}")
+            refresh_order.extend(wx_cycle)
+        return refresh_order
+
+    def refresh_dirty_airports(self) -> int:
+        """Refresh queued airports and their dependents in dependency order.
+
+        Only called on the update thread ; other threads mark airports dirty and
+        set _wakeup.
+        """
+        with self._dirty_lock:
+            dirty_airports = self._dirty_airports
+            self._dirty_airports = set()
+            settings_changed = self._settings_changed
+            self._settings_changed = set()
+        if settings_changed:
+            self.airport_dicts_update()
+            for icao in settings_changed:
+                self.update_airport_runway(icao)
+            if self._dataset_changed:
+                # Tracked airport set changed ; reload datasets on the next pass
+                self._wakeup.set()
+        if not dirty_airports:
+            return 0
+        refresh_order = self.wx_refresh_order(dirty_airports)
+        for icao in refresh_order:
+            self.refresh_airport(icao)
+        self.refresh_best_runways(refresh_order)
+        self._wx_version += 1
+        self.notify_change("wx")
+        debugging.info(
+            f"Refreshed {len(refresh_order)} airports ({len(dirty_airports)} changed)"
+        )
+        return len(refresh_order)
 
     def refresh_airport(self, icao_code):
         """Refresh individual airport"""
@@ -812,7 +1180,7 @@ class AirportDB:
                 airport_obj.update_coordinates(new_lon, new_lat)
 
         airport_obj.update_wx(self._airport_master_dict)
-        airport_obj.refresh_best_runway()
+        self.apply_nearest_fallback(airport_obj)
 
     def update_loop(self, app_conf):
         """Master loop for keeping the airport data set current.
@@ -826,69 +1194,82 @@ class AirportDB:
 
         Triggered Update
         """
-        aviation_weather_adds_timer = app_conf.get_int("metar", "wx_update_interval")
-
         # TODO: Should these files be updated in a separate thread
         # should this update loop focus on creating and managing complete database records for only the
         # airports that we currently care about ?
 
         while True:
             debugging.debug(
-                f"Updating Airport Data .. every aviation_weather_adds_timer ({aviation_weather_adds_timer})m)"
+                f"Updating Airport Data .. every aviation_weather_adds_timer ({self._update_interval})m)"
             )
-
-            if (
-                self._metar_serial < self._dataset.metar_serial()
-            ) or self._dataset_changed:
-                debugging.debug("Processing updated METAR data")
-                self._metar_serial = self._dataset.metar_serial()
+            # Clear before processing so a wakeup set meanwhile is not lost
+            self._wakeup.clear()
+            self.process_datasets()
+            self._wakeup.wait(self._update_interval * 60)
+
+    def process_datasets(self):
+        """Process any datasets updated since the last pass, then refresh dirty airports."""
+        if self._fallback_conf_changed:
+            # Nearest fallback settings changed ; re-evaluate every tracked airport
+            debugging.info("Fallback settings changed")
+            self._fallback_conf_changed = False
+            self.update_fallback_candidates()
+            for icao in self.tracked_airports():
+                self.mark_airport_dirty(icao)
+
+        if (self._metar_serial < self._dataset.metar_serial()) or self._dataset_changed:
+            debugging.debug("Processing updated METAR data")
+            self._metar_serial = self._dataset.metar_serial()
+            with PARSE_TIME.time(("metar",)):
                 self.update_airportdb_metar_xml()
-                # self.update_airport_wx()
-
-            if (self._taf_serial < self._dataset.taf_serial()) or self._dataset_changed:
-                debugging.debug("Processing updated TAF data")
-                self._taf_serial = self._dataset.taf_serial()
+            # self.update_airport_wx()
+            self.update_fallback_candidates()
+            self.apply_nearest_fallbacks()
+
+        if (self._taf_serial < self._dataset.taf_serial()) or self._dataset_changed:
+            debugging.debug("Processing updated TAF data")
+            self._taf_serial = self._dataset.taf_serial()
+            with PARSE_TIME.time(("taf",)):
                 self.update_airport_taf_xml()
 
-            if (
-                self._runway_serial < self._dataset.runway_serial()
-            ) or self._dataset_changed:
-                debugging.debug("Processing updated Runway data")
-                self._runway_serial = self._dataset.runway_serial()
+        if (
+            self._runway_serial < self._dataset.runway_serial()
+        ) or self._dataset_changed:
+            debugging.debug("Processing updated Runway data")
+            self._runway_serial = self._dataset.runway_serial()
+            with PARSE_TIME.time(("runways",)):
                 self.import_runways()
                 self.update_airport_runways()
-
-            if (
-                self._airport_serial < self._dataset.airport_serial()
-            ) or self._dataset_changed:
-                debugging.debug("Processing updated Airport data")
-                self._airport_serial = self._dataset.airport_serial()
+            for icao in self.tracked_airports():
+                self.mark_airport_dirty(icao)
+
+        if (
+            self._airport_serial < self._dataset.airport_serial()
+        ) or self._dataset_changed:
+            debugging.debug("Processing updated Airport data")
+            self._airport_serial = self._dataset.airport_serial()
+            with PARSE_TIME.time(("airports",)):
                 self.import_airport_geo_data()
-                self.update_airport_lon_lat()
-                # Need to use the data in airports.csv to provide lat/lon data for any airports.
-
-            if (self._mos_serial < self._dataset.mos_serial()) or self._dataset_changed:
-                debugging.debug("Processing updated MOS data")
-                self._mos_serial = self._dataset.mos_serial()
+            self.update_airport_lon_lat()
+            self.update_fallback_candidates()
+            # Need to use the data in airports.csv to provide lat/lon data for any airports.
+
+        if (self._mos_serial < self._dataset.mos_serial()) or self._dataset_changed:
+            debugging.debug("Processing updated MOS data")
+            self._mos_serial = self._dataset.mos_serial()
+            with PARSE_TIME.time(("mos",)):
                 self.populate_mos_data()
 
-            if self._dataset_changed:
-                self._dataset_changed = False
-                debugging.info(f"Triggering airport refresh :_dataset_changed: is True")
-                # This updates the all the airports with Primary WX data first; then does any with neigh: WX sources
-                for airport_obj in self._airport_master_dict.values():
-                    # Update all airports with Direct WX src
-                    if not airport_obj.wxsrc_neighbor():
-                        self.refresh_airport(airport_obj.icao_code())
-                for airport_obj in self._airport_master_dict.values():
-                    # Update all airports using neigh: as a WX src
-                    if airport_obj.wxsrc_neighbor():
-                        self.refresh_airport(airport_obj.icao_code())
-
-            for airport_icao in self._debug_airport_list:
-                debug_taf = self.get_airport_taf(airport_icao)
-                debugging.info(f"Debug TAF : {airport_icao}/{debug_taf}")
-                debug_runway = self.get_airport_runway_data(airport_icao)
-                debugging.info(f"Runway data - {airport_icao}/{debug_runway}:")
-
-            time.sleep(aviation_weather_adds_timer * 60)
+        if self._dataset_changed:
+            self._dataset_changed = False
+            debugging.info(f"Datasets reloaded :_dataset_changed: was True")
+
+        # Refresh airports whose settings or upstream METAR changed ; sources before dependents
+        with PARSE_TIME.time(("refresh",)):
+            self.refresh_dirty_airports()
+
+        for airport_icao in self._debug_airport_list:
+            debug_taf = self.get_airport_taf(airport_icao)
+            debugging.info(f"Debug TAF : {airport_icao}/{debug_taf}")
+            debug_runway = self.get_airport_runway_data(airport_icao)
+            debugging.info(f"Runway data - {airport_icao}/{debug_runway}:")
@@ -14,8 +14,10 @@ Created on Sat Jun 15 08:01:44 2019.
 # TODO: Get any/all the error handling for connectivity issues moved here
 
 
-# import os
-import time
+import gzip
+import os
+import shutil
+import threading
 import requests
 
 import debugging
@@ -43,6 +45,13 @@ class DataSets:
 
     _error_count = 0
 
+    # Settings from config ; reloaded when the config is saved
+    _update_interval = 5
+    _sources = {}
+    _sources_changed = False
+    _archive_dir = None
+    _wakeup = None
+
     def __init__(self, app_conf):
         """Tracking freshness of data sets ; internally using the time stamp of when the updated was pulled
         Clients of this class use a serial number - so that the ability to determine if something was updated is straightforward.
@@ -61,6 +70,51 @@ class DataSets:
         self._airport_update_time = None
         self._airport_serial_num = 0
         self._error_count = 0
+        self._sources = {}
+        self._sources_changed = False
+        self._archive_dir = None
+        self._wakeup = threading.Event()
+        self.load_conf_settings()
+        self._app_conf.subscribe(
+            self.conf_changed,
+            [("urls", "*"), ("filenames", "*"), ("metar", "wx_update_interval")],
+        )
+
+    def load_conf_settings(self):
+        """Read update interval and dataset (url, filename) pairs from config."""
+        self._update_interval = self._app_conf.get_int("metar", "wx_update_interval")
+        self._sources = {
+            "metar": (
+                self._app_conf.get_string("urls", "metar_xml_gz"),
+                self._app_conf.get_string("filenames", "metar_xml_data"),
+            ),
+            "tafs": (
+                self._app_conf.get_string("urls", "tafs_xml_gz"),
+                self._app_conf.get_string("filenames", "tafs_xml_data"),
+            ),
+            "runways": (
+                self._app_conf.get_string("urls", "runways_csv_url"),
+                self._app_conf.get_string("filenames", "runways_master_data"),
+            ),
+            "airports": (
+                self._app_conf.get_string("urls", "airports_csv_url"),
+                self._app_conf.get_string("filenames", "airports_master_data"),
+            ),
+            "mos00": (
+                self._app_conf.get_string("urls", "mos00_data_gz"),
+                self._app_conf.get_string("filenames", "mos00_xml_data"),
+            ),
+        }
+        # Directory to keep a copy of every downloaded dataset in ; for replay.py
+        self._archive_dir = self._app_conf.get_string("filenames", "dataset_archive")
+
+    def conf_changed(self, changes):
+        """Reload settings ; a changed url or filename triggers an immediate download."""
+        old_sources = self._sources
+        self.load_conf_settings()
+        if self._sources != old_sources:
+            self._sources_changed = True
+        self._wakeup.set()
 
     def metar_update_time(self):
         """Get last time metar data was updated."""
@@ -119,12 +173,60 @@ class DataSets:
         ret, new_etag_mos = utils.download_newer_file(
             https_session, mos_xml_url, mos_file, etag=etag_mos
         )
-        if ret is True:
-            debugging.debug(f"Downloaded :{mos_file}: file")
-        elif ret is False:
+        if ret is False:
             debugging.debug(f"Server side :{mos_file}: older")
             return False, etag_mos
+        debugging.debug(f"Downloaded :{mos_file}: file")
+        self.dataset_updated("mos00")
+        return True, new_etag_mos
+
+    def source_file(self, dataset_name):
+        """Return local filename for dataset ; metar, tafs, runways, airports or mos00."""
+        return self._sources[dataset_name][1]
+
+    def dataset_updated(self, dataset_name):
+        """Record a new copy of a dataset file ; AirportDB picks it up by serial number."""
+        update_time = utils.current_time_utc(self._app_conf)
+        if self._archive_dir:
+            self.archive_dataset(dataset_name, update_time)
+        if dataset_name == "metar":
+            self._metar_update_time = update_time
+            self._metar_serial_num += 1
+        elif dataset_name == "tafs":
+            self._taf_update_time = update_time
+            self._taf_serial_num += 1
+        elif dataset_name == "runways":
+            self._runway_update_time = update_time
+            self._runway_serial_num += 1
+        elif dataset_name == "airports":
+            self._airport_update_time = update_time
+            self._airport_serial_num += 1
+        elif dataset_name == "mos00":
+            self.load_mos_forecast()
+            self._mos_update_time = update_time
+            self._mos_serial_num += 1
+
+    def archive_dataset(self, dataset_name, update_time):
+        """Save gzipped copy of dataset file in archive_dir/<YYYYmmddTHHMMSSZ>/."""
+        source_file = self.source_file(dataset_name)
+        snapshot_dir = os.path.join(
+            self._archive_dir, update_time.strftime("%Y%m%dT%H%M%SZ")
+        )
+        archive_file = os.path.join(
+            snapshot_dir, os.path.basename(source_file) + ".gz"
+        )
+        try:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            with open(source_file, "rb") as source, gzip.open(
+                archive_file, "wb"
+            ) as archive:
+                shutil.copyfileobj(source, archive)
+        except OSError as err:
+            self._error_count += 1
+            debugging.error(f"Dataset archive failed for {dataset_name}: {err}")
 
+    def load_mos_forecast(self):
+        """Decode the local MOS data file into the forecast data set."""
         try:
             self._mos_forecast_updated, self._mos_forecast = (
                 utils_mos.mos_analyze_datafile(
@@ -136,8 +238,6 @@ class DataSets:
             debugging.error("MOS Refresh")
             debugging.error(err)
 
-        return True, new_etag_mos
-
     def update_loop(self, app_conf):
         """Master loop for keeping the data set current.
 
@@ -151,23 +251,6 @@ class DataSets:
 
         Triggered Update
         """
-        aviation_weather_adds_timer = app_conf.get_int("metar", "wx_update_interval")
-
-        # TODO: Do we really need these, or can we just do the conf lookup when needed
-        # Might be better to pull them from the conf file on demand,
-        # to allow the config to be dynamically updated without needing a restart
-        metar_xml_url = app_conf.get_string("urls", "metar_xml_gz")
-        metar_file = app_conf.get_string("filenames", "metar_xml_data")
-        runways_csv_url = app_conf.get_string("urls", "runways_csv_url")
-        airports_csv_url = app_conf.get_string("urls", "airports_csv_url")
-        runways_master_data = app_conf.get_string("filenames", "runways_master_data")
-        airport_master_metadata_set = app_conf.get_string(
-            "filenames", "airports_master_data"
-        )
-        tafs_xml_url = app_conf.get_string("urls", "tafs_xml_gz")
-        tafs_file = app_conf.get_string("filenames", "tafs_xml_data")
-        mos00_xml_url = app_conf.get_string("urls", "mos00_data_gz")
-        mos00_file = app_conf.get_string("filenames", "mos00_xml_data")
         # mos06_xml_url = app_conf.get_string("urls", "mos06_data_gz")
         # mos06_file = app_conf.get_string("filenames", "mos06_xml_data")
         # mos12_xml_url = app_conf.get_string("urls", "mos12_data_gz")
@@ -185,15 +268,29 @@ class DataSets:
         etag_airports = None
 
         # Initial load of MOS data set
-        self._mos_forecast_updated, self._mos_forecast = utils_mos.mos_analyze_datafile(
-            self._app_conf,
-        )
+        self.load_mos_forecast()
 
         while True:
             debugging.debug(
-                f"Updating Airport Data .. every aviation_weather_adds_timer {aviation_weather_adds_timer}m)"
+                f"Updating Airport Data .. every aviation_weather_adds_timer {self._update_interval}m)"
             )
 
+            if self._sources_changed:
+                # New urls / files ; don't trust etags from the old sources
+                debugging.info("Dataset sources changed ; refreshing all datasets")
+                self._sources_changed = False
+                etag_metar = None
+                etag_tafs = None
+                etag_mos00 = None
+                etag_runways = None
+                etag_airports = None
+
+            metar_xml_url, metar_file = self._sources["metar"]
+            tafs_xml_url, tafs_file = self._sources["tafs"]
+            runways_csv_url, runways_master_data = self._sources["runways"]
+            airports_csv_url, airport_master_metadata_set = self._sources["airports"]
+            mos00_xml_url, mos00_file = self._sources["mos00"]
+
             https_session = requests.Session()
 
             # FIXME: Finish proxy handling
@@ -210,8 +307,7 @@ class DataSets:
             )
             if ret is True:
                 debugging.debug("Downloaded METAR file")
-                self._metar_update_time = utils.current_time_utc(app_conf)
-                self._metar_serial_num += 1
+                self.dataset_updated("metar")
             elif ret is False:
                 debugging.debug("Server side METAR older")
 
@@ -220,8 +316,7 @@ class DataSets:
             )
             if ret is True:
                 debugging.debug("Downloaded TAFS file")
-                self._taf_update_time = utils.current_time_utc(app_conf)
-                self._taf_serial_num += 1
+                self.dataset_updated("tafs")
             elif ret is False:
                 debugging.debug("Server side TAFS older")
 
@@ -230,8 +325,7 @@ class DataSets:
             )
             if ret is True:
                 debugging.debug("Downloaded runways.csv")
-                self._runway_update_time = utils.current_time_utc(app_conf)
-                self._runway_serial_num += 1
+                self.dataset_updated("runways")
             elif ret is False:
                 debugging.debug("Server side runways.csv older")
 
@@ -243,20 +337,13 @@ class DataSets:
             )
             if ret is True:
                 debugging.debug("Downloaded airports.csv")
-                self._airport_update_time = utils.current_time_utc(app_conf)
-                self._airport_serial_num += 1
+                self.dataset_updated("airports")
             elif ret is False:
                 debugging.debug("Server side airports.csv older")
 
-            etag_mos00 = self.mos_refresh(
+            ret, etag_mos00 = self.mos_refresh(
                 https_session, etag_mos00, mos00_file, mos00_xml_url
             )
-            if ret is True:
-                debugging.debug("Downloaded new MOS data")
-                self._mos_update_time = utils.current_time_utc(app_conf)
-                self._mos_serial_num += 1
-            elif ret is False:
-                debugging.debug("Server side MOS data older")
 
             # Limiting to a single MOS data set for now; as the data differs
             # across the data sets for the same time period ; so there isn't an
@@ -275,4 +362,5 @@ class DataSets:
             # Clean UP HTTPS_Session
             https_session.close()
 
-            time.sleep(aviation_weather_adds_timer * 60)
+            self._wakeup.wait(self._update_interval * 60)
+            self._wakeup.clear()
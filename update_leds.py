@@ -46,25 +46,29 @@
 
 # Import needed libraries
 
-import math
-import datetime
 import time
 from enum import Enum, auto
 
 # import collections
 import colorsys
-import ast
 
-from rpi_ws281x import Color, PixelStrip, ws
+import numpy as np
 
 import debugging
 import utils
 import utils_colors
-import utils_gfx
+import utils_framebuffer
+import utils_ledstrip
+import utils_metrics
 import utils_mos
-import utils_coord
 from utils_wx import WxConditions
 
+LED_FRAME_TIME = utils_metrics.histogram(
+    "livemap_led_frame_seconds",
+    "Time to composite and push a frame to the LED strip",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
 
 class LedMode(Enum):
     """Set of Operating Modes for LED Strip."""
@@ -82,6 +86,7 @@ class LedMode(Enum):
     SQUAREWIPE = auto()
     WHEELWIPE = auto()
     CIRCLEWIPE = auto()
+    CHECKERWIPE = auto()
     MORSE = auto()
 
     # TODO: how should this work ?
@@ -110,6 +115,12 @@ class UpdateLEDs:
     DELAYLONG = 0.6
     PAUSESHORT = 1
 
+    # Wipe mode timing ; in clock_ticks
+    WIPE_STEPS = 20
+    CHECKER_HOLD = 5
+    WHEEL_STEP = 10
+    WHEEL_WIDTH = 45
+
     _app_conf = {}
     _airport_database = {}
 
@@ -117,7 +128,25 @@ class UpdateLEDs:
     _toggle_sw = -1
     _led_mode = LedMode.METAR
 
+    # Callbacks run with a change type ("ledmode" / "brightness") on LED state changes
+    _change_listeners = []
+
     _active_led_dict = {}
+    _active_leds = None
+
+    # Framebuffer used by all the LED modes
+    _framebuffer = None
+    _swap_mask = None
+    _null_mask = None
+    _pixel_data = None
+
+    # Weather effect animation tables ; one color per cycle_num for each airport LED
+    _wx_sequences = {}
+    _wx_sequence_keys = {}
+    _wx_sequence_leds = None
+    _wx_sequence_table = None
+    _wx_sequence_serial = -1
+    _homeport_led = None
 
     # Morse Code Dictionary
     morse_code = {
@@ -170,6 +199,11 @@ class UpdateLEDs:
     radar_beam_width = 10
     radar_beam_radius = 50
     _radar_map = {}
+    _radar_serial = -1
+
+    # Per airport geometry used by the wipe modes
+    _geo_table = {}
+    _geo_key = None
 
     # FIXME: Needs to tie to the list of disabled LEDs
     _nullpins = []
@@ -192,7 +226,7 @@ class UpdateLEDs:
     # True to invert the signal (when using NPN transistor level shift)
     _led_invert = False
     _led_channel = 0  # set to '1' for GPIOs 13, 19, 41, 45 or 53
-    _led_strip = ws.WS2811_STRIP_GRB  # Strip type and color ordering
+    _led_strip = None  # Strip type and color ordering ; None is WS2811_STRIP_GRB
 
     # Time Delay
     time_base_delay = 0.2
@@ -222,48 +256,25 @@ class UpdateLEDs:
     morse_color_dot = "#007000"
     morse_color_dash = "#000070"
 
-    def __init__(self, conf, airport_database):
+    def __init__(self, conf, airport_database, strip=None):
         """Initialize LED Strip."""
         self._app_conf = conf
         self._airport_database = airport_database
+        self._change_listeners = []
 
-        # Specific Variables to default data to display if Rotary Switch is not installed.
-        # hour_to_display # Offset in HOURS to choose which TAF/MOS to display
-        self.hour_to_display = self._app_conf.get_int("rotaryswitch", "time_sw0")
-        # metar_taf_mos
-        # 0 = Display TAF, 1 = Display METAR, 2 = Display MOS, 3 = Heat Map (Heat map not controlled by rotary switch)
-        self._metar_taf_mos = self._app_conf.get_int("rotaryswitch", "data_sw0")
-
-        offtime = self._app_conf.get_string("schedule", "offtime")
-        offtime_split = offtime.split(":")
-
-        self._offtime = datetime.time(
-            int(offtime_split[0]),
-            int(offtime_split[1]),
-            0,
-            0,
-        )
-
-        ontime = self._app_conf.get_string("schedule", "ontime")
-        ontime_split = ontime.split(":")
-
-        self._ontime = datetime.time(
-            int(ontime_split[0]),
-            int(ontime_split[1]),
-            0,
-            0,
-        )
-
-        # Set number of MINUTES to turn map on temporarily during sleep mode
-        self._tempsleepon = self._app_conf.get_int("schedule", "tempsleepon")
+        self.load_rotaryswitch_settings()
+        self.load_schedule_settings()
 
         # Number of LED pixels. Change this value to match the number of LED's being used on map
         self._led_count = self._app_conf.get_int("default", "led_count")
 
         self.homeport_toggle = False
-        self.homeport_colors = ast.literal_eval(
-            self._app_conf.get_string("colors", "homeport_colors")
-        )
+        self._wx_sequences = {}
+        self._wx_sequence_keys = {}
+        self._wx_sequence_leds = np.zeros(0, dtype=np.intp)
+        self._wx_sequence_table = np.zeros((0, len(self._cycle_wait), 3), dtype=np.uint8)
+        self._wx_sequence_serial = -1
+        self._homeport_led = None
 
         # Blanking during refresh of the LED string between FAA updates.
         # Removing because it's not currently used
@@ -276,17 +287,15 @@ class UpdateLEDs:
         # MOS Data Settings
         self._mos_filepath = self._app_conf.get_string("filenames", "mos_filepath")
 
-        # Create an instance of NeoPixel
-        self.strip = PixelStrip(
-            self._led_count,
-            self._led_pin,
-            self._led_freq_hz,
-            self._led_dma,
-            self._led_invert,
-            self._led_brightness,
-            self._led_channel,
-            self._led_strip,
-        )
+        self._framebuffer = utils_framebuffer.LedFrameBuffer(self._led_count)
+        self._active_leds = np.zeros(0, dtype=np.intp)
+        self._pixel_data = None
+        self.update_pixel_masks()
+
+        # Create an instance of NeoPixel ; or use the strip backend passed in
+        if strip is None:
+            strip = self.create_strip()
+        self.strip = strip
         self.strip.begin()
         self.turnoff()
         self.init_rainbow()
@@ -295,9 +304,81 @@ class UpdateLEDs:
         self.morse_color_dash = self._app_conf.get_string("morse", "color_dash")
 
         self.encode_morse_string()
+
+        self._app_conf.subscribe(
+            self.conf_changed,
+            [
+                ("schedule", "*"),
+                ("rotaryswitch", "time_sw0"),
+                ("rotaryswitch", "data_sw0"),
+                ("morse", "*"),
+                ("lights", "rgb_grb"),
+                ("lights", "rev_rgb_grb"),
+                ("default", "led_count"),
+            ],
+        )
         debugging.info("LED Strip INIT complete")
 
+    def load_rotaryswitch_settings(self):
+        """Read default display data used when the Rotary Switch is not installed."""
+        conf_snapshot = self._app_conf.snapshot()
+        # hour_to_display # Offset in HOURS to choose which TAF/MOS to display
+        self.hour_to_display = conf_snapshot.rotaryswitch.time_sw0
+        # metar_taf_mos
+        # 0 = Display TAF, 1 = Display METAR, 2 = Display MOS, 3 = Heat Map (Heat map not controlled by rotary switch)
+        self._metar_taf_mos = conf_snapshot.rotaryswitch.data_sw0
+
+    def load_schedule_settings(self):
+        """Read sleep schedule."""
+        conf_snapshot = self._app_conf.snapshot()
+        self._offtime = conf_snapshot.schedule.offtime
+        self._ontime = conf_snapshot.schedule.ontime
+        # Set number of MINUTES to turn map on temporarily during sleep mode
+        self._tempsleepon = conf_snapshot.schedule.tempsleepon
+
+    def conf_changed(self, changes):
+        """Apply saved config changes without a restart."""
+        sections = {section for section, __key in changes}
+        if "schedule" in sections:
+            self.load_schedule_settings()
+        if "rotaryswitch" in sections:
+            self.load_rotaryswitch_settings()
+        if "morse" in sections:
+            self.morse_color_dot = self._app_conf.get_string("morse", "color_dot")
+            self.morse_color_dash = self._app_conf.get_string("morse", "color_dash")
+            self.encode_morse_string()
+        if "lights" in sections:
+            self.update_pixel_masks()
+        if ("default", "led_count") in changes:
+            debugging.warn("LED: led_count changed ; restart required to take effect")
+        debugging.info(f"LED: applied config changes {sorted(changes.keys())}")
+
     # Functions
+    def create_strip(self):
+        """Create LED strip backend selected in config."""
+        led_backend = self._app_conf.get_string("lights", "led_backend")
+        if led_backend == "memory":
+            recorder = None
+            recording_file = self._app_conf.get_string("filenames", "led_recording")
+            if recording_file:
+                recorder = utils_ledstrip.FrameRecorder(
+                    recording_file, self._led_count
+                )
+            debugging.info("LED Strip using in memory backend")
+            return utils_ledstrip.MemoryStrip(
+                self._led_count, self._led_brightness, recorder
+            )
+        return utils_ledstrip.Ws281xStrip(
+            self._led_count,
+            self._led_pin,
+            self._led_freq_hz,
+            self._led_dma,
+            self._led_invert,
+            self._led_brightness,
+            self._led_channel,
+            self._led_strip,
+        )
+
     def init_rainbow(self):
         """Define set of colors to create the Rainbow effect."""
         rainbow_index = 30
@@ -309,7 +390,7 @@ class UpdateLEDs:
         for i, rgb_col in enumerate(rgb_list):
             (col_r, col_g, col_b) = rgb_col
             rgb_list[i] = (col_r * 255, col_g * 255, col_b * 255)
-        self._rgb_rainbow = rgb_list
+        self._rgb_rainbow = np.array(rgb_list).astype(np.uint8)
         # debugging.info(f"Rainbow List - {self._rgb_rainbow}")
 
     def ledmode(self):
@@ -318,7 +399,22 @@ class UpdateLEDs:
 
     def set_ledmode(self, new_mode):
         """Update active LED Mode."""
+        if new_mode == self._led_mode:
+            return
         self._led_mode = new_mode
+        self.notify_change("ledmode")
+
+    def add_change_listener(self, callback):
+        """Register callback(change_type) for LED mode and brightness changes."""
+        self._change_listeners.append(callback)
+
+    def notify_change(self, change_type):
+        """Tell change listeners that LED state has changed."""
+        for callback in self._change_listeners:
+            try:
+                callback(change_type)
+            except Exception as err:
+                debugging.error(f"Change listener failed for {change_type}: {err}")
 
     def set_led_color(self, led_id, hexcolor):
         """Convert color from HEX to RGB or GRB and apply to LED String."""
@@ -333,11 +429,13 @@ class UpdateLEDs:
             rgb_color = utils_colors.rgb_color(hexcolor)
 
         color_ord = self.rgb_to_pixel(
-            led_id, rgb_color, self._app_conf.cache["rgb_grb"]
+            led_id, rgb_color, self._app_conf.snapshot().lights.rgb_grb
         )
-        pixel_data = Color(color_ord[0], color_ord[1], color_ord[2])
+        pixel_data = utils_ledstrip.pack_color(color_ord[0], color_ord[1], color_ord[2])
 
         self.strip.setPixelColor(led_id, pixel_data)
+        # Strip no longer matches the last framebuffer write
+        self._pixel_data = None
 
     def update_active_led_list(self):
         """Update Active LED list."""
@@ -350,12 +448,40 @@ class UpdateLEDs:
             return
         for icao, airport_obj in airports.items():
             if not airport_obj.active():
-                debugging.debug(f"Airport Not Active {icao} : Not updating LED list")
+                debugging.debug("Airport Not Active %s : Not updating LED list", icao)
                 continue
             led_index = airport_obj.get_led_index()
             active_led_dict[pos] = led_index
             pos = pos + 1
         self._active_led_dict = active_led_dict
+        self._active_leds = np.array(
+            [
+                led_index
+                for led_index in active_led_dict.values()
+                if led_index is not None and 0 <= led_index < self._led_count
+            ],
+            dtype=np.intp,
+        )
+        self.update_pixel_masks()
+
+    def update_pixel_masks(self):
+        """Build RGB/GRB swap and null pin masks used when writing the framebuffer to the strip."""
+        # rgb_grb True means the strip takes RGB ordering ; otherwise red and green are swapped.
+        # rev_rgb_grb lists the pins that use the opposite ordering to the rest of the strip.
+        swap_mask = np.full(
+            self._led_count, not self._app_conf.snapshot().lights.rgb_grb, dtype=bool
+        )
+        for pin in self._app_conf.snapshot().lights.rev_rgb_grb:
+            if pin < self._led_count:
+                swap_mask[pin] = not swap_mask[pin]
+        null_mask = np.zeros(self._led_count, dtype=bool)
+        for pin in self._nullpins:
+            if int(pin) < self._led_count:
+                null_mask[int(pin)] = True
+        self._swap_mask = swap_mask
+        self._null_mask = null_mask
+        # Force a full rewrite of the strip
+        self._pixel_data = None
 
     def show(self):
         """Update LED strip to display current colors."""
@@ -363,19 +489,14 @@ class UpdateLEDs:
 
     def turnoff(self):
         """Set color to 0,0,0  - turning off LED."""
-        for i in range(self.num_pixels()):
-            self.set_led_color(i, utils_colors.off())
-        self.show()
+        self._framebuffer.clear()
+        self.update_ledstring(self._framebuffer)
 
     def fill(self, color):
-        """Return led_updated_dict containing single color only"""
-        # debugging.info(f"Fill: In the fill loop for {color}")
-        led_updated_dict = {}
-        for led_key in self._active_led_dict.keys():
-            if self._active_led_dict[led_key] is not None:
-                led_index = self._active_led_dict[led_key]
-                led_updated_dict[led_index] = color
-        return led_updated_dict
+        """Return framebuffer with all active LEDs set to a single color."""
+        self._framebuffer.clear()
+        self._framebuffer.fill(self._active_leds, color)
+        return self._framebuffer
 
     def num_pixels(self) -> int:
         """Return number of Pixels defined."""
@@ -387,7 +508,10 @@ class UpdateLEDs:
 
     def set_brightness(self, lux):
         """Update saved brightness value."""
+        previous_level = self.get_brightness_level()
         self._led_brightness = round(lux)
+        if self.get_brightness_level() != previous_level:
+            self.notify_change("brightness")
 
     def dim(self, color_data, value):
         """DIM LED.
@@ -409,19 +533,6 @@ class UpdateLEDs:
         blu = max(data[2] - ((value * data[2]) / 100), 0)
         return utils_colors.hexcode(red, grn, blu)
 
-    def frange(self, start, stop, step):
-        """Range to loop through floats, rather than integers. Used to loop through lat/lons."""
-        if start != stop:
-            i = start
-            if i < stop:
-                while i < stop:
-                    yield round(i, 2)
-                    i += step
-            else:
-                while i > stop:
-                    yield round(i, 2)
-                    i -= step
-
     def rgb_to_pixel(self, pin, data, order=True):
         """Change colorcode to match self.strip RGB / GRB style."""
         # Change color code to work with various led self.strips. For instance, WS2812 model
@@ -430,7 +541,7 @@ class UpdateLEDs:
         # If necessary, populate the list rev_rgb_grb with pins of LED's that use the opposite color scheme.
         # list of pins that need to use the reverse of the normal order setting.
         # This accommodates the use of both models of LED strings on one map.
-        if str(pin) in self._app_conf.cache["rev_rgb_grb"]:
+        if int(pin) in self._app_conf.snapshot().lights.rev_rgb_grb:
             order = not order
             # debugging.info(f"Reversing rgb2grb Routine Output for PIN {pin}")
         red = data[0]
@@ -447,30 +558,33 @@ class UpdateLEDs:
     # Can choose to display binary colors with homeap.
     def heatmap_color(self, visits):
         """Color codes assigned with heatmap."""
-        if visits == "0":
+        conf_snapshot = self._app_conf.snapshot()
+        visits = int(visits)
+        if visits == 0:
             color = utils_colors.colordict["GOLD"]
-        elif visits == "100":
-            if self._app_conf.get_bool(
-                "rotaryswitch", "fade_yesno"
-            ) and self._app_conf.get_bool("rotaryswitch", "bin_grad"):
+        elif visits == 100:
+            if (
+                conf_snapshot.rotaryswitch.fade_yesno
+                and conf_snapshot.rotaryswitch.bin_grad
+            ):
                 color = utils_colors.black()
-            elif not self._app_conf.get_bool("rotaryswitch", "use_homeap"):
+            elif not conf_snapshot.rotaryswitch.use_homeap:
                 color = utils_colors.colordict["RED"]
             else:
-                color = self._app_conf.get_string("color_vfr")
-        elif "1" <= visits <= "50":  # Working
-            if self._app_conf.get_bool("rotaryswitch", "bin_grad"):
+                color = self._app_conf.snapshot().colors.color_vfr
+        elif 1 <= visits <= 50:  # Working
+            if conf_snapshot.rotaryswitch.bin_grad:
                 grn = 0
                 blu = 0
-                red = int(int(visits) * 5.1)
+                red = int(visits * 5.1)
                 color = utils_colors.rgb2hex((red, grn, blu))
             else:
                 color = utils_colors.colordict["RED"]
-        elif "51" <= visits <= "99":  # Working
-            if self._app_conf.get_bool("rotaryswitch", "bin_grad"):
+        elif 51 <= visits <= 99:  # Working
+            if conf_snapshot.rotaryswitch.bin_grad:
                 red = 255
                 grn = 0
-                blu = 255 - int((int(visits) - 50) * 5.1)
+                blu = 255 - int((visits - 50) * 5.1)
                 color = utils_colors.rgb2hex((red, grn, blu))
             else:
                 color = utils_colors.rgb2hex((255, 0, 0))
@@ -485,14 +599,14 @@ class UpdateLEDs:
         if utils.time_in_range(self._offtime, self._ontime, time_now):
             if not sleeping:
                 debugging.info("Enabling sleeping mode...")
-                self._led_mode = LedMode.SLEEP
+                self.set_ledmode(LedMode.SLEEP)
                 sleeping = True
             else:
                 # It's night time; we're already sleeping. Take a break.
                 debugging.info(f"Sleeping .. {clock_tick}")
         elif sleeping:
             debugging.info(f"Disabling sleeping mode... {clock_tick} ")
-            self._led_mode = default_led_mode
+            self.set_ledmode(default_led_mode)
             sleeping = False
         return sleeping
 
@@ -508,6 +622,7 @@ class UpdateLEDs:
         clock_tick = 0
 
         self.ledmode_radar_setup()
+        self.ledmode_geometry_setup()
 
         while True:
             # Going to use an index counter as a pseudo clock tick for
@@ -520,7 +635,10 @@ class UpdateLEDs:
                 # Execute things that need to be done occasionally
                 # Make sure the active LED list is updated
                 self.update_active_led_list()
-                if self._app_conf.cache["usetimer"]:
+                # Radar and geometry tables are only rebuilt if airport coordinates have changed
+                self.ledmode_radar_setup()
+                self.ledmode_geometry_setup()
+                if self._app_conf.snapshot().schedule.usetimer:
                     sleeping = self.check_for_sleep_time(
                         clock_tick, sleeping, default_led_mode
                     )
@@ -533,9 +651,11 @@ class UpdateLEDs:
                 continue
             if self._led_mode == LedMode.METAR:
                 led_color_dict = self.ledmode_metar(clock_tick)
-                if (clock_tick % 200) == 0:
-                    debugging.debug(f"ledmode_metar: {led_color_dict}")
+                if (clock_tick % 200) == 0 and debugging.debug_enabled():
+                    debugging.debug("ledmode_metar: %s", led_color_dict.hexcolors())
                 self.update_ledstring(led_color_dict)
+                # Hold each frame of the flash cycle
+                time.sleep(self._cycle_wait[clock_tick % len(self._cycle_wait)])
                 continue
             if self._led_mode == LedMode.TEST:
                 # self.ledmode_test(clock_tick)
@@ -618,17 +738,22 @@ class UpdateLEDs:
                 time.sleep(self.DELAYSHORT)
                 continue
             if self._led_mode == LedMode.SQUAREWIPE:
-                led_color_dict = self.ledmode_rabbit(clock_tick)
+                led_color_dict = self.ledmode_squarewipe(clock_tick)
                 self.update_ledstring(led_color_dict)
-                time.sleep(self.DELAYMEDIUM)
+                time.sleep(self.DELAYSHORT)
                 continue
             if self._led_mode == LedMode.WHEELWIPE:
-                led_color_dict = self.ledmode_rabbit(clock_tick)
+                led_color_dict = self.ledmode_wheelwipe(clock_tick)
                 self.update_ledstring(led_color_dict)
-                time.sleep(self.DELAYMEDIUM)
+                time.sleep(self.DELAYSHORT)
                 continue
             if self._led_mode == LedMode.CIRCLEWIPE:
-                led_color_dict = self.ledmode_rabbit(clock_tick)
+                led_color_dict = self.ledmode_circlewipe(clock_tick)
+                self.update_ledstring(led_color_dict)
+                time.sleep(self.DELAYSHORT)
+                continue
+            if self._led_mode == LedMode.CHECKERWIPE:
+                led_color_dict = self.ledmode_checkerwipe(clock_tick)
                 self.update_ledstring(led_color_dict)
                 time.sleep(self.DELAYMEDIUM)
                 continue
@@ -637,25 +762,61 @@ class UpdateLEDs:
                 self.update_ledstring(led_color_dict)
                 continue
 
-    def update_ledstring(self, led_color_dict):
-        """Iterate across all the LEDs and set the color appropriately."""
-        for ledindex, led_color in led_color_dict.items():
-            self.set_led_color(ledindex, led_color)
+    def mode_renderers(self) -> dict:
+        """Return dict of LedMode -> function(clock_tick) returning the frame for that tick."""
+        return {
+            LedMode.METAR: self.ledmode_metar,
+            LedMode.TEST: self.colorwipe,
+            LedMode.RAINBOW: lambda clock_tick: self.ledmode_rainbow(clock_tick * 5),
+            LedMode.FADE: self.ledmode_fade,
+            LedMode.RABBIT: self.ledmode_rabbit,
+            LedMode.SHUFFLE: self.ledmode_shuffle,
+            LedMode.MORSE: self.ledmode_morse,
+            LedMode.TAF_1: lambda clock_tick: self.ledmode_taf(clock_tick, 1),
+            LedMode.TAF_2: lambda clock_tick: self.ledmode_taf(clock_tick, 2),
+            LedMode.TAF_3: lambda clock_tick: self.ledmode_taf(clock_tick, 3),
+            LedMode.TAF_4: lambda clock_tick: self.ledmode_taf(clock_tick, 4),
+            LedMode.MOS_1: lambda clock_tick: self.ledmode_mos(clock_tick, 1),
+            LedMode.MOS_2: lambda clock_tick: self.ledmode_mos(clock_tick, 2),
+            LedMode.MOS_3: lambda clock_tick: self.ledmode_mos(clock_tick, 3),
+            LedMode.MOS_4: lambda clock_tick: self.ledmode_mos(clock_tick, 4),
+            LedMode.RADARWIPE: self.ledmode_radar,
+            LedMode.SQUAREWIPE: self.ledmode_squarewipe,
+            LedMode.WHEELWIPE: self.ledmode_wheelwipe,
+            LedMode.CIRCLEWIPE: self.ledmode_circlewipe,
+            LedMode.CHECKERWIPE: self.ledmode_checkerwipe,
+            LedMode.HEATMAP: self.ledmode_heatmap,
+        }
+
+    def update_ledstring(self, framebuffer):
+        """Write the composited framebuffer to the LED strip."""
+        start_time = time.perf_counter()
+        pixel_data = framebuffer.pixel_data(self._swap_mask, self._null_mask)
+        if self._pixel_data is None:
+            changed = range(len(pixel_data))
+        else:
+            # Only push the pixels that changed since the last frame
+            changed = np.flatnonzero(pixel_data != self._pixel_data).tolist()
+        pixel_list = pixel_data.tolist()
+        for led_index in changed:
+            self.strip.setPixelColor(led_index, pixel_list[led_index])
+        self._pixel_data = pixel_data
         self.strip.setBrightness(self._led_brightness)
         self.show()
+        LED_FRAME_TIME.observe(time.perf_counter() - start_time)
 
     def airport_taf_flightcategory(self, airport, hr_offset):
         """Get Flight Category for TAF data"""
         airport_taf_dict = self._airport_database.get_airport_taf(airport)
         if airport_taf_dict is None:
             return None
-        debugging.debug(f"{airport}:taf:{airport_taf_dict}")
+        debugging.debug("%s:taf:%s", airport, airport_taf_dict)
         airport_taf_future = self._airport_database.airport_taf_future(
             airport, hr_offset
         )
         if airport_taf_future is None:
             return None
-        debugging.debug(f"{airport}:forecast:{airport_taf_future}")
+        debugging.debug("%s:forecast:%s", airport, airport_taf_future)
         return airport_taf_future["flightcategory"]
 
     def airport_mos_flightcategory(self, airport, hr_offset):
@@ -670,7 +831,7 @@ class UpdateLEDs:
             hr_offset,
         )
         if airport_mos_future is None:
-            debugging.info(f"airport_mos_future: airport_mos_future is NONE")
+            debugging.debug("airport_mos_future: %s is NONE", airport)
             return None
         # debugging.info(f"{airport}:forecast:{airport_mos_future}")
         return airport_mos_future
@@ -679,214 +840,247 @@ class UpdateLEDs:
         """Run self test sequences."""
         return self.colorwipe(clock_tick)
 
-    def ledmode_circlewipe(self, clock_tick):
-        """Wipe circle around the geographically center most airport"""
-
     def legend_color(self, airport_wxsrc, cycle_num):
         """Work out the color for the legend LEDs."""
         led_color = utils_colors.off()
         if airport_wxsrc == "vfr":
-            led_color = self._app_conf.cache["color_vfr"]
+            led_color = self._app_conf.snapshot().colors.color_vfr
         if airport_wxsrc == "mvfr":
-            led_color = self._app_conf.cache["color_mvfr"]
+            led_color = self._app_conf.snapshot().colors.color_mvfr
         if airport_wxsrc == "ifr":
-            led_color = self._app_conf.cache["color_ifr"]
+            led_color = self._app_conf.snapshot().colors.color_ifr
         if airport_wxsrc == "lifr":
-            led_color = self._app_conf.cache["color_lifr"]
+            led_color = self._app_conf.snapshot().colors.color_lifr
         if airport_wxsrc == "unkn":
-            led_color = self._app_conf.cache["color_nowx"]
+            led_color = self._app_conf.snapshot().colors.color_nowx
         if airport_wxsrc == "hiwind":
             if cycle_num in [3, 4, 5]:
                 led_color = utils_colors.off()
             else:
-                led_color = self._app_conf.cache["color_ifr"]
+                led_color = self._app_conf.snapshot().colors.color_ifr
         if airport_wxsrc == "lghtn":
             if cycle_num in [2, 4]:
                 led_color = utils_colors.wx_lightning(self._app_conf)
             else:
-                led_color = self._app_conf.cache["color_mvfr"]
+                led_color = self._app_conf.snapshot().colors.color_mvfr
         if airport_wxsrc == "snow":
             if cycle_num in [3, 5]:  # Check for Snow
                 led_color = utils_colors.wx_snow(self._app_conf, 1)
             elif cycle_num == 4:
                 led_color = utils_colors.wx_snow(self._app_conf, 2)
             else:
-                led_color = self._app_conf.cache["color_lifr"]
+                led_color = self._app_conf.snapshot().colors.color_lifr
         if airport_wxsrc == "rain":
             if cycle_num in [3, 5]:  # Check for Rain
                 led_color = utils_colors.wx_rain(self._app_conf, 1)
             elif cycle_num == 4:
                 led_color = utils_colors.wx_rain(self._app_conf, 2)
             else:
-                led_color = self._app_conf.cache["color_vfr"]
+                led_color = self._app_conf.snapshot().colors.color_vfr
         if airport_wxsrc == "frrain":
             if cycle_num in [3, 5]:  # Check for Freezing Rain
                 led_color = utils_colors.wx_frzrain(self._app_conf, 1)
             elif cycle_num == 4:
                 led_color = utils_colors.wx_frzrain(self._app_conf, 2)
             else:
-                led_color = self._app_conf.cache["color_mvfr"]
+                led_color = self._app_conf.snapshot().colors.color_mvfr
         if airport_wxsrc == "dust":
             if cycle_num in [3, 5]:  # Check for Dust, Sand or Ash
                 led_color = utils_colors.wx_dust_sand_ash(self._app_conf, 1)
             elif cycle_num == 4:
                 led_color = utils_colors.wx_dust_sand_ash(self._app_conf, 2)
             else:
-                led_color = self._app_conf.cache["color_vfr"]
+                led_color = self._app_conf.snapshot().colors.color_vfr
         if airport_wxsrc == "fog":
             if cycle_num in [3, 5]:  # Check for Fog
                 led_color = utils_colors.wx_fog(self._app_conf, 1)
             elif cycle_num == 4:
                 led_color = utils_colors.wx_fog(self._app_conf, 2)
             elif cycle_num in [0, 1, 2]:
-                led_color = self._app_conf.cache["color_ifr"]
+                led_color = self._app_conf.snapshot().colors.color_ifr
         return led_color
 
-    def ledmode_metar(self, clock_tick):
-        """Generate LED Color set for Airports."""
-        airport_list = self._airport_database.get_airport_dict_led()
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
+    def wx_sequence_key(self, airport_obj):
+        """Return key describing everything that changes the weather animation for an airport."""
+        airportcode = airport_obj.icao_code()
+        if airportcode.startswith("lgnd"):
+            return ("lgnd", airport_obj.wxsrc())
+        flightcategory = airport_obj.flightcategory()
+        if not flightcategory:
+            flightcategory = "UNKN"
+        if not airport_obj.active_wx_conditions():
+            return (flightcategory, False, ())
+        hiwind = (
+            int(airport_obj.wx_windspeed())
+            >= self._app_conf.snapshot().activelights.high_wind_limit
+        )
+        return (flightcategory, hiwind, tuple(airport_obj.wxconditions()))
+
+    def wx_sequence(self, sequence_key):
+        """Compile the per cycle colors for a weather sequence key."""
+        cycle_count = len(self._cycle_wait)
+        if sequence_key[0] == "lgnd":
+            return np.array(
+                [
+                    self._framebuffer.rgb(self.legend_color(sequence_key[1], cycle_num))
+                    for cycle_num in range(cycle_count)
+                ],
+                dtype=np.uint8,
+            )
 
-        cycle_num = clock_tick % len(self._cycle_wait)
+        (flightcategory, hiwind, airport_conditions) = sequence_key
+        conf_snapshot = self._app_conf.snapshot()
+        led_colors = [
+            utils_colors.flightcategory_color(self._app_conf, flightcategory)
+        ] * cycle_count
+
+        # Later effects take precedence over earlier ones
+        for cycle_num in range(cycle_count):
+            # Check winds and set the 2nd half of cycles to black to create blink effect
+            if (
+                conf_snapshot.activelights.high_wind_blink
+                and hiwind
+                and cycle_num in [3, 4, 5]
+            ):
+                led_colors[cycle_num] = utils_colors.off()
+
+            if conf_snapshot.lights.lghtnflash:
+                # Check for Thunderstorms
+                if WxConditions.LIGHTNING in airport_conditions and cycle_num in [2, 4]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_lghtn
+
+            if conf_snapshot.lights.snowshow and WxConditions.SNOW in airport_conditions:
+                # Check for Snow
+                if cycle_num in [3, 5]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_snow1
+                elif cycle_num == 4:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_snow2
+
+            if conf_snapshot.lights.rainshow and WxConditions.RAIN in airport_conditions:
+                # Check for Rain
+                if cycle_num in [3, 4]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_rain1
+                elif cycle_num == 5:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_rain2
 
+            if (
+                conf_snapshot.lights.frrainshow
+                and WxConditions.FREEZINGFOG in airport_conditions
+            ):
+                # Check for Freezing Rain
+                if cycle_num in [3, 5]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_frrain1
+                elif cycle_num == 4:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_frrain2
+
+            if (
+                conf_snapshot.lights.dustsandashshow
+                and WxConditions.DUSTASH in airport_conditions
+            ):
+                # Check for Dust, Sand or Ash
+                if cycle_num in [3, 5]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_dustsandash1
+                elif cycle_num == 4:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_dustsandash2
+
+            if conf_snapshot.lights.fogshow and WxConditions.FOG in airport_conditions:
+                # Check for Fog
+                if cycle_num in [3, 5]:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_fog1
+                elif cycle_num == 4:
+                    led_colors[cycle_num] = conf_snapshot.colors.color_fog2
+
+        return np.array(
+            [self._framebuffer.rgb(led_color) for led_color in led_colors],
+            dtype=np.uint8,
+        )
+
+    def update_wx_sequences(self, clock_tick):
+        """Recompile weather animation tables for any airport whose weather has changed."""
+        if self._wx_sequence_serial != self._app_conf.cache_serial():
+            # Colors or effect settings changed ; everything needs to be compiled again
+            self._wx_sequences = {}
+            self._wx_sequence_keys = {}
+            self._wx_sequence_serial = self._app_conf.cache_serial()
+
+        airport_list = self._airport_database.get_airport_dict_led()
+        sequence_keys = {}
+        homeport_led = None
         for airport_key, airport_obj in airport_list.items():
             airportcode = airport_obj.icao_code()
-            airport_led = airport_obj.get_led_index()
-            airport_wxsrc = airport_obj.wxsrc()
-            if not airportcode:
-                continue
-            if airportcode.startswith("null"):
-                led_updated_dict[airport_led] = utils_colors.off()
-                continue
-            if airportcode.startswith("lgnd"):
-                led_color = self.legend_color(airport_wxsrc, cycle_num)
-                led_updated_dict[airport_led] = led_color
+            if not airportcode or airportcode.startswith("null"):
                 continue
+            airport_led = airport_obj.get_led_index()
+            sequence_keys[airport_led] = self.wx_sequence_key(airport_obj)
+            if airport_led == self._app_conf.snapshot().lights.homeport_pin:
+                homeport_led = airport_led
+        self._homeport_led = homeport_led
 
-            # Initialize color
-            led_color = utils_colors.off()
-            # Pull the next flight category from dictionary.
-            flightcategory = airport_obj.flightcategory()
-            if not flightcategory:
-                flightcategory = "UNKN"
-            # Pull the winds from the dictionary.
-            airportwinds = airport_obj.wx_windspeed()
-            debugging.debug(
-                f"{airportcode}:{flightcategory}:{airportwinds}:cycle=={cycle_num}"
-            )
+        if sequence_keys == self._wx_sequence_keys:
+            return
 
-            # Start of weather display code for each airport in the "airports" file
-            # Check flight category and set the appropriate color to display
-            led_color = utils_colors.flightcategory_color(
-                self._app_conf, flightcategory
+        for airport_led, sequence_key in sequence_keys.items():
+            if sequence_key not in self._wx_sequences:
+                self._wx_sequences[sequence_key] = self.wx_sequence(sequence_key)
+            if self._wx_sequence_keys.get(airport_led) != sequence_key:
+                debugging.debug("ledmode_metar: led %s now %s", airport_led, sequence_key)
+
+        led_list = list(sequence_keys.keys())
+        self._wx_sequence_leds = np.array(led_list, dtype=np.intp)
+        if led_list:
+            self._wx_sequence_table = np.stack(
+                [self._wx_sequences[sequence_keys[led]] for led in led_list]
             )
-            if airport_obj.active_wx_conditions():
-                airport_conditions = airport_obj.wxconditions()
-                # debugging.info(f"ledmode_metar: {airport_obj.icao_code()} / wx_conditions {airport_conditions}")
-                # Check winds and set the 2nd half of cycles to black to create blink effect
-                if self._app_conf.cache["lights_highwindblink"]:
-                    # bypass if "highwindblink" is set to 0
-                    if int(airportwinds) >= self._app_conf.cache[
-                        "metar_maxwindspeed"
-                    ] and (cycle_num in [3, 4, 5]):
-                        led_color = utils_colors.off()
-                        debugging.debug(
-                            f"HIGH WINDS {airportcode} : {airportwinds} kts"
-                        )
-
-                if self._app_conf.cache["lights_lghtnflash"]:
-                    # Check for Thunderstorms
-                    if WxConditions.LIGHTNING in airport_conditions and (
-                        cycle_num in [2, 4]
-                    ):
-                        led_color = utils_colors.wx_lightning(self._app_conf)
-
-                if self._app_conf.cache["lights_snowshow"]:
-                    # Check for Snow
-                    if WxConditions.SNOW in airport_conditions:
-                        if cycle_num in [3, 5]:
-                            led_color = utils_colors.wx_snow(self._app_conf, 1)
-                        elif cycle_num == 4:
-                            led_color = utils_colors.wx_snow(self._app_conf, 2)
-
-                if self._app_conf.cache["lights_rainshow"]:
-                    # Check for Rain
-                    if WxConditions.RAIN in airport_conditions:
-                        if cycle_num in [3, 4]:
-                            led_color = utils_colors.wx_rain(self._app_conf, 1)
-                        elif cycle_num == 5:
-                            led_color = utils_colors.wx_rain(self._app_conf, 2)
-
-                if self._app_conf.cache["lights_frrainshow"]:
-                    # Check for Freezing Rain
-                    if WxConditions.FREEZINGFOG in airport_conditions:
-                        if cycle_num in [3, 5]:
-                            led_color = utils_colors.wx_frzrain(self._app_conf, 1)
-                        elif cycle_num == 4:
-                            led_color = utils_colors.wx_frzrain(self._app_conf, 2)
-
-                if self._app_conf.cache["lights_dustsandashshow"]:
-                    # Check for Dust, Sand or Ash
-                    if WxConditions.DUSTASH in airport_conditions:
-                        if cycle_num in [3, 5]:
-                            led_color = utils_colors.wx_dust_sand_ash(self._app_conf, 1)
-                        elif cycle_num == 4:
-                            led_color = utils_colors.wx_dust_sand_ash(self._app_conf, 2)
-
-                if self._app_conf.cache["lights_fogshow"]:
-                    # Check for Fog
-                    if WxConditions.FOG in airport_conditions:
-                        if cycle_num in [3, 5]:
-                            led_color = utils_colors.wx_fog(self._app_conf, 1)
-                        elif cycle_num == 4:
-                            led_color = utils_colors.wx_fog(self._app_conf, 2)
-
-            # If homeport is set to 1 then turn on the appropriate LED using a specific color, This will toggle
-            # so that every other time through, the color will display the proper weather, then homeport color(s).
-            self.homeport_toggle = not self.homeport_toggle
-            if (
-                airport_led == self._app_conf.cache["lights_homeportpin"]
-                and self._app_conf.cache["lights_homeport"]
-                and self.homeport_toggle
-            ):
-                if self._app_conf.cache["lights_homeport_display"] == 1:
-                    # FIXME: ast.literal_eval converts a string to a list of tuples..
-                    # Should move these colors to be managed with other colors.
-                    homeport_colors = ast.literal_eval(
-                        self._app_conf.get_string("colors", "homeport_colors")
-                    )
-                    # The length of this array needs to metch the cycle_num length or we'll get errors.
-                    # FIXME: Fragile
-                    led_color = homeport_colors[cycle_num]
-                elif self._app_conf.cache["lights_homeport_display"] == 2:
-                    # Homeport set based on METAR data
-                    pass
-                else:
-                    # Homeport set to fixed color
-                    led_color = self._app_conf.get_color("color_homeport")
-
-            # FIXME: Need to fix the way this next section picks colors
-            # if airportled == self._app_conf.cache["lights_homeportpin"] and self._app_conf.get_bool("lights", "homeport"):
-            #    pass
-            # elif self._app_conf.get_bool("lights", "homeport"):
-            #     # FIXME: This doesn't work
-            #    # if this is not the home airport, dim out the brightness
-            #    dim_color = self.dim(led_color, self._app_conf.get_int("lights", "dim_value"))
-            #    # led_color = utils_colors.hexcode(int(dim_color[0]), int(dim_color[1]), int(dim_color[2]))
-            # else:  # if home airport feature is disabled, then don't dim out any airports brightness
-            #    norm_color = led_color
-            #    # led_color = utils_colors.hexcode(norm_color[0], norm_color[1], norm_color[2])
+        else:
+            self._wx_sequence_table = np.zeros(
+                (0, len(self._cycle_wait), 3), dtype=np.uint8
+            )
+        self._wx_sequence_keys = sequence_keys
+        debugging.info(
+            f"ledmode_metar: {len(led_list)} leds using {len(self._wx_sequences)} sequences : tick {clock_tick}"
+        )
 
-            if (clock_tick % 1000) == 0:
-                debugging.info(
-                    f"ledmode_metar: {airportcode}:{flightcategory}:{airportwinds}:{airport_led}:{led_color}"
+    def ledmode_metar(self, clock_tick):
+        """Render LED Colors for Airports into the framebuffer."""
+        framebuffer = self._framebuffer
+        cycle_num = clock_tick % len(self._cycle_wait)
+
+        # Weather only needs to be checked once per animation cycle
+        if cycle_num == 0 or self._wx_sequence_serial != self._app_conf.cache_serial():
+            self.update_wx_sequences(clock_tick)
+
+        framebuffer.clear()
+        framebuffer.set_rgb(
+            self._wx_sequence_leds, self._wx_sequence_table[:, cycle_num]
+        )
+
+        # Overlay layer - If homeport is set to 1 then turn on the appropriate LED using a specific color.
+        # This will toggle so that every other frame, the color will display the proper weather, then homeport color(s).
+        self.homeport_toggle = not self.homeport_toggle
+        if (
+            self._homeport_led is not None
+            and self._app_conf.snapshot().lights.homeport
+            and self.homeport_toggle
+        ):
+            if self._app_conf.snapshot().lights.homeport_display == 1:
+                homeport_colors = self._app_conf.snapshot().colors.homeport_colors
+                # The length of this array needs to match the cycle_num length
+                if cycle_num < len(homeport_colors):
+                    framebuffer.set_overlay(
+                        self._homeport_led, homeport_colors[cycle_num]
+                    )
+            elif self._app_conf.snapshot().lights.homeport_display == 2:
+                # Homeport set based on METAR data
+                pass
+            else:
+                # Homeport set to fixed color
+                framebuffer.set_overlay(
+                    self._homeport_led, self._app_conf.snapshot().colors.color_homeport
                 )
-            led_updated_dict[airport_led] = led_color
-        # Add cycle delay to this loop
-        time.sleep(self._cycle_wait[cycle_num])
-        return led_updated_dict
+
+        # FIXME: Dimming of the non homeport airports (lights dim_value) is not implemented
+
+        return framebuffer
 
     def colorwipe(self, clock_tick):
         """Run a color wipe test."""
@@ -906,25 +1100,15 @@ class UpdateLEDs:
 
     def ledmode_rainbow(self, clock_tick):
         """Update LEDs with rainbow pattern."""
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
-        for led_key in self._active_led_dict.keys():
-            if self._active_led_dict[led_key] is not None:
-                led_index = self._active_led_dict[led_key]
-                rainbow_index = (clock_tick + led_index) % len(self._rgb_rainbow)
-                rainbow_color = utils_colors.hex_tuple(self._rgb_rainbow[rainbow_index])
-                # print(f"Rainbow loop {_led_index} / {rainbow_index} / {rainbow_color} ")
-                led_updated_dict[led_index] = rainbow_color
-        return led_updated_dict
+        self._framebuffer.clear()
+        rainbow_index = (clock_tick + self._active_leds) % len(self._rgb_rainbow)
+        self._framebuffer.set_rgb(self._active_leds, self._rgb_rainbow[rainbow_index])
+        return self._framebuffer
 
     def ledmode_morse(self, clock_tick):
         """Update LEDs with morse pattern."""
-        led_updated_dict = {}
         morse_pos = clock_tick % len(self.morse_signal_encoded)
         led_color = utils_colors.black()
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
         if self.morse_signal_encoded[morse_pos] == self.morse_dot_symbol:
             led_color = self.morse_color_dot
         elif self.morse_signal_encoded[morse_pos] == self.morse_dash_symbol:
@@ -934,18 +1118,13 @@ class UpdateLEDs:
 
         # debugging.info(f"morse:{led_color}")
 
-        for led_key in self._active_led_dict.keys():
-            if self._active_led_dict[led_key] is not None:
-                led_index = self._active_led_dict[led_key]
-                led_updated_dict[led_index] = led_color
-        return led_updated_dict
+        return self.fill(led_color)
 
     def ledmode_taf(self, clock_tick, hr_offset):
         """Update LEDs based on TAF data."""
         airport_list = self._airport_database.get_airport_dict_led()
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
+        self._framebuffer.clear()
+        category_leds = {}
 
         cycle_num = clock_tick % len(self._cycle_wait)
 
@@ -956,39 +1135,37 @@ class UpdateLEDs:
             if not airportcode:
                 continue
             if airportcode.startswith("null"):
-                led_updated_dict[airportled] = utils_colors.off()
                 continue
             if airportcode.startswith("lgnd"):
-                led_color = self.legend_color(airportwxsrc, cycle_num)
-                led_updated_dict[airportled] = led_color
+                self._framebuffer.set_pixel(
+                    airportled, self.legend_color(airportwxsrc, cycle_num)
+                )
                 continue
 
-            # Initialize color
-            led_color = utils_colors.off()
             # Pull the next flight category from dictionary.
             flightcategory = self.airport_taf_flightcategory(airportcode, hr_offset)
             if not flightcategory:
                 flightcategory = "UNKN"
 
-            # Start of weather display code for each airport in the "airports" file
-            # Check flight category and set the appropriate color to display
-            led_color = utils_colors.flightcategory_color(
-                self._app_conf, flightcategory
-            )
-
             if (clock_tick % 150) == 0:
                 debugging.debug(
-                    f"ledmode_taf: {airportcode}:{flightcategory}:{airportled}:{led_color}"
+                    f"ledmode_taf: {airportcode}:{flightcategory}:{airportled}"
                 )
-            led_updated_dict[airportled] = led_color
-        return led_updated_dict
+            category_leds.setdefault(flightcategory, []).append(airportled)
+
+        # Check flight category and set the appropriate color to display
+        for flightcategory, led_list in category_leds.items():
+            self._framebuffer.fill(
+                led_list,
+                utils_colors.flightcategory_color(self._app_conf, flightcategory),
+            )
+        return self._framebuffer
 
     def ledmode_mos(self, clock_tick, hr_offset):
         """Update LEDs based on MOS data."""
         airport_list = self._airport_database.get_airport_dict_led()
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
+        self._framebuffer.clear()
+        category_leds = {}
 
         cycle_num = clock_tick % len(self._cycle_wait)
 
@@ -999,132 +1176,141 @@ class UpdateLEDs:
             if not airportcode:
                 continue
             if airportcode.startswith("null"):
-                led_updated_dict[airportled] = utils_colors.off()
                 continue
             if airportcode.startswith("lgnd"):
-                led_color = self.legend_color(airportwxsrc, cycle_num)
-                led_updated_dict[airportled] = led_color
+                self._framebuffer.set_pixel(
+                    airportled, self.legend_color(airportwxsrc, cycle_num)
+                )
                 continue
 
-            # Initialize color
-            led_color = utils_colors.off()
             # Pull the next flight category from dictionary.
             flightcategory = self.airport_mos_flightcategory(airportcode, hr_offset)
             if not flightcategory:
                 flightcategory = "UNKN"
 
-            # Start of weather display code for each airport in the "airports" file
-            # Check flight category and set the appropriate color to display
-            led_color = utils_colors.flightcategory_color(
-                self._app_conf, flightcategory
-            )
-
             if (clock_tick % 1000) == 0:
                 debugging.info(
-                    f"ledmode_mos: {airportcode}:{flightcategory}:{airportled}:{led_color}"
+                    f"ledmode_mos: {airportcode}:{flightcategory}:{airportled}"
                 )
-            led_updated_dict[airportled] = led_color
-        return led_updated_dict
-
-    # Wipe routines based on Lat/Lons of airports on map.
-    # Need to pass name of dictionary with coordinates, either latdict or londict
-    # Also need to pass starting value and ending values to led_indexate through. These are floats for Lat/Lon. i.e. 36.23
-
-    def wipe(self, dict_name, start, end, step, color1, color2, wait_mult):
-        """Wipe based on location."""
-        # Need to find duplicate values (lat/lons) from dictionary using flip technique
-        flipped = {}
-        for key, value in list(
-            dict_name.items()
-        ):  # create a dict where keys and values are swapped
-            if value not in flipped:
-                flipped[value] = [key]
-            else:
-                flipped[value].append(key)
-
-        for i in self.frange(start, end, step):
-            key = str(i)
-
-            if key in flipped:  # Grab latitude from dict
-                num_elem = len(flipped[key])  # Determine the number of duplicates
-
-                for j in range(
-                    num_elem
-                ):  # loop through each duplicate to get led number
-                    key_id = flipped[key][j]
-                    led_index = self.ap_id.index(
-                        key_id
-                    )  # Assign the pin to the LED to turn on/off
-
-                    self.set_led_color(led_index, color1)
-                    self.show()
-                    time.sleep(self.time_base_delay * wait_mult)
-
-                    self.set_led_color(led_index, color2)
-                    self.show()
-                    time.sleep(self.time_base_delay * wait_mult)
-
-    # Circle wipe
-    def circlewipe(self, minlon, minlat, maxlon, maxlat, color1, color2):
-        """Wipe in a circle."""
-        rad_inc = 4
-        rad = rad_inc
-
-        sizelat = round(abs(maxlat - minlat), 2)  # height of box
-        sizelon = round(abs(maxlon - minlon), 2)  # width of box
-
-        centerlat = round(sizelat / 2 + minlat, 2)  # center y coord of box
-        centerlon = round(sizelon / 2 + minlon, 2)  # center x coord of box
-
-        circle_x = centerlon
-        circle_y = centerlat
-
-        led_index = int(
-            sizelat / rad_inc
-        )  # attempt to figure number of led_indexations necessary to cover whole map
-
-        for dummy_j in range(led_index):
-            airports = self._airport_database.get_airport_dict_led()
-            for dummy_key, airport_obj in airports.items():
-                if not airport_obj.active():
-                    continue
-                x_pos = float(airport_obj.longitude())
-                y_pos = float(airport_obj.latitude())
-                led_index = int(airport_obj.get_led_index())
-
-                if (x_pos - circle_x) * (x_pos - circle_x) + (y_pos - circle_y) * (
-                    y_pos - circle_y
-                ) <= rad * rad:
-                    #               print("Inside")
-                    color = color1
-                else:
-                    #               print("Outside")
-                    color = color2
-                self.set_led_color(led_index, color)
-                self.show()
-                time.sleep(self.time_base_delay)
-            rad = rad + rad_inc
-
-        for dummy_j in range(led_index):
-            rad = rad - rad_inc
-            airports = self._airport_database.get_airport_dict_led()
-            for dummy_key, airport_obj in airports.items():
-                x_pos = float(airport_obj.longitude())
-                y_pos = float(airport_obj.latitude())
-                led_index = int(airport_obj.get_led_index())
-
-                if (x_pos - circle_x) * (x_pos - circle_x) + (y_pos - circle_y) * (
-                    y_pos - circle_y
-                ) <= rad * rad:
-                    #               print("Inside")
-                    color = color1
-                else:
-                    #               print("Outside")
-                    color = color2
-
-                self.set_led_color(led_index, color)
-                self.show()
-                time.sleep(self.time_base_delay)
+            category_leds.setdefault(flightcategory, []).append(airportled)
+
+        # Check flight category and set the appropriate color to display
+        for flightcategory, led_list in category_leds.items():
+            self._framebuffer.fill(
+                led_list,
+                utils_colors.flightcategory_color(self._app_conf, flightcategory),
+            )
+        return self._framebuffer
+
+    def ledmode_geometry_setup(self):
+        """Build per airport geometry table used by the wipe modes."""
+        # For all these calculations ; longitude is X ; latitude is Y
+        geo_index = self._airport_database.led_geo_index()
+        airport_dict = self._airport_database.get_airport_dict_led()
+        geo_leds = [
+            airport_dict[icao].get_led_index() if icao in airport_dict else -1
+            for icao in geo_index.keys()
+        ]
+
+        geo_key = (geo_index.serial(), tuple(geo_leds))
+        if geo_key == self._geo_key:
+            return
+        self._geo_key = geo_key
+
+        leds = np.array(geo_leds, dtype=np.intp)
+        lon = geo_index.lon()
+        lat = geo_index.lat()
+        if len(leds) == 0:
+            debugging.debug("GEOMETRY: Setup incomplete ; no lon/lat data")
+            self._geo_table = {}
+            return
+
+        min_lon, max_lon = lon.min(), lon.max()
+        min_lat, max_lat = lat.min(), lat.max()
+        width = max(max_lon - min_lon, 1e-6)
+        height = max(max_lat - min_lat, 1e-6)
+
+        # Normalized map position ; 0,0 is the bottom left (south west) corner
+        x_pos = (lon - min_lon) / width
+        y_pos = (lat - min_lat) / height
+        x_off = x_pos - 0.5
+        y_off = y_pos - 0.5
+        radius = np.hypot(x_off, y_off)
+
+        # Quadrant cells in clockwise order ; 0 top left, 1 top right, 2 bottom right, 3 bottom left
+        cell = np.where(
+            y_off >= 0, np.where(x_off < 0, 0, 1), np.where(x_off >= 0, 2, 3)
+        )
+
+        self._geo_table = {
+            "leds": leds,
+            "x": x_pos,
+            "y": y_pos,
+            # Angle anticlockwise from east, 0 - 360
+            "angle": np.degrees(np.arctan2(y_off, x_off)) % 360,
+            # Distance from center ; 1.0 is the furthest airport
+            "radius": radius / max(radius.max(), 1e-6),
+            # Chebyshev distance from center ; 1.0 is the edge of the bounding box
+            "square": np.maximum(np.abs(x_off), np.abs(y_off)) * 2,
+            "cell": cell,
+        }
+        debugging.info(f"GEOMETRY: table updated for {len(leds)} airports")
+
+    def wipe_level(self, clock_tick):
+        """Return wipe position (0.0 - 1.0) ; expanding then contracting."""
+        wipe_pos = clock_tick % (self.WIPE_STEPS * 2)
+        if wipe_pos > self.WIPE_STEPS:
+            wipe_pos = (self.WIPE_STEPS * 2) - wipe_pos
+        return wipe_pos / self.WIPE_STEPS
+
+    def ledmode_geometry(self, mask_func, color1, color2):
+        """Set airports selected by mask_func(geometry table) to color1 ; all other located airports to color2."""
+        if not self._geo_table:
+            self.ledmode_geometry_setup()
+        self._framebuffer.clear()
+        if not self._geo_table:
+            return self._framebuffer
+        leds = self._geo_table["leds"]
+        mask = mask_func(self._geo_table)
+        self._framebuffer.fill(leds[~mask], color2)
+        self._framebuffer.fill(leds[mask], color1)
+        return self._framebuffer
+
+    def ledmode_squarewipe(self, clock_tick):
+        """Square growing out from, then shrinking back to the center of the map."""
+        wipe_level = self.wipe_level(clock_tick)
+        return self.ledmode_geometry(
+            lambda geo: geo["square"] <= wipe_level,
+            self._app_conf.snapshot().colors.square_color1,
+            self._app_conf.snapshot().colors.square_color2,
+        )
+
+    def ledmode_circlewipe(self, clock_tick):
+        """Circle growing out from, then shrinking back to the center of the map."""
+        wipe_level = self.wipe_level(clock_tick)
+        return self.ledmode_geometry(
+            lambda geo: geo["radius"] <= wipe_level,
+            self._app_conf.snapshot().colors.circle_color1,
+            self._app_conf.snapshot().colors.circle_color2,
+        )
+
+    def ledmode_checkerwipe(self, clock_tick):
+        """Light each quarter of the map in turn ; clockwise."""
+        active_cell = (clock_tick // self.CHECKER_HOLD) % 4
+        return self.ledmode_geometry(
+            lambda geo: geo["cell"] == active_cell,
+            self._app_conf.snapshot().colors.checker_color1,
+            self._app_conf.snapshot().colors.checker_color2,
+        )
+
+    def ledmode_wheelwipe(self, clock_tick):
+        """Wide wedge rotating anticlockwise around the center of the map."""
+        wheel_start = (clock_tick * self.WHEEL_STEP) % 360
+        return self.ledmode_geometry(
+            lambda geo: ((geo["angle"] - wheel_start) % 360) < self.WHEEL_WIDTH,
+            self._app_conf.snapshot().colors.radar_color1,
+            self._app_conf.snapshot().colors.radar_color2,
+        )
 
     def ledmode_radar_setup(self):
         """Set up data structures for ledmode_radar"""
@@ -1132,10 +1318,12 @@ class UpdateLEDs:
         self.radar_beam_color = "#00FF00"
         self.radar_beam_width = 5
 
-        radar_map = {}
-        max_lon, min_lon, max_lat, min_lat = utils_coord.airport_boundary_calc(
-            self._airport_database
-        )
+        geo_index = self._airport_database.led_geo_index()
+        if self._radar_map and geo_index.serial() == self._radar_serial:
+            # Airport coordinates haven't changed
+            return
+        self._radar_serial = geo_index.serial()
+        max_lon, min_lon, max_lat, min_lat = geo_index.bounds()
 
         debugging.debug(
             f"RADAR: max_lon: {max_lon}, min_lon: {min_lon}, max_lat: {max_lat}, min_lat: {min_lat}, "
@@ -1150,43 +1338,25 @@ class UpdateLEDs:
             return
         width = abs(max_lon - min_lon)
         height = abs(max_lat - min_lat)
-        center_lon = (max_lon + min_lon) / 2
-        center_lat = (max_lat + min_lat) / 2
         self.radar_beam_radius = (
             max(height, width) * 1.1
         )  # Radius of 110% of the biggest boundary size surrounding the airports
-        # debugging.debug(
-        #     f"RADAR: center_lon: {center_lon}, center_lat: {center_lat}, self.radar_beam_radius: {self.radar_beam_radius}"
-        # )
-        area_triangles = utils_coord.circle_triangles(
-            self.radar_beam_radius, self.radar_beam_width, center_lon, center_lat
-        )
-        # debugging.debug(f"RADAR: {area_triangles}")
-        for triangle in area_triangles:
-            for (
-                airport_key,
-                airport_obj,
-            ) in self._airport_database.get_airport_dict_led().items():
-                if airport_obj.valid_coordinates():
-                    airport_led = airport_obj.get_led_index()
-                    airport_lat = airport_obj.latitude()
-                    airport_lon = airport_obj.longitude()
-                    if utils_coord.is_inside_triangle(
-                        (airport_lon, airport_lat),
-                        triangle[1],
-                        triangle[2],
-                        triangle[3],
-                    ):
-                        deg_pos_start = triangle[0][0]
-                        deg_pos_end = triangle[0][1]
-                        # debugging.info(
-                        #     f"RADAR: Match airport {airport_key}:  inside {deg_pos_start}/{deg_pos_end}: led {airport_led}"
-                        # )
-                        for deg_pos in range(deg_pos_start, deg_pos_end):
-                            if deg_pos in radar_map:
-                                radar_map[deg_pos] = radar_map[deg_pos] + (airport_led,)
-                            else:
-                                radar_map[deg_pos] = (airport_led,)
+
+        airport_dict = self._airport_database.get_airport_dict_led()
+        radar_map = {}
+        for deg_pos_start in range(0, 360, self.radar_beam_width):
+            deg_pos_end = deg_pos_start + self.radar_beam_width
+            radar_leds = tuple(
+                airport_dict[icao].get_led_index()
+                for icao in geo_index.sector(
+                    deg_pos_start, deg_pos_end, self.radar_beam_radius
+                )
+                if icao in airport_dict
+            )
+            if not radar_leds:
+                continue
+            for deg_pos in range(deg_pos_start, deg_pos_end):
+                radar_map[deg_pos] = radar_leds
 
         # debugging.info(f"RADAR: radar_map: {radar_map}")
         self._radar_map = radar_map
@@ -1198,194 +1368,14 @@ class UpdateLEDs:
         if len(self._radar_map) == 0:
             self.ledmode_radar_setup()
 
-        led_updated_dict = {}
-        led_color = utils_colors.black()
+        self._framebuffer.clear()
 
         angle_seed = 360 - (clock_tick % 360)
 
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
-
         if angle_seed in self._radar_map:
-            radar_leds = self._radar_map[angle_seed]
-            for led_index in radar_leds:
-                led_updated_dict[led_index] = self.radar_beam_color
-
-        return led_updated_dict
-
-    def radarwipe(
-        self,
-        centerlat,
-        centerlon,
-        led_index,
-        color1,
-        color2,
-        sweepwidth=175,
-        radius=50,
-        angleinc=0.05,
-    ):
-        """Radar sweep."""
-        angle = 0
-
-        for dummy_k in range(led_index):
-            # Calculate the x_1,y_1 for the end point of our 'sweep' based on
-            # the current angle. Then do the same for x_2,y_2
-            x_1 = round(radius * math.sin(angle) + centerlon, 2)
-            y_1 = round(radius * math.cos(angle) + centerlat, 2)
-            x_2 = round(radius * math.sin(angle + sweepwidth) + centerlon, 2)
-            y_2 = round(radius * math.cos(angle + sweepwidth) + centerlat, 2)
-
-            airports = self._airport_database.get_airport_dict_led()
-            for dummy_key, airport_obj in airports.items():
-                px_1 = float(airport_obj.longitude())  # Lon
-                py_1 = float(airport_obj.latitude())  # Lat
-                led_index = int(airport_obj.get_led_index())  # LED Pin Num
-
-                if utils_coord.point_inside_triangle(
-                    (px_1, py_1), (centerlon, centerlat), (x_1, y_1), (x_2, y_2)
-                ):
-                    #               print('Inside')
-                    self.set_led_color(led_index, color1)
-                else:
-                    self.set_led_color(led_index, color2)
-            self.show()
-            time.sleep(self.time_base_delay)
-
-            # Increase the angle by angleinc radians
-            angle = angle + angleinc
-
-            # If we have done a full sweep, reset the angle to 0
-            if angle > 2 * self.PI:
-                angle = angle - (2 * self.PI)
-
-    def squarewipe(
-        self,
-        minlon,
-        minlat,
-        maxlon,
-        maxlat,
-        led_index,
-        color1,
-        color2,
-        step=0.5,
-        wait_mult=10,
-    ):
-        """Wipe in a square."""
-        declon = minlon
-        declat = minlat
-        inclon = maxlon
-        inclat = maxlat
-        centlon = utils_gfx.center(maxlon, minlon)
-        centlat = utils_gfx.center(maxlat, minlat)
-
-        for dummy_j in range(led_index):
-            for inclon in self.frange(maxlon, centlon, step):
-                # declon, declat = Upper Left of box.
-                # inclon, inclat = Lower Right of box
-                for (
-                    dummy_key,
-                    airport_obj,
-                ) in self._airport_database.get_airport_dict_led():
-                    px_1 = float(airport_obj.longitude())  # Lon
-                    py_1 = float(airport_obj.latitude())  # Lat
-                    led_index = int(airport_obj.get_led_index())  # LED Pin Num
-
-                    #                print((declon, declat, inclon, inclat, px_1, py_1)) #debug
-                    if utils_gfx.findpoint(declon, declat, inclon, inclat, px_1, py_1):
-                        #                    print('Inside') #debug
-                        color = color1
-                    else:
-                        #                    print('Not Inside') #debug
-                        color = color2
-
-                    self.set_led_color(led_index, color)
-
-                inclat = round(inclat - step, 2)
-                declon = round(declon + step, 2)
-                declat = round(declat + step, 2)
-
-                self.show()
-                time.sleep(self.time_base_delay * wait_mult)
-
-            for inclon in self.frange(centlon, maxlon, step):
-                # declon, declat = Upper Left of box.
-                # inclon, inclat = Lower Right of box
-                for (
-                    dummy_key,
-                    airport_obj,
-                ) in self._airport_database.get_airport_dict_led():
-                    px_1 = float(airport_obj.longitude())  # Lon
-                    py_1 = float(airport_obj.latitude())  # Lat
-                    led_index = int(airport_obj.get_led_index())  # LED Pin Num
-
-                    #                print((declon, declat, inclon, inclat, px_1, py_1)) #debug
-                    if utils_gfx.findpoint(declon, declat, inclon, inclat, px_1, py_1):
-                        #                    print('Inside') #debug
-                        color = color1
-                    else:
-                        #                   print('Not Inside') #debug
-                        color = color2
-
-                    self.set_led_color(led_index, color)
-
-                inclat = round(inclat + step, 2)
-                declon = round(declon - step, 2)
-                declat = round(declat - step, 2)
-
-                self.show()
-                time.sleep(self.time_base_delay * wait_mult)
-
-    def checkerwipe(
-        self,
-        minlon,
-        minlat,
-        maxlon,
-        maxlat,
-        led_index,
-        color1,
-        color2,
-        cwccw=0,
-        wait_mult=100,
-    ):
-        """Checkerboard wipe."""
-        centlon = utils_gfx.center(maxlon, minlon)
-        centlat = utils_gfx.center(maxlat, minlat)
-
-        # Example square: lon1, lat1, lon2, lat2  [x_1, y_1, x_2, y_2]  -114.87, 37.07, -109.07, 31.42
-        # +-----+-----+
-        # |  1  |  2  |
-        # |-----+-----|
-        # |  3  |  4  |
-        # +-----+-----+
-        square1 = [minlon, centlat, centlon, maxlat]
-        square2 = [centlon, centlat, maxlon, maxlat]
-        square3 = [minlon, minlat, centlon, centlat]
-        square4 = [centlon, minlat, maxlon, centlat]
-        squarelist = [square1, square2, square4, square3]
-
-        if cwccw == 1:  # clockwise = 0, counter-clockwise = 1
-            squarelist.reverse()
-
-        for dummy_j in range(led_index):
-            for box in squarelist:
-                for (
-                    dummy_key,
-                    airport_obj,
-                ) in self._airport_database.get_airport_dict_led():
-                    px_1 = float(airport_obj.longitude())  # Lon
-                    py_1 = float(airport_obj.latitude())  # Lat
-                    led_index = int(airport_obj.get_led_index())  # LED Pin Num
-
-                    if utils_gfx.findpoint(
-                        *box, px_1, py_1
-                    ):  # Asterick allows unpacking of list in function call.
-                        color = color1
-                    else:
-                        color = color2
+            self._framebuffer.fill(self._radar_map[angle_seed], self.radar_beam_color)
 
-                    self.set_led_color(led_index, color)
-                self.show()
-                time.sleep(self.time_base_delay * wait_mult)
+        return self._framebuffer
 
     # Dim LED's
     def old_dimwipe(self, data, value):
@@ -1443,57 +1433,39 @@ class UpdateLEDs:
 
     def ledmode_rabbit(self, clock_tick):
         """Rabbit running through the map."""
-        led_updated_dict = {}
         rabbit_pos = clock_tick % (len(self._active_led_dict) + 1)
         rabbit_color_1 = utils_colors.colordict["RED"]
         rabbit_color_2 = utils_colors.colordict["BLUE"]
         rabbit_color_3 = utils_colors.colordict["ORANGE"]
 
-        # debugging.info("Rabbit: In the rabbit loop")
-
-        for led_key in self._active_led_dict.keys():
-            if self._active_led_dict[led_key] is not None:
-                led_index = self._active_led_dict[led_key]
-                # debugging.info(f"posn:{rabbit_pos}/index:{_led_index}")
-                led_updated_dict[led_index] = utils_colors.off()
-                if led_index == rabbit_pos - 2:
-                    led_updated_dict[led_index] = rabbit_color_1
-                if led_index == rabbit_pos - 1:
-                    led_updated_dict[led_index] = rabbit_color_2
-                if led_index == rabbit_pos:
-                    led_updated_dict[led_index] = rabbit_color_3
-        return led_updated_dict
+        active_leds = self._active_leds
+        self._framebuffer.clear()
+        self._framebuffer.fill(active_leds[active_leds == rabbit_pos - 2], rabbit_color_1)
+        self._framebuffer.fill(active_leds[active_leds == rabbit_pos - 1], rabbit_color_2)
+        self._framebuffer.fill(active_leds[active_leds == rabbit_pos], rabbit_color_3)
+        return self._framebuffer
 
     def ledmode_shuffle(self, clock_tick):
         """Random LED colors."""
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = utils_colors.off()
-        for led_key in self._active_led_dict.keys():
-            if self._active_led_dict[led_key] is not None:
-                led_index = self._active_led_dict[led_key]
-                led_updated_dict[led_index] = utils_colors.randomcolor()
-        return led_updated_dict
+        self._framebuffer.clear()
+        self._framebuffer.set_rgb(
+            self._active_leds,
+            np.random.randint(0, 256, size=(len(self._active_leds), 3)),
+        )
+        return self._framebuffer
 
     def ledmode_fade(self, clock_tick):
         """Fade out and in colors."""
-        led_updated_dict = {}
         fade_val = clock_tick % 255
-        fade_col = utils_colors.hexcode(fade_val, 255 - fade_val, fade_val)
-        for led_index in range(self.num_pixels()):
-            if self._active_led_dict[led_index] is not None:
-                led_updated_dict[led_index] = fade_col
-        return led_updated_dict
+        return self.fill((fade_val, 255 - fade_val, fade_val))
 
     def ledmode_heatmap(self, clock_tick):
         """Set airport color based on number of visits."""
         airport_list = self._airport_database.get_airport_dict_led()
-        led_updated_dict = {}
-        for led_index in range(self.num_pixels()):
-            led_updated_dict[led_index] = self.heatmap_color(0)
+        self._framebuffer.clear()
         for airport_key in airport_list:
             airport_obj = airport_list[airport_key]
             airportled = airport_obj.get_led_index()
             airportheat = airport_obj.heatmap_index()
-            led_updated_dict[airportled] = self.heatmap_color(airportheat)
-        return led_updated_dict
+            self._framebuffer.set_pixel(airportled, self.heatmap_color(airportheat))
+        return self._framebuffer
@@ -11,6 +11,7 @@ import adafruit_veml7700
 import adafruit_tsl2591
 
 import debugging
+import utils_i2c
 
 
 class LightSensor:
@@ -57,6 +58,12 @@ class LightSensor:
 
     def i2c_scan(self):
         """Scan i2c bus for supported light sensors."""
+        self._i2cbus.run(
+            "lightsensor scan", None, self.i2c_scan_bus, utils_i2c.PRIORITY_BACKGROUND
+        )
+
+    def i2c_scan_bus(self):
+        """Scan i2c bus for supported light sensors ; runs on the i2c scheduler."""
         self._sensor_device = False
         # FIXME:
         #  Either remove assumption about device behind i2c mux,
@@ -90,20 +97,24 @@ class LightSensor:
     def read_tsl2591(self, old_lux) -> int | None:
         """Read LUX value from tsl2591."""
         lux = old_lux
-        if self._i2cbus.bus_lock("light sensor update loop : tsl2591"):
-            try:
-                lux = self.dev_tsl2591.lux
-            except OSError as err:
-                debugging.info(f"tsl2591 light sensor read failure: {err}")
-                self._error_count += 1
-                self.i2c_scan()
-                lux = 100
-            except Exception as e:
-                self._error_count += 1
-                debugging.error(e)
-                debugging.error(traceback.format_exc())
-            finally:
-                self._i2cbus.bus_unlock()
+        try:
+            completed, new_lux = self._i2cbus.run(
+                "tsl2591",
+                None,
+                lambda: self.dev_tsl2591.lux,
+                utils_i2c.PRIORITY_SENSOR,
+            )
+            if completed:
+                lux = new_lux
+        except OSError as err:
+            debugging.info(f"tsl2591 light sensor read failure: {err}")
+            self._error_count += 1
+            self.i2c_scan()
+            lux = 100
+        except Exception as e:
+            self._error_count += 1
+            debugging.error(e)
+            debugging.error(traceback.format_exc())
         debugging.debug(f"tsl2591:raw {lux} lux")
         lux = max(lux, 10)
         lux = min(lux, 255)
@@ -112,20 +123,24 @@ class LightSensor:
     def read_veml7700(self, old_lux) -> int | None:
         """Read LUX value from veml7700."""
         lux = old_lux
-        if self._i2cbus.bus_lock("light sensor update loop : veml7700"):
-            try:
-                lux = self.dev_veml7700.lux
-            except OSError as err:
-                debugging.info(f"veml7700 light sensor read failure: {err}")
-                self._error_count += 1
-                self.i2c_scan()
-                lux = 100
-            except Exception as e:
-                self._error_count += 1
-                debugging.error(e)
-                debugging.error(traceback.format_exc())
-            finally:
-                self._i2cbus.bus_unlock()
+        try:
+            completed, new_lux = self._i2cbus.run(
+                "veml7700",
+                None,
+                lambda: self.dev_veml7700.lux,
+                utils_i2c.PRIORITY_SENSOR,
+            )
+            if completed:
+                lux = new_lux
+        except OSError as err:
+            debugging.info(f"veml7700 light sensor read failure: {err}")
+            self._error_count += 1
+            self.i2c_scan()
+            lux = 100
+        except Exception as e:
+            self._error_count += 1
+            debugging.error(e)
+            debugging.error(traceback.format_exc())
         debugging.debug(f"veml7700:raw {lux} lux")
         lux = max(lux, 10)
         lux = min(lux, 255)
@@ -26,15 +26,15 @@ import json
 import shutil
 
 from luma.core.interface.serial import i2c
-from luma.core.render import canvas
 from luma.oled.device import ssd1306, ssd1309, ssd1325, ssd1331, sh1106
 
 import debugging
 
 import utils
 
-# import utils_i2c
+import utils_i2c
 import utils_gfx
+import utils_sprites
 
 from PIL import Image
 from PIL import ImageDraw
@@ -125,6 +125,9 @@ class UpdateOLEDs:
     OLEDI2CID = 0x3C
     MONOCHROME = "1"  # Single bit color mode for ssd1306 / sh1106
 
+    OLED_DEFAULT_CADENCE = 5  # Seconds between panel refreshes
+    OLED_PUSH_TIMEOUT = 2.0
+
     OLED_128x64 = {"w": 128, "h": 64}
     OLED_128x32 = {"w": 128, "h": 32}
     OLED_96x36 = {"w": 96, "h": 36}
@@ -163,6 +166,7 @@ class UpdateOLEDs:
 
     _oled_device_config = {}
     _oled_metar_airports = []
+    _panel_plans = []
 
     oled_list = []
     oled_dict_default = {
@@ -181,7 +185,17 @@ class UpdateOLEDs:
     _font_default_18 = None
     _font_default_20 = None
 
+    # Rendered wind images ; airport -> (display_key, image)
     _image_cache = None
+    # Display key of the image last pushed to each OLED ; oled_id -> display_key
+    _oled_display_key = None
+    _status_render_count = 0
+
+    # Sprite atlas for each panel size ; (w, h) -> utils_sprites.SpriteAtlas
+    _sprite_atlas = None
+    _render_count = 0
+    _render_time_total = 0.0
+    _render_time_max = 0.0
 
     def __init__(self, conf, sysdata, airport_database, i2cbus, led_mgmt):
         self._app_conf = conf
@@ -194,8 +208,21 @@ class UpdateOLEDs:
         debugging.debug(f"OLED: Config setup for {self._device_count} devices")
 
         self._oled_device_config = {}
+        self._panel_plans = []
         self.load_oled_conf()
 
+        # Fonts and sprites are needed for the init message on each OLED
+        self._font_default_10 = ImageFont.load_default(size=10)
+        self._font_default_12 = ImageFont.load_default(size=12)
+        self._font_default_14 = ImageFont.load_default(size=14)
+        self._font_default_16 = ImageFont.load_default(size=16)
+        self._font_default_18 = ImageFont.load_default(size=18)
+        self._font_default_20 = ImageFont.load_default(size=20)
+        self._sprite_atlas = {}
+        self._render_count = 0
+        self._render_time_total = 0.0
+        self._render_time_max = 0.0
+
         oled_dev_found = 0
         for device_idnum in range(0, device_count):
             debugging.debug(f"OLED: Polling for device: {device_idnum}")
@@ -209,15 +236,9 @@ class UpdateOLEDs:
                 # self.oled_text(device_idnum, f"Init {device_idnum}")
         self._device_count = oled_dev_found
 
-        # New OLED Conf
-        self._font_default_10 = ImageFont.load_default(size=10)
-        self._font_default_12 = ImageFont.load_default(size=12)
-        self._font_default_14 = ImageFont.load_default(size=14)
-        self._font_default_16 = ImageFont.load_default(size=16)
-        self._font_default_18 = ImageFont.load_default(size=18)
-        self._font_default_20 = ImageFont.load_default(size=20)
-
         self._image_cache = {}
+        self._oled_display_key = {}
+        self._status_render_count = 0
 
         debugging.debug(
             f"OLED: Init complete : oled_list len {len(self.oled_list)}/ conf {device_count}"
@@ -342,25 +363,9 @@ class UpdateOLEDs:
             debugging.warn(f"OLED: Attempting to update disabled OLED : {oled_id}")
             return
 
-        # Make sure to create image with mode '1' for 1-bit color.
-        # image = Image.new(oled_dev["mode"], (width, height))
-        # draw = ImageDraw.Draw(image)
-        # txt_w, txt_h = draw.textsize(txt, fnt)
-        device = oled_dev["device"]
-        device_i2cbus_id = oled_dev["devid"]
-
         debugging.debug(f"OLED: Writing to device: {oled_id} : Msg : {txt}")
-        if self._i2cbus.bus_lock("oled_text"):
-            try:
-                self.oled_select(device_i2cbus_id)
-                with canvas(device) as draw:
-                    # draw.rectangle(device.bounding_box, outline="white", fill="black")
-                    draw.text((5, 5), txt, font=self._font_default_10, fill="white")
-            finally:
-                self._i2cbus.bus_unlock()
-        else:
-            debugging.info(f"Failed to grab lock for oled:{oled_id}")
-            self._i2cbus.bus_unlock()
+        image = self.render_text_image(oled_id, txt)
+        self.write_to_i2c_oled(oled_id, image, "oled_text")
 
     def generate_info_image(self, oled_id):
         """Create the status/info image."""
@@ -421,7 +426,7 @@ class UpdateOLEDs:
 
         img.save(image_filename)
 
-    def draw_nowx(self, oled_id, airport, rway_label, rway_angle, winddir, windspeed):
+    def render_nowx_image(self, oled_id, airport):
         """Draw NOWX message."""
         # TODO: This code assumes a single runway direction only. Need to handle airports with multiple runways
         if oled_id > len(self.oled_list):
@@ -432,26 +437,43 @@ class UpdateOLEDs:
             debugging.warn(f"OLED: Attempting to update disabled OLED : {oled_id}")
             return
 
-        device = oled_dev["device"]
         width = oled_dev["size"]["w"]
         height = oled_dev["size"]["h"]
-        device_i2cbus_id = oled_dev["devid"]
 
         airport_details = f"{airport} NOWX"
 
-        if self._i2cbus.bus_lock("draw_nowx"):
-            self.oled_select(device_i2cbus_id)
-            with canvas(device) as draw:
-                draw.text(
-                    (5, height / 2),
-                    airport_details,
-                    font=self._font_default_20,
-                    fill="white",
-                )
-            self._i2cbus.bus_unlock()
-        else:
-            debugging.info(f"Failed to grab lock for oled:{oled_id}")
-        return
+        image = Image.new(self.MONOCHROME, (width, height))
+        draw = ImageDraw.Draw(image)
+        draw.text(
+            (5, height / 2),
+            airport_details,
+            font=self._font_default_20,
+            fill="white",
+        )
+        return image
+
+    def sprite_atlas(self, oled_id):
+        """Return sprite atlas for the size of an OLED ; built on first use."""
+        oled_size = self.oled_list[oled_id]["size"]
+        atlas_key = (oled_size["w"], oled_size["h"])
+        atlas = self._sprite_atlas.get(atlas_key)
+        if atlas is None:
+            build_start = time.time()
+            atlas = utils_sprites.SpriteAtlas(
+                oled_size["w"], oled_size["h"], self._font_default_10
+            )
+            self._sprite_atlas[atlas_key] = atlas
+            debugging.info(
+                f"OLED: sprite atlas {atlas_key} built in {time.time() - build_start:.2f}s"
+            )
+        return atlas
+
+    def record_render_time(self, render_start):
+        """Track time taken to render a frame."""
+        render_time = time.time() - render_start
+        self._render_count += 1
+        self._render_time_total += render_time
+        self._render_time_max = max(self._render_time_max, render_time)
 
     def render_wind_image(
         self,
@@ -462,6 +484,7 @@ class UpdateOLEDs:
         best_runway_width,
         winddir,
         windspeed,
+        crosswind=None,
     ):
         """Draw Wind Arrow and Runway."""
         if oled_id > len(self.oled_list):
@@ -474,10 +497,8 @@ class UpdateOLEDs:
             debugging.warn(f"OLED: Attempting to update disabled OLED : {oled_id}")
             return
 
-        device = oled_dev["device"]
-        width = oled_dev["size"]["w"]
+        render_start = time.time()
         height = oled_dev["size"]["h"]
-        device_i2cbus_id = oled_dev["devid"]
 
         # Runway Dimensions
         # TODO: Get runway width data from airport ; and draw a better runway ..
@@ -492,37 +513,23 @@ class UpdateOLEDs:
             rway_width = 12
         elif best_runway_width >= 150:
             rway_width = 15
-        rway_x = 5  # 5 pixel border
-        rway_y = int(height / 2 - rway_width / 2)
         airport_details = f"{airport}\n{winddir}@{windspeed}"
-        wind_poly = utils_gfx.create_wind_arrow(winddir, width, height)
-        runway_poly = utils_gfx.create_runway(
-            rway_x, rway_y, rway_width, best_runway_deg, width, height
-        )
         runway_details = f"Best Runway {best_runway_label}"
-
-        image = Image.new("1", (width, height))
-        draw = ImageDraw.Draw(image)
-
-        (tx_l, tx_t, tx_r, tx_b) = self._font_default_10.getbbox(text=airport_details)
-        airport_details_height = tx_t + tx_b + 2
-        (tx_l, tx_t, tx_r, tx_b) = self._font_default_10.getbbox(text=runway_details)
-        runway_details_height = tx_t + tx_b
-
-        draw.text(
-            (airport_details_height, 1),
-            airport_details,
-            font=self._font_default_10,
-            fill="white",
-        )
-        draw.polygon(wind_poly, fill="white", outline="white")
-        draw.polygon(runway_poly, fill=None, outline="white")
-        draw.text(
-            (1, height - runway_details_height),
-            runway_details,
-            font=self._font_default_10,
-            fill="white",
-        )
+        if crosswind is not None and round(crosswind) != 0:
+            crosswind_side = "R" if crosswind > 0 else "L"
+            runway_details += f" X{abs(crosswind):.0f}{crosswind_side}"
+
+        # Compose the frame from pre-rendered sprites
+        atlas = self.sprite_atlas(oled_id)
+        atlas.clear()
+        (__text_w, airport_details_height) = atlas.text_size(airport_details)
+        (__text_w, runway_details_height) = atlas.text_size(runway_details)
+        atlas.text(airport_details_height, 1, airport_details)
+        atlas.wind_arrow(winddir)
+        atlas.runway(best_runway_deg, rway_width)
+        atlas.text(1, height - runway_details_height, runway_details)
+        image = atlas.image()
+        self.record_render_time(render_start)
 
         # TODO: This caching mechanism is fragile when it comes to supporting multiple different sized
         # OLED screens ; or different rotations / layouts. There is an implicit assumption that all OLEDs displaying
@@ -545,56 +552,92 @@ class UpdateOLEDs:
             debugging.warn(f"OLED: Attempting to update disabled OLED : {oled_id}")
             return
 
-        width = oled_dev["size"]["w"]
-        height = oled_dev["size"]["h"]
-
-        image = Image.new("1", (width, height))
-        draw = ImageDraw.Draw(image)
-        draw.text((5, 5), textbox, font=self._font_default_10, fill="white")
-
+        render_start = time.time()
+        atlas = self.sprite_atlas(oled_id)
+        atlas.clear()
+        atlas.text(5, 5, textbox)
+        image = atlas.image()
+        self.record_render_time(render_start)
         return image
 
-    def write_to_i2c_oled(self, oled_id, image, callerid):
+    def write_to_i2c_oled(self, oled_id, image, callerid) -> bool:
         """Write a 1bit image to an OLED device"""
         oled_dev = self.oled_list[oled_id]
         device = oled_dev["device"]
         device_i2cbus_id = oled_dev["devid"]
 
-        if self._i2cbus.bus_lock(callerid):
-            self.oled_select(device_i2cbus_id)
-            device.display(image)
-            self._i2cbus.bus_unlock()
-        else:
-            debugging.info(f"Failed to grab lock for oled:{oled_id}")
-        return
+        # Queued on the i2c scheduler ; which selects the mux channel before the write
+        completed, __result = self._i2cbus.run(
+            f"oled{oled_id}",
+            device_i2cbus_id,
+            lambda: device.display(image),
+            utils_i2c.PRIORITY_DISPLAY,
+        )
+        if not completed:
+            debugging.info(f"i2c write timed out for oled:{oled_id} ({callerid})")
+        return completed
 
-    def update_oled_wind(self, oled_id, airportcode, counter):
-        """Draw WIND Info on designated OLED."""
-        # FIXME: Hardcoded data
+    def oled_display_changed(self, oled_id, display_key) -> bool:
+        """Is display_key different from what is currently shown on the OLED."""
+        return self._oled_display_key.get(oled_id) != display_key
+
+    def prepare_wind_frame(self, oled_id, airportcode):
+        """Return (display_key, image) for WIND Info ; image is None if the OLED already shows it."""
         airport_list = self._airport_database.get_airport_dict_led()
         if airportcode not in airport_list:
             debugging.debug(
                 f"Skipping OLED update {airportcode} not found in airport_list"
             )
-            return
+            return None, None
         airport_obj = airport_list[airportcode]
         if airport_obj is None:
             debugging.debug(f"Skipping OLED update {airportcode} lookup returns :None:")
-            return
+            return None, None
+        runway_wind = airport_obj.runway_wind()
         windspeed = airport_obj.wx_windspeed()
-        winddir = airport_obj.winddir_degrees()
+        winddir = runway_wind["wind_dir"]
         best_runway_label = airport_obj.best_runway()
         best_runway_deg = airport_obj.best_runway_deg()
         best_runway_width = airport_obj.best_runway_width()
+        crosswind = None
+        if 0 <= runway_wind["best"] < len(runway_wind["runways"]):
+            crosswind = runway_wind["runways"][runway_wind["best"]]["crosswind"]
 
-        if (winddir is not None) and (best_runway_label is not None):
-            debugging.debug(
-                f"Updating OLED Wind: {airportcode} : rwy: {best_runway_label} : wind {winddir}"
+        oled_size = self.oled_list[oled_id]["size"]
+
+        if (winddir is None) or (best_runway_label is None):
+            display_key = ("nowx", airportcode)
+            if not self.oled_display_changed(oled_id, display_key):
+                return display_key, None
+            # FIXME: self.generate_nowx_image(oled_id, airportcode, best_runway, winddir, windspeed)
+            debugging.info(
+                f"NOT Updating OLED: {airportcode} : rwy: {best_runway_label} : wind {winddir}"
             )
-            # TODO: counter % 100 is a temporary hack; need a triggered refresh mechanism
-            if (counter % 100 == 0) or (airportcode not in self._image_cache):
-                # Don't re-render wind image every time
-                self._image_cache[airportcode] = self.render_wind_image(
+            return display_key, self.render_nowx_image(oled_id, airportcode)
+
+        display_key = (
+            "wind",
+            airportcode,
+            oled_size["w"],
+            oled_size["h"],
+            best_runway_label,
+            best_runway_deg,
+            best_runway_width,
+            winddir,
+            windspeed,
+            crosswind,
+        )
+        if not self.oled_display_changed(oled_id, display_key):
+            return display_key, None
+        debugging.debug(
+            f"Updating OLED Wind: {airportcode} : rwy: {best_runway_label} : wind {winddir}"
+        )
+        # Only re-render when something shown on the display has changed
+        cached_image = self._image_cache.get(airportcode)
+        if (cached_image is None) or (cached_image[0] != display_key):
+            cached_image = (
+                display_key,
+                self.render_wind_image(
                     oled_id,
                     airportcode,
                     best_runway_label,
@@ -602,34 +645,14 @@ class UpdateOLEDs:
                     best_runway_width,
                     winddir,
                     windspeed,
-                )
-            self.write_to_i2c_oled(oled_id, self._image_cache[airportcode], "oled_wind")
-            # self.generate_image(
-            #    oled_id,
-            #    airportcode,
-            #    best_runway_label,
-            #    best_runway_deg,
-            #    best_runway_width,
-            #    winddir,
-            #    windspeed,
-            # )
-        else:
-            self.draw_nowx(
-                oled_id,
-                airportcode,
-                best_runway_label,
-                best_runway_deg,
-                winddir,
-                windspeed,
+                    crosswind,
+                ),
             )
-            # FIXME: self.generate_nowx_image(oled_id, airportcode, best_runway, winddir, windspeed)
-            debugging.info(
-                f"NOT Updating OLED: {airportcode} : rwy: {best_runway_label} : wind {winddir}"
-            )
-        return
+            self._image_cache[airportcode] = cached_image
+        return display_key, cached_image[1]
 
-    def update_oled_status(self, oled_id, counter):
-        """Status Update Display."""
+    def prepare_status_frame(self, oled_id):
+        """Return (display_key, image) for Status ; image is None if the OLED already shows it."""
         metarage = utils.time_format_hm(self._airport_database.get_metar_update_time())
         currtime = utils.time_format_hm(utils.current_time(self._app_conf))
         info_timestamp = f"tm:{currtime} metar:{metarage}"
@@ -638,63 +661,159 @@ class UpdateOLEDs:
         else:
             info_internet = "N"
         info_ipaddr = f"ip:{self._sysdata.local_ip()} inet:{info_internet}"
-        info_uptime = f"up:{self._sysdata.uptime()} "
+        # Uptime to the minute ; so the display only changes once a minute
+        uptime = self._sysdata.uptime()
+        if uptime is not None:
+            uptime_hours, uptime_mins = divmod(uptime.seconds // 60, 60)
+            info_uptime = f"up:{uptime.days}d {uptime_hours}:{uptime_mins:02} "
+        else:
+            info_uptime = "up:- "
         info_lightlevel = f"brt:{self._led_mgmt.get_brightness_level()}%"
 
-        activity_char = self.ACTIVITY[counter % len(self.ACTIVITY)]
+        display_key = (
+            "status",
+            info_timestamp,
+            info_ipaddr,
+            info_uptime,
+            info_lightlevel,
+        )
+        if not self.oled_display_changed(oled_id, display_key):
+            return display_key, None
+
+        # Activity indicator moves each time the status display is redrawn
+        self._status_render_count += 1
+        activity_char = self.ACTIVITY[self._status_render_count % len(self.ACTIVITY)]
 
         oled_status_text = f"{info_timestamp}\n{info_ipaddr}\n{info_uptime}\n{activity_char} {info_lightlevel}"
-        # Update OLED
-        image = self.render_text_image(oled_id, oled_status_text)
-        self.write_to_i2c_oled(oled_id, image, "oled_status")
-        # self.oled_text(oled_id, oled_status_text)
-        # Update saved image
         # self.generate_info_image(oled_id)
-
-    def get_next_airport(self, metar_iter):
-        """Get the next airport to be displayed on OLED display in rotation"""
-        max_index = len(self._oled_metar_airports)
-        airport_code = self._oled_metar_airports[metar_iter % max_index]
-        airport_obj = self._airport_database.get_airport(airport_code)
-        return airport_obj
+        return display_key, self.render_text_image(oled_id, oled_status_text)
+
+    def build_panel_plans(self):
+        """Create the refresh plan for each active OLED.
+
+        Optional per panel settings in oled_conf.json ;
+          "cadence"  - seconds between refreshes (default 5)
+          "airports" - rotation list for metar panels (default: the shared "metar" list)
+        Panels sharing the default list start at different offsets in it, so
+        each panel shows a different airport.
+        """
+        panel_plans = []
+        metar_panel_count = 0
+        for oled_id in range(0, self._device_count):
+            oled_dev = self.oled_list[oled_id]
+            if oled_dev["active"] is False:
+                continue
+            oled_conf = self._oled_device_config.get(f"{oled_id}", {})
+            purpose = oled_conf.get("purpose")
+            if purpose not in ("info", "metar"):
+                continue
+            cadence = self.OLED_DEFAULT_CADENCE
+            if "cadence" in oled_conf:
+                cadence_valid, cadence_value = utils.str2int(oled_conf["cadence"])
+                if cadence_valid and cadence_value > 0:
+                    cadence = cadence_value
+            rotation = []
+            rotation_position = 0
+            if purpose == "metar":
+                rotation = oled_conf.get("airports") or self._oled_metar_airports
+                if not oled_conf.get("airports"):
+                    rotation_position = metar_panel_count
+                metar_panel_count += 1
+            panel_plans.append(
+                {
+                    "oled_id": oled_id,
+                    "purpose": purpose,
+                    "cadence": cadence,
+                    "rotation": [airport.lower() for airport in rotation],
+                    "position": rotation_position,
+                    "next_due": 0,
+                }
+            )
+        debugging.info(f"OLED: panel plans {panel_plans}")
+        return panel_plans
+
+    def prepare_panel_frame(self, panel_plan):
+        """Render the next frame for a panel ; returns (display_key, image)."""
+        if panel_plan["purpose"] == "info":
+            return self.prepare_status_frame(panel_plan["oled_id"])
+        rotation = panel_plan["rotation"]
+        if not rotation:
+            return None, None
+        airportcode = rotation[panel_plan["position"] % len(rotation)]
+        panel_plan["position"] += 1
+        return self.prepare_wind_frame(panel_plan["oled_id"], airportcode)
+
+    def push_frames(self, frames):
+        """Push rendered frames to their OLEDs ; only the bus writes are serialized."""
+        pending = []
+        for oled_id, display_key, image in frames:
+            oled_dev = self.oled_list[oled_id]
+            transaction = self._i2cbus.submit(
+                f"oled{oled_id}",
+                oled_dev["devid"],
+                lambda device=oled_dev["device"], image=image: device.display(image),
+                utils_i2c.PRIORITY_DISPLAY,
+            )
+            pending.append((oled_id, display_key, transaction))
+        for oled_id, display_key, transaction in pending:
+            if not transaction.wait(self.OLED_PUSH_TIMEOUT):
+                transaction.cancel()
+                debugging.info(f"i2c write timed out for oled:{oled_id}")
+            elif transaction.failed():
+                debugging.info(f"i2c write failed for oled:{oled_id}")
+            else:
+                self._oled_display_key[oled_id] = display_key
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        panel_plans = [
+            f"{panel_plan['oled_id']}:{panel_plan['purpose']}/{panel_plan['cadence']}s"
+            for panel_plan in self._panel_plans
+        ]
+        render_avg = 0.0
+        if self._render_count > 0:
+            render_avg = self._render_time_total / self._render_count * 1000
+        return (
+            f"OLED Stats:\n\tdevices: {self._device_count}"
+            f"\n\trender count: {self._render_count}"
+            f"\n\trender avg: {render_avg:.2f}ms max: {self._render_time_max * 1000:.2f}ms"
+            f"\n\tsprite atlas sizes: {list(self._sprite_atlas.keys())}"
+            f"\n\tpanel plans: {panel_plans}"
+        )
 
     def update_loop(self):
         """Continuous Loop for Thread."""
         debugging.debug("OLED: Entering Update Loop")
         outerloop = True  # Set to TRUE for infinite outerloop
         count = 0
-        update_oled_flag = False
 
-        oled_update_frequency = 180  # Every 3 minutes
-        oled_loop_interval = 5
-        oled_loop_per_interval = int(oled_update_frequency / oled_loop_interval)
-        #
-        metar_iter = 0
+        oled_update_frequency = 180  # Log every 3 minutes
+        last_update_log = 0
+        self._panel_plans = self.build_panel_plans()
+        panel_plans = self._panel_plans
         while outerloop:
             count += 1
-            update_oled_flag = (count % oled_loop_per_interval) == 1
-            if update_oled_flag:
+            loop_time = time.time()
+            if loop_time - last_update_log >= oled_update_frequency:
+                last_update_log = loop_time
                 debugging.info(
-                    f"OLED: Updating {self._device_count} OLEDs (loopcount: {count})"
+                    f"OLED: Updating {len(panel_plans)} OLEDs (loopcount: {count})"
                 )
 
-            for oled_id in range(0, self._device_count):
-                oled_dev = self.oled_list[oled_id]
-                if oled_dev["active"] is False:
+            # Render every due panel first ; then push the frames over i2c together
+            frames = []
+            for panel_plan in panel_plans:
+                if panel_plan["next_due"] > loop_time:
                     continue
-                purpose = self._oled_device_config[f"{oled_id}"]["purpose"]
-                if purpose is None:
-                    continue
-                if purpose == "info":
-                    self.update_oled_status(oled_id, count)
-                if purpose == "metar":
-                    metar_iter += 1
-                    airport_obj = self.get_next_airport(metar_iter)
-                    if airport_obj is None:
-                        continue
-                    self.update_oled_wind(
-                        oled_id,
-                        airport_obj.icao_code(),
-                        count,
-                    )
-            time.sleep(oled_loop_interval)
+                panel_plan["next_due"] = loop_time + panel_plan["cadence"]
+                display_key, image = self.prepare_panel_frame(panel_plan)
+                if image is not None:
+                    frames.append((panel_plan["oled_id"], display_key, image))
+            if frames:
+                self.push_frames(frames)
+
+            next_due = min(
+                (panel_plan["next_due"] for panel_plan in panel_plans),
+                default=time.time() + self.OLED_DEFAULT_CADENCE,
+            )
+            time.sleep(max(next_due - time.time(), 0.1))
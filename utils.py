@@ -24,6 +24,21 @@ import requests
 import pytz
 
 import debugging
+import utils_clock
+import utils_metrics
+
+DATASET_CHECK_TIME = utils_metrics.histogram(
+    "livemap_dataset_check_seconds", "Dataset freshness (HEAD) check time", ("dataset",)
+)
+DATASET_FETCH_TIME = utils_metrics.histogram(
+    "livemap_dataset_fetch_seconds", "Dataset download time", ("dataset",)
+)
+DATASET_BYTES = utils_metrics.counter(
+    "livemap_dataset_bytes_total", "Dataset bytes downloaded", ("dataset",)
+)
+DATASET_ERRORS = utils_metrics.counter(
+    "livemap_dataset_errors_total", "Dataset check / download failures", ("dataset",)
+)
 
 
 def file_exists(filename):
@@ -179,6 +194,8 @@ def download_newer_file(session, url, filename, decompress=False, etag=None):
     debugging.debug("Starting download_newer_file" + filename)
     url_time = url_date = url_etag = None
     download = False
+    dataset_labels = (os.path.basename(filename),)
+    check_start = time.perf_counter()
 
     # Do a HTTP GET to pull headers so we can check timestamps
     try:
@@ -186,16 +203,21 @@ def download_newer_file(session, url, filename, decompress=False, etag=None):
     except ConnectionError as err:
         debugging.debug(f"Connection Error :{url}:")
         debugging.error(err)
+        DATASET_ERRORS.inc(1, dataset_labels)
         return False, url_etag
     except TimeoutError as err:
         debugging.debug(f"Timeout Error :{url}:")
         debugging.error(err)
+        DATASET_ERRORS.inc(1, dataset_labels)
         return False, url_etag
     except Exception as err:
         debugging.debug(f"Generic error checking HEAD :{url}:")
         debugging.error(err)
+        DATASET_ERRORS.inc(1, dataset_labels)
         return False, url_etag
 
+    DATASET_CHECK_TIME.observe(time.perf_counter() - check_start, dataset_labels)
+
     if "last-modified" in req.headers:
         url_time = req.headers["last-modified"]
         url_date = parsedate(url_time)
@@ -233,18 +255,26 @@ def download_newer_file(session, url, filename, decompress=False, etag=None):
             # Download file to temporary object
             download_object = tempfile.NamedTemporaryFile(delete=False)
             try:
+                fetch_start = time.perf_counter()
                 urllib.request.urlretrieve(url, download_object.name)
+                DATASET_FETCH_TIME.observe(
+                    time.perf_counter() - fetch_start, dataset_labels
+                )
+                DATASET_BYTES.inc(os.path.getsize(download_object.name), dataset_labels)
             except ConnectionError as err:
                 debugging.info(f"Connection error in download :{url}:")
                 debugging.error(err)
+                DATASET_ERRORS.inc(1, dataset_labels)
                 return False, url_etag
             except TimeoutError as err:
                 debugging.info(f"Timeout Error :{url}:")
                 debugging.error(err)
+                DATASET_ERRORS.inc(1, dataset_labels)
                 return False, url_etag
             except Exception as err:
                 debugging.info(f"Generic error in urlretrieve :{url}:")
                 debugging.error(err)
+                DATASET_ERRORS.inc(1, dataset_labels)
                 return False, url_etag
 
             if decompress:
@@ -269,6 +299,7 @@ def download_newer_file(session, url, filename, decompress=False, etag=None):
             return download, url_etag
         except Exception as err:
             debugging.error(err)
+            DATASET_ERRORS.inc(1, dataset_labels)
             return False, url_etag
     return download, url_etag
 
@@ -308,7 +339,7 @@ def reboot_if_time(app_conf):
     use_reboot = app_conf.get_bool("default", "nightly_reboot")
     reboot_time = app_conf.get_string("default", "nightly_reboot_hr")
     if use_reboot:
-        now = datetime.datetime.now()
+        now = utils_clock.now()
         rb_time = now.strftime("%H:%M")
         debugging.debug(
             "**Current Time=" + str(rb_time) + " - **Reboot Time=" + str(reboot_time)
@@ -359,25 +390,23 @@ def time_format(raw_time):
 
 def current_time_hr_utc(app_conf):
     """Get current HR in UTC."""
-    curr_time = datetime.datetime.now(pytz.utc)
+    curr_time = utils_clock.now(pytz.utc)
     return int(curr_time.strftime("%H"))
 
 
 def current_time_utc(app_conf):
     """Get time in UTC."""
-    return datetime.datetime.now(pytz.utc)
+    return utils_clock.now(pytz.utc)
 
 
 def current_time_utc_plus_hr(app_conf, hour_interval):
     """Get time in UTC."""
-    return datetime.datetime.now(pytz.utc) + datetime.timedelta(hours=hour_interval)
+    return utils_clock.now(pytz.utc) + datetime.timedelta(hours=hour_interval)
 
 
 def current_time(app_conf):
     """Get time Now."""
-    return datetime.datetime.now(
-        pytz.timezone(app_conf.get_string("default", "timezone"))
-    )
+    return utils_clock.now(app_conf.snapshot().default.tzinfo)
 
 
 def set_timezone(app_conf, newtimezone):
@@ -389,7 +418,7 @@ def set_timezone(app_conf, newtimezone):
 
 def get_timezone(app_conf):
     """Return timezone configuration."""
-    return app_conf.get_string("default", "timezone")
+    return app_conf.snapshot().default.timezone
 
 
 def version_newer(version_cur, version_new) -> bool:
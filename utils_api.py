@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*- #
+
+"""Pre-serialized airport snapshots for the JSON API.
+
+The decoded state of every tracked airport is serialized once per data
+version (AirportDB airport set version + wx version). Responses for a given
+field selection and encoding are cached until the version changes, so
+polling clients cost a dict lookup and an ETag comparison.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import threading
+from datetime import timezone
+
+import debugging
+import utils_clock
+import utils_metrics
+
+AIRPORT_FIELDS = (
+    "icao",
+    "led_index",
+    "purpose",
+    "active",
+    "latitude",
+    "longitude",
+    "flightcategory",
+    "metar",
+    "observation_time",
+    "wxsrc",
+    "fallback_station",
+    "wind_dir",
+    "wind_speed",
+    "wind_gust",
+    "wx_conditions",
+    "best_runway",
+    "headwind",
+    "crosswind",
+    "heatmap_index",
+)
+
+# Limit on cached (fields, encoding) response variants per data version
+MAX_VARIANTS = 32
+
+
+def _json_number(value):
+    """Return value rounded for JSON ; None for missing / NaN values."""
+    if value is None:
+        return None
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return round(value, 1)
+
+
+def airport_record(airport_obj) -> dict:
+    """Return dict of the decoded state of an airport ; keys are AIRPORT_FIELDS."""
+    observation_time = airport_obj.observation_time()
+    if observation_time is not None:
+        observation_time = observation_time.isoformat()
+    headwind, crosswind = airport_obj.best_runway_wind()
+    wind_speed = airport_obj.wx_windspeed()
+    return {
+        "icao": airport_obj.icao_code(),
+        "led_index": airport_obj.get_led_index(),
+        "purpose": airport_obj.purpose(),
+        "active": bool(airport_obj.active()),
+        "latitude": airport_obj.latitude(),
+        "longitude": airport_obj.longitude(),
+        "flightcategory": airport_obj.flightcategory(),
+        "metar": airport_obj.raw_metar(),
+        "observation_time": observation_time,
+        "wxsrc": airport_obj.wxsrc(),
+        "fallback_station": airport_obj.fallback_station(),
+        "wind_dir": airport_obj.winddir_degrees(),
+        "wind_speed": None if wind_speed < 0 else wind_speed,
+        "wind_gust": airport_obj.wx_windgust(),
+        "wx_conditions": airport_obj.wxconditions_str(),
+        "best_runway": airport_obj.best_runway(),
+        "headwind": _json_number(headwind),
+        "crosswind": _json_number(crosswind),
+        "heatmap_index": airport_obj.heatmap_index(),
+    }
+
+
+class AirportSnapshot:
+    """Serialized airport data, cached per data version, field selection and encoding."""
+
+    _airport_database = None
+    _version = None
+    _records = []
+    _generated = None
+    _variants = {}
+    _build_count = 0
+    _lock = None
+
+    def __init__(self, airport_database):
+        """Create snapshot cache for an AirportDB."""
+        self._airport_database = airport_database
+        self._version = None
+        self._records = []
+        self._generated = None
+        self._variants = {}
+        self._build_count = 0
+        self._lock = threading.Lock()
+
+    def version(self):
+        """Return current data version ; (airport set version, wx version)."""
+        return (
+            self._airport_database.airport_set_version(),
+            self._airport_database.wx_version(),
+        )
+
+    def refresh(self, version):
+        """Rebuild airport records for version ; called with the lock held."""
+        records = []
+        for icao in sorted(self._airport_database.tracked_airports()):
+            try:
+                records.append(airport_record(self._airport_database.get_airport(icao)))
+            except Exception as err:
+                debugging.error(f"API snapshot skipping {icao}: ERR:{err}")
+        self._records = records
+        self._generated = utils_clock.now(timezone.utc).isoformat()
+        self._version = version
+        self._variants = {}
+        self._build_count += 1
+
+    def response(self, fields=None, use_gzip=False):
+        """Return (etag, body bytes) for the airport list.
+
+        fields is a tuple of AIRPORT_FIELDS to include ; None for all fields.
+        The body is gzip compressed when use_gzip is True.
+        """
+        version = self.version()
+        variant_key = (fields, use_gzip)
+        with self._lock:
+            if version != self._version:
+                self.refresh(version)
+            variant = self._variants.get(variant_key)
+            utils_metrics.cache_result("api_airports", variant is not None)
+            if variant is not None:
+                return variant
+            records = self._records
+            if fields is not None:
+                records = [
+                    {field: record[field] for field in fields} for record in records
+                ]
+            body = json.dumps(
+                {
+                    "version": list(version),
+                    "generated": self._generated,
+                    "count": len(records),
+                    "airports": records,
+                },
+                separators=(",", ":"),
+            ).encode("utf-8")
+            etag = hashlib.sha1(body).hexdigest()[:20]
+            if use_gzip:
+                body = gzip.compress(body, compresslevel=6)
+                etag = f"{etag}-gz"
+            if len(self._variants) >= MAX_VARIANTS:
+                self._variants = {}
+            self._variants[variant_key] = (etag, body)
+            return etag, body
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        return (
+            f"API Snapshot Stats:\n\tbuilds: {self._build_count}"
+            f"\n\tversion: {self._version}\n\tairports: {len(self._records)}"
+            f"\n\tcached variants: {len(self._variants)}"
+        )
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*- #
+
+"""Application clock.
+
+Time dependent code asks this module for the current time instead of reading
+the wall clock, so the whole pipeline can be run against simulated time :
+
+    replay_clock = utils_clock.ReplayClock(start_time)
+    utils_clock.set_clock(replay_clock)
+    replay_clock.advance(300)
+
+The default SystemClock reads the wall clock. Elapsed time measurements
+(render times, timeouts, sleeps) keep using time.time() / time.perf_counter().
+"""
+
+import datetime
+import threading
+
+
+class SystemClock:
+    """Wall clock."""
+
+    def now(self, tz=None):
+        """Return current time ; same as datetime.now(tz)."""
+        return datetime.datetime.now(tz)
+
+
+class ReplayClock:
+    """Simulated clock ; only moves when set_time() or advance() are called."""
+
+    _current_time = None
+    _lock = None
+
+    def __init__(self, start_time):
+        """Create clock at start_time ; a naive start_time is taken as UTC."""
+        self._lock = threading.Lock()
+        self._current_time = None
+        self.set_time(start_time)
+
+    def now(self, tz=None):
+        """Return simulated time ; naive local time when tz is None, like datetime.now()."""
+        with self._lock:
+            current_time = self._current_time
+        if tz is None:
+            return current_time.astimezone().replace(tzinfo=None)
+        return current_time.astimezone(tz)
+
+    def set_time(self, new_time):
+        """Move clock to new_time ; a naive new_time is taken as UTC."""
+        if new_time.tzinfo is None:
+            new_time = new_time.replace(tzinfo=datetime.timezone.utc)
+        with self._lock:
+            self._current_time = new_time.astimezone(datetime.timezone.utc)
+
+    def advance(self, seconds):
+        """Move clock forward by seconds."""
+        with self._lock:
+            self._current_time += datetime.timedelta(seconds=seconds)
+
+
+_clock = SystemClock()
+
+
+def set_clock(new_clock):
+    """Replace the application clock ; returns the previous clock."""
+    global _clock
+    previous_clock = _clock
+    _clock = new_clock
+    return previous_clock
+
+
+def clock():
+    """Return the application clock."""
+    return _clock
+
+
+def now(tz=None):
+    """Return current application time ; same as datetime.now(tz) unless replaying."""
+    return _clock.now(tz)
+
+
+def timestamp() -> float:
+    """Return current application time in epoch seconds ; same as time.time() unless replaying."""
+    return _clock.now(datetime.timezone.utc).timestamp()
@@ -71,7 +71,7 @@ def hexcode(red_value, green_value, blue_value):
 
 def rgb2hex(rgb):
     """Convert RGB to HEX."""
-    debugging.dprint(rgb)
+    debugging.debug("rgb2hex: %s", rgb)
     (red, grn, blu) = rgb
     # hexval = "#%02x%02x%02x" % (red_value, green_value, blue_value)
     hexval = f"#{red:02x}{grn:02x}{blu:02x}"
@@ -86,67 +86,67 @@ def rgb_color(value):
 
 def cat_vfr(confdata):
     """Get VFR Color code from config."""
-    return confdata.color("color_vfr")
+    return confdata.snapshot().colors.color_vfr
 
 
 def cat_mvfr(confdata):
     """Get MVFR Color code from config."""
-    return confdata.color("color_mvfr")
+    return confdata.snapshot().colors.color_mvfr
 
 
 def cat_ifr(confdata):
     """Get IFR Color code from config."""
-    return confdata.color("color_ifr")
+    return confdata.snapshot().colors.color_ifr
 
 
 def cat_lifr(confdata):
     """Get LIFR Color code from config."""
-    return confdata.color("color_lifr")
+    return confdata.snapshot().colors.color_lifr
 
 
 def wx_lightning(confdata):
     """Get Lightning Color code from config."""
-    return confdata.color("color_lghtn")
+    return confdata.snapshot().colors.color_lghtn
 
 
 def wx_snow(confdata, value):
     """Get SNOW Color code from config."""
     if value == 1:
-        return confdata.color("color_snow1")
-    return confdata.color("color_snow2")
+        return confdata.snapshot().colors.color_snow1
+    return confdata.snapshot().colors.color_snow2
 
 
 def wx_frzrain(confdata, value):
     """Get Freezing Rain Color code from config."""
     if value == 1:
-        return confdata.color("color_frrain1")
-    return confdata.color("color_frrain2")
+        return confdata.snapshot().colors.color_frrain1
+    return confdata.snapshot().colors.color_frrain2
 
 
 def wx_dust_sand_ash(confdata, value):
     """Get Dust Sand Ash Color (1) code from config."""
     if value == 1:
-        return confdata.color("color_dustsandash1")
-    return confdata.color("color_dustsandash2")
+        return confdata.snapshot().colors.color_dustsandash1
+    return confdata.snapshot().colors.color_dustsandash2
 
 
 def wx_fog(confdata, value):
     """Get FOG Color code from config."""
     if value == 1:
-        return confdata.color("color_fog1")
-    return confdata.color("color_fog2")
+        return confdata.snapshot().colors.color_fog1
+    return confdata.snapshot().colors.color_fog2
 
 
 def wx_rain(confdata, value):
     """Get RAIN Color code from config."""
     if value == 1:
-        return confdata.color("color_rain1")
-    return confdata.color("color_rain2")
+        return confdata.snapshot().colors.color_rain1
+    return confdata.snapshot().colors.color_rain2
 
 
 def wx_noweather(confdata):
     """Get NOWX Color code from config."""
-    return confdata.color("color_nowx")
+    return confdata.snapshot().colors.color_nowx
 
 
 # Generate random RGB color
@@ -161,18 +161,18 @@ def randomcolor():
 def flightcategory_color(confdata, flightcategory):
     """Convert Flight Category to color"""
     if flightcategory is None:
-        loc_color = confdata.cache["color_nowx"]
+        loc_color = confdata.snapshot().colors.color_nowx
         return
 
     flightcategory = flightcategory.upper()
     if flightcategory == "VFR":
-        loc_color = confdata.cache["color_vfr"]
+        loc_color = confdata.snapshot().colors.color_vfr
     elif flightcategory == "MVFR":
-        loc_color = confdata.cache["color_mvfr"]
+        loc_color = confdata.snapshot().colors.color_mvfr
     elif flightcategory == "IFR":
-        loc_color = confdata.cache["color_ifr"]
+        loc_color = confdata.snapshot().colors.color_ifr
     elif flightcategory == "LIFR":
-        loc_color = confdata.cache["color_lifr"]
+        loc_color = confdata.snapshot().colors.color_lifr
     else:
-        loc_color = confdata.cache["color_nowx"]
+        loc_color = confdata.snapshot().colors.color_nowx
     return loc_color
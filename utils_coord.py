@@ -141,29 +141,16 @@ def circle_triangles(radius, step, center_lon, center_lat):
 
 
 def airport_boundary_calc(airport_database):
-    """Scan airport lat/lon data and work out Airport Map boundaries."""
-    max_lon = None
-    min_lon = None
-    max_lat = None
-    min_lat = None
-    airports = airport_database.get_airport_dict_led()
-    for icao, airport_obj in airports.items():
-        if not airport_obj.active():
-            continue
-        if not airport_obj.valid_coordinates():
-            continue
-        lon = airport_obj.longitude()
-        lat = airport_obj.latitude()
-        if max_lon is None:
-            max_lon = lon
-        if min_lon is None:
-            min_lon = lon
-        if max_lat is None:
-            max_lat = lat
-        if min_lat is None:
-            min_lat = lat
-        max_lon = max(max_lon, lon)
-        min_lon = min(min_lon, lon)
-        max_lat = max(max_lat, lat)
-        min_lat = min(min_lat, lat)
-    return max_lon, min_lon, max_lat, min_lat
+    """Return LED Airport Map boundaries ; max_lon, min_lon, max_lat, min_lat."""
+    return airport_database.led_geo_index().bounds()
+
+
+def distance_nm(lon_1, lat_1, lon_2, lat_2):
+    """Great circle distance between two points in nautical miles."""
+    lon_1, lat_1, lon_2, lat_2 = map(math.radians, (lon_1, lat_1, lon_2, lat_2))
+    hav = (
+        math.sin((lat_2 - lat_1) / 2) ** 2
+        + math.cos(lat_1) * math.cos(lat_2) * math.sin((lon_2 - lon_1) / 2) ** 2
+    )
+    # Mean earth radius in nautical miles
+    return 2 * 3440.065 * math.asin(min(1.0, math.sqrt(hav)))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*- #
+
+"""Event hub for Server-Sent Events.
+
+Producers publish small JSON deltas ; each event is serialized once into its
+SSE wire format and kept in a bounded history. Clients block on a shared
+condition until an event newer than the last one they saw arrives, so any
+number of browser tabs can follow the stream without per client polling.
+"""
+
+import json
+import threading
+from collections import deque
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+
+
+def sse_format(event_id, event_type, data_json) -> str:
+    """Return event in SSE wire format."""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data_json}\n\n"
+
+
+class EventHub:
+    """Bounded history of published events, with blocking reads for SSE clients."""
+
+    _events = None
+    _last_id = 0
+    _condition = None
+    _publish_count = 0
+
+    def __init__(self, history=256):
+        """Create event hub keeping the last history events."""
+        self._events = deque(maxlen=history)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self._publish_count = 0
+
+    def publish(self, event_type, data):
+        """Publish event to all clients ; data must be JSON serializable."""
+        data_json = json.dumps(data, separators=(",", ":"))
+        with self._condition:
+            self._last_id += 1
+            self._events.append(
+                (self._last_id, sse_format(self._last_id, event_type, data_json))
+            )
+            self._publish_count += 1
+            self._condition.notify_all()
+
+    def last_id(self) -> int:
+        """Return id of the most recent event."""
+        return self._last_id
+
+    def events_since(self, event_id, timeout=KEEPALIVE_INTERVAL):
+        """Wait for events newer than event_id ; returns (events, missed).
+
+        events is a list of (id, sse_text) ; missed is True when events after
+        event_id have already dropped out of the history.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > event_id, timeout)
+            events = [event for event in self._events if event[0] > event_id]
+            missed = bool(events) and events[0][0] > event_id + 1
+            return events, missed
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        return (
+            f"Event Hub Stats:\n\tevents published: {self._publish_count}"
+            f"\n\tlast id: {self._last_id}"
+        )
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*- #
+
+"""Layered LED framebuffer used by the LED modes.
+
+The framebuffer holds one uint8 RGB row per LED, split into layers;
+  base    - flight category / weather effect / mode colors
+  overlay - homeport highlight that overrides the base color
+
+LED modes render into the layers using index arrays and masks rather than
+building a {led_index: hexcolor} dict for every frame, and the strip writer
+consumes the composited frame directly as packed 24bit pixel values.
+"""
+
+import numpy as np
+
+import utils_colors
+
+
+class LedFrameBuffer:
+    """Layered RGB framebuffer for an LED strip."""
+
+    _led_count = 0
+
+    _base = None
+    _overlay = None
+    _overlay_mask = None
+
+    _color_cache = {}
+
+    def __init__(self, led_count):
+        """Allocate framebuffer layers."""
+        self._led_count = led_count
+        self._base = np.zeros((led_count, 3), dtype=np.uint8)
+        self._overlay = np.zeros((led_count, 3), dtype=np.uint8)
+        self._overlay_mask = np.zeros(led_count, dtype=bool)
+        self._color_cache = {}
+
+    def led_count(self) -> int:
+        """Return number of LEDs in the framebuffer."""
+        return self._led_count
+
+    def rgb(self, color):
+        """Return (r, g, b) for a hex color string or rgb tuple ; cached."""
+        if isinstance(color, (tuple, list)):
+            return (int(color[0]), int(color[1]), int(color[2]))
+        rgb_value = self._color_cache.get(color)
+        if rgb_value is None:
+            rgb_value = utils_colors.rgb_color(color)
+            self._color_cache[color] = rgb_value
+        return rgb_value
+
+    def _indexes(self, leds):
+        """Return LED positions as an index array, dropping anything off the strip."""
+        led_array = np.asarray(leds, dtype=np.intp).reshape(-1)
+        return led_array[(led_array >= 0) & (led_array < self._led_count)]
+
+    def clear(self):
+        """Reset all layers to off."""
+        self._base.fill(0)
+        self._overlay_mask.fill(False)
+
+    def fill(self, leds, color):
+        """Set base layer color for a set of LEDs."""
+        self._base[self._indexes(leds)] = self.rgb(color)
+
+    def fill_all(self, color):
+        """Set base layer color for every LED."""
+        self._base[:] = self.rgb(color)
+
+    def set_pixel(self, led_index, color):
+        """Set base layer color for a single LED."""
+        if 0 <= led_index < self._led_count:
+            self._base[led_index] = self.rgb(color)
+
+    def set_rgb(self, leds, rgb_array):
+        """Set base layer from an array of rgb values, one row per LED."""
+        led_array = np.asarray(leds, dtype=np.intp).reshape(-1)
+        valid = (led_array >= 0) & (led_array < self._led_count)
+        rgb_array = np.asarray(rgb_array).reshape(-1, 3)
+        self._base[led_array[valid]] = np.clip(rgb_array[valid], 0, 255)
+
+    def set_overlay(self, leds, color):
+        """Set overlay layer color for a set of LEDs."""
+        led_array = self._indexes(leds)
+        self._overlay[led_array] = self.rgb(color)
+        self._overlay_mask[led_array] = True
+
+    def composite(self):
+        """Return uint8[N,3] frame with all layers applied."""
+        return np.where(self._overlay_mask[:, None], self._overlay, self._base)
+
+    def pixel_data(self, swap_mask=None, null_mask=None):
+        """Return composited frame as packed 24bit pixel values for the strip.
+
+        swap_mask marks LEDs that need red and green exchanged (GRB vs RGB)
+        null_mask marks LEDs that must always be off
+        """
+        frame = self.composite().astype(np.uint32)
+        red = frame[:, 0]
+        grn = frame[:, 1]
+        blu = frame[:, 2]
+        if swap_mask is not None:
+            red, grn = np.where(swap_mask, grn, red), np.where(swap_mask, red, grn)
+        packed = (red << 16) | (grn << 8) | blu
+        if null_mask is not None:
+            packed[null_mask] = 0
+        return packed
+
+    def hexcolors(self):
+        """Return composited frame as a {led_index: hexcolor} dict ; for debugging."""
+        return {
+            led_index: f"#{red:02x}{grn:02x}{blu:02x}"
+            for led_index, (red, grn, blu) in enumerate(self.composite().tolist())
+        }
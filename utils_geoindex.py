@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*- #
+
+"""Spatial index over (lon, lat) points.
+
+Airports are bucketed into a uniform grid of cells so that radius, bounding
+box and nearest-N queries only look at nearby cells ; sector queries use
+precomputed angles from the index center. Bounds and center are cached.
+
+The index is only rebuilt when the set of points or their coordinates change.
+It is shared between the LED, web and update threads ; update() builds a new
+IndexData and publishes it in a single assignment, and every query works from
+the one IndexData it read at the start, so readers never need a lock.
+
+All distances are in degrees, matching the rest of utils_coord ; longitude is
+X and latitude is Y. nearest() can instead rank by local ground distance, with
+longitude scaled by cos(latitude) so a degree is 60nm in either direction.
+"""
+
+import math
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import debugging
+
+# Immutable contents of a GeoIndex ; replaced as a whole on every rebuild
+IndexData = namedtuple(
+    "IndexData",
+    [
+        "fingerprint",
+        "serial",
+        "keys",
+        "key_pos",
+        "lon",
+        "lat",
+        "angle",
+        "grid",
+        "bounds",
+        "center",
+    ],
+)
+
+
+class GeoIndex:
+    """Grid based spatial index over (lon, lat) points."""
+
+    _data = None
+    _update_lock = None
+    _cell_size = 1.0
+
+    def __init__(self, cell_size=1.0):
+        """Create empty index ; cell_size is grid cell size in degrees."""
+        self._cell_size = cell_size
+        self._update_lock = threading.Lock()
+        self._data = IndexData(
+            fingerprint=None,
+            serial=0,
+            keys=[],
+            key_pos={},
+            lon=np.zeros(0, dtype=float),
+            lat=np.zeros(0, dtype=float),
+            angle=np.zeros(0, dtype=float),
+            grid={},
+            bounds=(None, None, None, None),
+            center=(None, None),
+        )
+
+    def serial(self) -> int:
+        """Return counter that increments every time the index is rebuilt."""
+        return self._data.serial
+
+    def __len__(self):
+        return len(self._data.keys)
+
+    def keys(self) -> list:
+        """Return list of keys in index order."""
+        return self._data.keys
+
+    def lon(self):
+        """Return array of longitudes in index order."""
+        return self._data.lon
+
+    def lat(self):
+        """Return array of latitudes in index order."""
+        return self._data.lat
+
+    def position(self, key):
+        """Return (lon, lat) for key ; or None."""
+        data = self._data
+        pos = data.key_pos.get(key)
+        if pos is None:
+            return None
+        return (data.lon[pos], data.lat[pos])
+
+    def bounds(self):
+        """Return cached (max_lon, min_lon, max_lat, min_lat) ; None if index is empty."""
+        return self._data.bounds
+
+    def center(self):
+        """Return cached (lon, lat) center of the bounding box."""
+        return self._data.center
+
+    def _cell(self, lon, lat):
+        """Return grid cell for a position."""
+        return (
+            int(math.floor(lon / self._cell_size)),
+            int(math.floor(lat / self._cell_size)),
+        )
+
+    def update(self, points) -> bool:
+        """Rebuild index from iterable of (key, lon, lat) ; only if something changed."""
+        points = tuple((key, float(lon), float(lat)) for key, lon, lat in points)
+        with self._update_lock:
+            if points == self._data.fingerprint:
+                return False
+
+            keys = [point[0] for point in points]
+            key_pos = {key: pos for pos, key in enumerate(keys)}
+            lon_array = np.array([point[1] for point in points], dtype=float)
+            lat_array = np.array([point[2] for point in points], dtype=float)
+
+            grid = {}
+            for pos, (key, lon, lat) in enumerate(points):
+                grid.setdefault(self._cell(lon, lat), []).append(pos)
+
+            if len(points) > 0:
+                max_lon, min_lon = float(lon_array.max()), float(lon_array.min())
+                max_lat, min_lat = float(lat_array.max()), float(lat_array.min())
+                bounds = (max_lon, min_lon, max_lat, min_lat)
+                center = ((max_lon + min_lon) / 2, (max_lat + min_lat) / 2)
+                angle = (
+                    np.degrees(
+                        np.arctan2(lat_array - center[1], lon_array - center[0])
+                    )
+                    % 360
+                )
+            else:
+                bounds = (None, None, None, None)
+                center = (None, None)
+                angle = np.zeros(0, dtype=float)
+
+            # Publish the rebuilt index in one assignment
+            self._data = IndexData(
+                fingerprint=points,
+                serial=self._data.serial + 1,
+                keys=keys,
+                key_pos=key_pos,
+                lon=lon_array,
+                lat=lat_array,
+                angle=angle,
+                grid=grid,
+                bounds=bounds,
+                center=center,
+            )
+        debugging.debug(f"GeoIndex: rebuilt {len(keys)} points in {len(grid)} cells")
+        return True
+
+    def update_from_airports(self, airport_dict) -> bool:
+        """Rebuild index from a dict of Airport objects ; keyed by ICAO code."""
+        return self.update(
+            (icao, airport_obj.longitude(), airport_obj.latitude())
+            for icao, airport_obj in airport_dict.items()
+            if airport_obj.active() and airport_obj.valid_coordinates()
+        )
+
+    def _candidates(self, data, min_lon, min_lat, max_lon, max_lat):
+        """Return index positions of points in grid cells overlapping a bounding box."""
+        min_cell = self._cell(min_lon, min_lat)
+        max_cell = self._cell(max_lon, max_lat)
+        cell_count = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+        if cell_count >= len(data.grid):
+            # Cheaper to scan everything than walk the cells
+            return np.arange(len(data.keys))
+        positions = []
+        for cell_x in range(min_cell[0], max_cell[0] + 1):
+            for cell_y in range(min_cell[1], max_cell[1] + 1):
+                positions.extend(data.grid.get((cell_x, cell_y), ()))
+        return np.array(positions, dtype=np.intp)
+
+    def bbox(self, min_lon, min_lat, max_lon, max_lat) -> list:
+        """Return keys inside a bounding box."""
+        data = self._data
+        positions = self._candidates(data, min_lon, min_lat, max_lon, max_lat)
+        lon = data.lon[positions]
+        lat = data.lat[positions]
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return [data.keys[pos] for pos in positions[inside]]
+
+    def radius(self, lon, lat, radius) -> list:
+        """Return keys within radius of a point ; nearest first."""
+        data = self._data
+        positions = self._candidates(
+            data, lon - radius, lat - radius, lon + radius, lat + radius
+        )
+        distance = np.hypot(data.lon[positions] - lon, data.lat[positions] - lat)
+        inside = distance <= radius
+        order = np.argsort(distance[inside], kind="stable")
+        return [data.keys[pos] for pos in positions[inside][order]]
+
+    def sector(self, start_deg, end_deg, radius=None) -> list:
+        """Return keys between two angles (anticlockwise from east) around the index center."""
+        data = self._data
+        if len(data.keys) == 0:
+            return []
+        width = (end_deg - start_deg) % 360
+        if width == 0 and end_deg != start_deg:
+            width = 360
+        inside = ((data.angle - start_deg) % 360) < width
+        if radius is not None:
+            inside &= (
+                np.hypot(data.lon - data.center[0], data.lat - data.center[1])
+                <= radius
+            )
+        return [data.keys[pos] for pos in np.flatnonzero(inside)]
+
+    def angles(self):
+        """Return array of angles (anticlockwise from east) from the center, in index order."""
+        return self._data.angle
+
+    def nearest(self, lon, lat, count=1, max_distance=None, scale_lon=False) -> list:
+        """Return up to count (distance, key) tuples nearest to a point.
+
+        With scale_lon, longitude differences are scaled by cos(lat) ; distance
+        and max_distance are then in degrees of latitude (1/60 nm).
+        """
+        data = self._data
+        if len(data.keys) == 0:
+            return []
+        lon_scale = 1.0
+        if scale_lon:
+            lon_scale = max(math.cos(math.radians(lat)), 0.1)
+        # Search outwards ring by ring until enough points have been found,
+        # and the ring is wider than the furthest point found so far
+        search = self._cell_size
+        limit = max_distance
+        if limit is None:
+            (max_lon, min_lon, max_lat, min_lat) = data.bounds
+            limit = max(
+                abs(lon - min_lon),
+                abs(lon - max_lon),
+                abs(lat - min_lat),
+                abs(lat - max_lat),
+            )
+        while True:
+            lon_search = search / lon_scale
+            positions = self._candidates(
+                data, lon - lon_search, lat - search, lon + lon_search, lat + search
+            )
+            distance = np.hypot(
+                (data.lon[positions] - lon) * lon_scale, data.lat[positions] - lat
+            )
+            if max_distance is not None:
+                keep = distance <= max_distance
+                positions = positions[keep]
+                distance = distance[keep]
+            order = np.argsort(distance, kind="stable")[:count]
+            found = [(float(distance[pos]), data.keys[positions[pos]]) for pos in order]
+            # Points within "search" of the target are guaranteed to have been seen
+            if (len(found) >= count and found[-1][0] <= search) or search >= limit:
+                return found
+            search *= 2
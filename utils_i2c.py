@@ -16,6 +16,7 @@ i2c utils
 import time
 
 import threading
+from collections import deque
 
 import board
 from board import SCL, SDA
@@ -23,6 +24,17 @@ import busio
 
 import smbus2
 import debugging
+import utils_metrics
+
+I2C_WAIT_TIME = utils_metrics.histogram(
+    "livemap_i2c_wait_seconds", "Time from submit until a transaction runs", ("device",)
+)
+I2C_RUN_TIME = utils_metrics.histogram(
+    "livemap_i2c_run_seconds", "Time a transaction holds the bus", ("device",)
+)
+I2C_LOCK_WAIT_TIME = utils_metrics.histogram(
+    "livemap_i2c_lock_wait_seconds", "Time spent waiting in bus_lock"
+)
 
 
 # the channel for the mux board
@@ -42,6 +54,85 @@ I2C_ch = [
 ]
 
 
+# Transaction priorities ; lower value runs first
+PRIORITY_SENSOR = 0
+PRIORITY_DISPLAY = 10
+PRIORITY_BACKGROUND = 20
+
+
+class I2CTransaction:
+    """Unit of work queued for the I2C scheduler."""
+
+    _device = None
+    _channel = None
+    _func = None
+    _priority = PRIORITY_DISPLAY
+    _submit_time = None
+    _done = None
+    _cancelled = False
+    _result = None
+    _error = None
+
+    def __init__(self, device, channel, func, priority):
+        """Create transaction ; channel is the mux channel to select, or None."""
+        self._device = device
+        self._channel = channel
+        self._func = func
+        self._priority = priority
+        self._submit_time = time.time()
+        self._done = threading.Event()
+        self._cancelled = False
+        self._result = None
+        self._error = None
+
+    def device(self) -> str:
+        """Return name of the device the transaction is for."""
+        return self._device
+
+    def channel(self):
+        """Return mux channel ; None if no channel switch is needed."""
+        return self._channel
+
+    def priority(self) -> int:
+        """Return transaction priority."""
+        return self._priority
+
+    def submit_time(self) -> float:
+        """Return time the transaction was queued."""
+        return self._submit_time
+
+    def cancel(self):
+        """Skip the transaction if it has not started yet."""
+        self._cancelled = True
+
+    def cancelled(self) -> bool:
+        """Has the transaction been cancelled."""
+        return self._cancelled
+
+    def execute(self):
+        """Run the transaction ; called by the scheduler with the bus held."""
+        try:
+            self._result = self._func()
+        except Exception as err:
+            self._error = err
+        finally:
+            self._done.set()
+
+    def wait(self, timeout) -> bool:
+        """Wait for the transaction to complete."""
+        return self._done.wait(timeout)
+
+    def failed(self) -> bool:
+        """Did the transaction raise an exception."""
+        return self._error is not None
+
+    def result(self):
+        """Return result of the transaction ; re-raises any exception it raised."""
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
 class I2CBus:
     """Class to manage I2C Bus access."""
 
@@ -73,6 +164,18 @@ class I2CBus:
     # Channels that are always on
     always_enabled = 0x0
     current_enabled = 0x0
+    # Mux channel currently selected ; None if unknown
+    _mux_channel = None
+    _mux_switch_count = 0
+    _mux_skip_count = 0
+
+    # Scheduler ; one FIFO queue per device, served by priority then round robin
+    _scheduler_running = False
+    _queue_condition = None
+    _device_queues = {}
+    _device_served = {}
+    _serve_counter = 0
+    _device_stats = {}
 
     # Stats
     _average__lock_count = 0
@@ -87,6 +190,15 @@ class I2CBus:
         """Do setup for i2c bus - look for default hardware."""
         self._app_conf = app_conf
         self.lock = threading.Lock()
+        self._mux_channel = None
+        self._mux_switch_count = 0
+        self._mux_skip_count = 0
+        self._scheduler_running = False
+        self._queue_condition = threading.Condition()
+        self._device_queues = {}
+        self._device_served = {}
+        self._serve_counter = 0
+        self._device_stats = {}
         try:
             self.bus = smbus2.SMBus(self.rpi_bus_number)
         except IOError:
@@ -104,18 +216,119 @@ class I2CBus:
         self._lock_count = 0
 
     def select(self, channel_id):
-        """Enable MUX."""
+        """Enable MUX channel ; skipped if the channel is already selected."""
         result = False
         if self.bus is None:
             return
         if self.mux_active:
-            if self.i2c_exists(self.MUX_DEVICE_ID):
-                self.i2c_mux_select(channel_id)
-                result = True
-            else:
-                debugging.error("i2c: mux missing")
+            if channel_id == self._mux_channel:
+                self._mux_skip_count += 1
+                return True
+            result = self.i2c_mux_select(channel_id)
         return result
 
+    def submit(self, device, channel, func, priority=PRIORITY_DISPLAY):
+        """Queue func to run on the bus for device ; returns I2CTransaction.
+
+        Before the scheduler thread is running (eg. during device init) func
+        runs directly in the caller.
+        """
+        transaction = I2CTransaction(device, channel, func, priority)
+        if not self._scheduler_running:
+            with self.lock:
+                self.run_transaction(transaction)
+            return transaction
+        with self._queue_condition:
+            self._device_queues.setdefault(device, deque()).append(transaction)
+            self._queue_condition.notify()
+        return transaction
+
+    def run(self, device, channel, func, priority=PRIORITY_DISPLAY, timeout=2.0):
+        """Run func on the bus for device and wait for it ; returns (completed, result).
+
+        Exceptions raised by func are re-raised here. func must not call run() itself.
+        """
+        if self.bus is None:
+            return False, None
+        transaction = self.submit(device, channel, func, priority)
+        if not transaction.wait(timeout):
+            transaction.cancel()
+            self._device_stat(device)["timeouts"] += 1
+            debugging.warn(f"i2c: {device} transaction timed out after {timeout}s")
+            return False, None
+        return True, transaction.result()
+
+    def _device_stat(self, device):
+        """Return stats dict for device."""
+        device_stat = self._device_stats.get(device)
+        if device_stat is None:
+            device_stat = {
+                "count": 0,
+                "wait_total": 0.0,
+                "run_total": 0.0,
+                "max_latency": 0.0,
+                "timeouts": 0,
+                "errors": 0,
+            }
+            self._device_stats[device] = device_stat
+        return device_stat
+
+    def _next_transaction(self):
+        """Pop the next transaction ; highest priority first, round robin between devices."""
+        next_device = None
+        next_rank = None
+        for device, device_queue in self._device_queues.items():
+            if not device_queue:
+                continue
+            rank = (device_queue[0].priority(), self._device_served.get(device, 0))
+            if next_rank is None or rank < next_rank:
+                next_rank = rank
+                next_device = device
+        if next_device is None:
+            return None
+        self._serve_counter += 1
+        self._device_served[next_device] = self._serve_counter
+        return self._device_queues[next_device].popleft()
+
+    def run_transaction(self, transaction):
+        """Select channel and execute transaction ; caller must hold the bus lock."""
+        start_time = time.time()
+        if transaction.channel() is not None:
+            self.select(transaction.channel())
+        transaction.execute()
+        end_time = time.time()
+        device_stat = self._device_stat(transaction.device())
+        device_stat["count"] += 1
+        device_stat["wait_total"] += start_time - transaction.submit_time()
+        device_stat["run_total"] += end_time - start_time
+        device_stat["max_latency"] = max(
+            device_stat["max_latency"], end_time - transaction.submit_time()
+        )
+        if transaction.failed():
+            device_stat["errors"] += 1
+        device_labels = (transaction.device(),)
+        I2C_WAIT_TIME.observe(start_time - transaction.submit_time(), device_labels)
+        I2C_RUN_TIME.observe(end_time - start_time, device_labels)
+
+    def update_loop(self):
+        """Scheduler thread ; owns the bus and runs queued transactions in order."""
+        if self.bus is None:
+            debugging.info("i2c: no bus ; scheduler not started")
+            return
+        self._scheduler_running = True
+        debugging.info("i2c: scheduler running")
+        while True:
+            with self._queue_condition:
+                transaction = self._next_transaction()
+                while transaction is None:
+                    self._queue_condition.wait()
+                    transaction = self._next_transaction()
+            if transaction.cancelled():
+                continue
+            with self.lock:
+                self._bus_lock_owner = f"scheduler:{transaction.device()}"
+                self.run_transaction(transaction)
+
     def i2c_exists(self, device_id):
         """Iterate across the list of i2c devices."""
         if self.bus is None:
@@ -140,15 +353,18 @@ class I2CBus:
         """Grab bus lock."""
         if self.bus is None:
             return False
+        wait_start = time.perf_counter()
         for counter in range(1, 11):
             acquired = self.lock.acquire(blocking=True, timeout=0.1)
             if acquired:
+                I2C_LOCK_WAIT_TIME.observe(time.perf_counter() - wait_start)
                 self._lock_events += 1
                 self._lock_count += 1
                 self._bus_lock_owner = owner
                 self._average__lock_count += 1
                 self._average_lock_start = time.time()
                 return True
+        I2C_LOCK_WAIT_TIME.observe(time.perf_counter() - wait_start)
         lock_duration = time.time() - self._average_lock_start
         self._lock_fail_count += 1
         debugging.warn(
@@ -210,8 +426,13 @@ class I2CBus:
             return
         debugging.debug(f"i2c_mux_select({channel_id})")
         self.current_enabled = I2C_ch[channel_id]
+        self._mux_switch_count += 1
         if not self.i2c_update():
             debugging.error("OLED: i2c_mux_select - error calling i2c_update")
+            self._mux_channel = None
+            return False
+        self._mux_channel = channel_id
+        return True
 
     def i2c_mux_default(self):
         """Update MUX settings."""
@@ -237,6 +458,8 @@ class I2CBus:
             except Exception as err:
                 # self.lock.release()
                 debugging.error(err)
+                # Mux state is unknown ; force the next select() to write it again
+                self._mux_channel = None
         return False
 
     def stats(self):
@@ -245,4 +468,20 @@ class I2CBus:
         maxlock = round(self._max_lock_duration, 2)
         lockfail = self._lock_fail_count
         stats_txt = f"i2cbus lock stats\n\tAverage duration:{average}\n\tMax:{maxlock}/Owner:{self._max_lock_owner}\n\tLock fail (expired):{lockfail}"
+        stats_txt += f"\n\tmux switch:{self._mux_switch_count} skipped:{self._mux_skip_count}"
+        with self._queue_condition:
+            queue_depth = {
+                device: len(device_queue)
+                for device, device_queue in self._device_queues.items()
+            }
+        for device, device_stat in sorted(self._device_stats.items()):
+            count = max(device_stat["count"], 1)
+            avg_wait = round(device_stat["wait_total"] / count * 1000, 1)
+            avg_run = round(device_stat["run_total"] / count * 1000, 1)
+            max_latency = round(device_stat["max_latency"] * 1000, 1)
+            stats_txt += (
+                f"\n\t{device}: count:{device_stat['count']} wait:{avg_wait}ms run:{avg_run}ms"
+                f" max:{max_latency}ms queue:{queue_depth.get(device, 0)}"
+                f" timeouts:{device_stat['timeouts']} errors:{device_stat['errors']}"
+            )
         return stats_txt
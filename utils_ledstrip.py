@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*- #
+
+"""LED strip backends.
+
+UpdateLEDs drives the strip through a small interface that matches the
+rpi_ws281x PixelStrip methods it uses (begin / numPixels / setPixelColor /
+getPixelColor / setBrightness / getBrightness / show).
+
+  Ws281xStrip - hardware strip using rpi_ws281x (Raspberry Pi only)
+  MemoryStrip - pure python strip, optionally recording each frame
+
+Recordings are a compact binary file ;
+  header : magic "LEDR", version (uint16), led_count (uint32)
+  frame  : timestamp (float64), brightness (uint8), led_count * 3 bytes RGB
+"""
+
+import struct
+import time
+
+import numpy as np
+
+import debugging
+import utils_clock
+
+RECORDING_MAGIC = b"LEDR"
+RECORDING_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+_FRAME = struct.Struct("<dB")
+
+
+def pack_color(red, green, blue, white=0) -> int:
+    """Pack color values into 32bit pixel value ; equivalent to rpi_ws281x.Color()."""
+    return (white << 24) | (red << 16) | (green << 8) | blue
+
+
+class LedStrip:
+    """Base class for LED strip backends."""
+
+    _led_count = 0
+    _brightness = 255
+
+    def __init__(self, led_count, brightness=255):
+        """Initialize strip."""
+        self._led_count = led_count
+        self._brightness = brightness
+
+    def begin(self):
+        """Initialize strip hardware."""
+
+    def numPixels(self) -> int:
+        """Return number of pixels."""
+        return self._led_count
+
+    def setPixelColor(self, led_index, color):
+        """Set pixel to packed 24bit color value."""
+        raise NotImplementedError
+
+    def getPixelColor(self, led_index) -> int:
+        """Return packed 24bit color value for pixel."""
+        raise NotImplementedError
+
+    def setBrightness(self, brightness):
+        """Set strip brightness (0-255)."""
+        self._brightness = brightness
+
+    def getBrightness(self) -> int:
+        """Return strip brightness."""
+        return self._brightness
+
+    def show(self):
+        """Push pixel data to the strip."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release strip resources."""
+
+    def stats(self) -> str:
+        """Return strip stats."""
+        return f"LEDStrip: {type(self).__name__} leds:{self._led_count}"
+
+
+class Ws281xStrip(LedStrip):
+    """rpi_ws281x hardware strip."""
+
+    _strip = None
+
+    def __init__(
+        self,
+        led_count,
+        led_pin,
+        freq_hz,
+        dma,
+        invert,
+        brightness,
+        channel,
+        strip_type=None,
+    ):
+        """Initialize rpi_ws281x PixelStrip."""
+        # Import here so that the rest of the LED engine can run without the hardware library
+        from rpi_ws281x import PixelStrip, ws
+
+        super().__init__(led_count, brightness)
+        if strip_type is None:
+            strip_type = ws.WS2811_STRIP_GRB
+        self._strip = PixelStrip(
+            led_count, led_pin, freq_hz, dma, invert, brightness, channel, strip_type
+        )
+
+    def begin(self):
+        """Initialize strip hardware."""
+        self._strip.begin()
+
+    def setPixelColor(self, led_index, color):
+        """Set pixel to packed 24bit color value."""
+        self._strip.setPixelColor(led_index, color)
+
+    def getPixelColor(self, led_index) -> int:
+        """Return packed 24bit color value for pixel."""
+        return self._strip.getPixelColor(led_index)
+
+    def setBrightness(self, brightness):
+        """Set strip brightness (0-255)."""
+        self._brightness = brightness
+        self._strip.setBrightness(brightness)
+
+    def show(self):
+        """Push pixel data to the strip."""
+        self._strip.show()
+
+
+class MemoryStrip(LedStrip):
+    """In memory LED strip ; used for off-Pi testing, benchmarks and recording."""
+
+    _pixels = []
+    _recorder = None
+    _frame_count = 0
+    _last_show = None
+
+    def __init__(self, led_count, brightness=255, recorder=None):
+        """Initialize in memory strip."""
+        super().__init__(led_count, brightness)
+        self._pixels = [0] * led_count
+        self._recorder = recorder
+        self._frame_count = 0
+        self._last_show = None
+
+    def setPixelColor(self, led_index, color):
+        """Set pixel to packed 24bit color value."""
+        if 0 <= led_index < self._led_count:
+            self._pixels[led_index] = color
+
+    def getPixelColor(self, led_index) -> int:
+        """Return packed 24bit color value for pixel."""
+        return self._pixels[led_index]
+
+    def pixels(self) -> list:
+        """Return copy of current pixel values."""
+        return list(self._pixels)
+
+    def frame_count(self) -> int:
+        """Return number of frames shown."""
+        return self._frame_count
+
+    def show(self):
+        """Record the current frame."""
+        self._frame_count += 1
+        self._last_show = utils_clock.timestamp()
+        if self._recorder is not None:
+            self._recorder.write_frame(self._last_show, self._brightness, self._pixels)
+
+    def close(self):
+        """Close recording file."""
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def stats(self) -> str:
+        """Return strip stats."""
+        recording = "none"
+        if self._recorder is not None:
+            recording = self._recorder.filename()
+        return (
+            f"LEDStrip: MemoryStrip leds:{self._led_count} "
+            f"frames:{self._frame_count} recording:{recording}"
+        )
+
+
+class FrameRecorder:
+    """Write LED frames to a recording file."""
+
+    _filename = None
+    _file = None
+    _led_count = 0
+
+    def __init__(self, filename, led_count):
+        """Open recording file and write header."""
+        self._filename = filename
+        self._led_count = led_count
+        self._file = open(filename, "wb")
+        self._file.write(_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, led_count))
+        debugging.info(f"LED recording to {filename} : {led_count} leds")
+
+    def filename(self) -> str:
+        """Return recording filename."""
+        return self._filename
+
+    def write_frame(self, timestamp, brightness, pixels):
+        """Append one frame to the recording."""
+        if self._file is None:
+            return
+        pixel_array = np.asarray(pixels, dtype=np.uint32)
+        rgb = np.empty((self._led_count, 3), dtype=np.uint8)
+        rgb[:, 0] = (pixel_array >> 16) & 0xFF
+        rgb[:, 1] = (pixel_array >> 8) & 0xFF
+        rgb[:, 2] = pixel_array & 0xFF
+        self._file.write(_FRAME.pack(timestamp, brightness & 0xFF))
+        self._file.write(rgb.tobytes())
+
+    def close(self):
+        """Flush and close recording."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(filename):
+    """Yield (timestamp, brightness, pixels) for each frame in a recording."""
+    with open(filename, "rb") as recording:
+        header = recording.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        magic, version, led_count = _HEADER.unpack(header)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            debugging.error(f"{filename} : not a LED recording (v{RECORDING_VERSION})")
+            return
+        frame_size = led_count * 3
+        while True:
+            frame_header = recording.read(_FRAME.size)
+            if len(frame_header) < _FRAME.size:
+                return
+            timestamp, brightness = _FRAME.unpack(frame_header)
+            frame_data = recording.read(frame_size)
+            if len(frame_data) < frame_size:
+                return
+            rgb = np.frombuffer(frame_data, dtype=np.uint8).reshape(-1, 3)
+            pixels = (
+                (rgb[:, 0].astype(np.uint32) << 16)
+                | (rgb[:, 1].astype(np.uint32) << 8)
+                | rgb[:, 2]
+            )
+            yield timestamp, brightness, pixels.tolist()
+
+
+def replay_recording(filename, strip, speed=1.0):
+    """Replay a recording onto a strip, keeping the recorded frame timing.
+
+    speed scales the playback rate ; speed=0 replays as fast as possible.
+    Returns (frame_count, lag) where lag is the worst case delay in seconds
+    between when a frame was due and when it was shown.
+    """
+    frame_count = 0
+    worst_lag = 0.0
+    first_timestamp = None
+    replay_start = time.monotonic()
+    for timestamp, brightness, pixels in read_recording(filename):
+        if first_timestamp is None:
+            first_timestamp = timestamp
+        if speed > 0:
+            due = replay_start + (timestamp - first_timestamp) / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                worst_lag = max(worst_lag, -delay)
+        for led_index, pixel in enumerate(pixels):
+            strip.setPixelColor(led_index, pixel)
+        strip.setBrightness(brightness)
+        strip.show()
+        frame_count += 1
+    return frame_count, worst_lag
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*- #
+
+"""Cache for generated web map pages.
+
+Building a folium map takes hundreds of milliseconds on a Pi. Each map is
+built once per data version, and rebuilt in a background thread when the
+version changes ; requests keep being served the previous artifact until the
+new one is ready. Artifacts are written to disk atomically, and carry an
+ETag so browsers can revalidate with If-None-Match.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import debugging
+import utils_metrics
+
+
+class MapArtifact:
+    """One generated map page."""
+
+    version = None
+    etag = None
+    html = None
+    build_time = 0.0
+
+    def __init__(self, version, html, build_time):
+        """Store generated html for a data version."""
+        self.version = version
+        self.html = html
+        self.etag = hashlib.sha1(html.encode("utf-8")).hexdigest()[:20]
+        self.build_time = build_time
+
+
+class MapCache:
+    """Generated map pages keyed by name ; rebuilt when their data version changes."""
+
+    _builders = {}
+    _artifacts = {}
+    _build_locks = {}
+    _build_count = 0
+    _lock = None
+
+    def __init__(self):
+        """Create empty map cache."""
+        self._builders = {}
+        self._artifacts = {}
+        self._build_locks = {}
+        self._build_count = 0
+        self._lock = threading.Lock()
+
+    def register(self, name, filename, builder):
+        """Register builder() returning html for map name ; saved to filename."""
+        self._builders[name] = (filename, builder)
+        self._build_locks[name] = threading.Lock()
+
+    def build(self, name, version):
+        """Build map name for version, unless it is already current."""
+        filename, builder = self._builders[name]
+        with self._build_locks[name]:
+            artifact = self._artifacts.get(name)
+            if artifact is not None and artifact.version == version:
+                return artifact
+            start_time = time.time()
+            try:
+                html = builder()
+            except Exception as err:
+                debugging.error(f"Map build failed for {name}: {err}")
+                return artifact
+            artifact = MapArtifact(version, html, time.time() - start_time)
+            self.write_artifact(filename, html)
+            with self._lock:
+                self._artifacts[name] = artifact
+                self._build_count += 1
+            debugging.info(
+                f"Map {name} built for version {version} in {artifact.build_time:.2f}s"
+            )
+            return artifact
+
+    def write_artifact(self, filename, html):
+        """Write html to filename atomically ; readers never see a partial file."""
+        if not filename:
+            return
+        tmp_filename = f"{filename}.tmp"
+        try:
+            with open(tmp_filename, "w", encoding="utf-8") as map_file:
+                map_file.write(html)
+            os.replace(tmp_filename, filename)
+        except OSError as err:
+            debugging.error(f"Unable to save map {filename}: {err}")
+
+    def artifact(self, name, version):
+        """Return MapArtifact for name ; refreshes in the background when version is stale.
+
+        The first request for a map builds it in the caller ; concurrent callers
+        wait for that build rather than building their own.
+        """
+        with self._lock:
+            artifact = self._artifacts.get(name)
+        utils_metrics.cache_result(
+            "map", artifact is not None and artifact.version == version
+        )
+        if artifact is None:
+            return self.build(name, version)
+        if artifact.version != version and not self._build_locks[name].locked():
+            threading.Thread(
+                target=self.build, args=(name, version), name=f"map {name}", daemon=True
+            ).start()
+        return artifact
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        with self._lock:
+            artifacts = dict(self._artifacts)
+        map_stats = [
+            f"{name}:{artifact.version}/{artifact.build_time:.2f}s"
+            for name, artifact in artifacts.items()
+        ]
+        return f"Map Cache Stats:\n\tbuilds: {self._build_count}\n\tmaps: {map_stats}"
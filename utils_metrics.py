@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*- #
+
+"""Lightweight in-process metrics.
+
+Counters, gauges and histograms live in a single module level registry, so
+any module can create and update them without passing objects around :
+
+    FETCH_TIME = utils_metrics.histogram(
+        "livemap_dataset_fetch_seconds", "Dataset download time", ("dataset",)
+    )
+    FETCH_TIME.observe(elapsed, ("metars.xml",))
+
+Updates are a dict lookup and an add under a per metric lock. The registry
+renders as Prometheus text exposition format or as a JSON friendly dict.
+"""
+
+import bisect
+import math
+import threading
+import time
+
+# Seconds ; suits frame times through to dataset downloads
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _format_value(value) -> str:
+    """Return value in Prometheus text format."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labelnames, labelvalues, extra=None) -> str:
+    """Return {name="value",...} ; empty string for no labels."""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    label_text = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        label_text.append(f'{name}="{value}"')
+    return "{" + ",".join(label_text) + "}"
+
+
+class Metric:
+    """Base for registered metrics ; values are keyed by a tuple of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name, helptext, labelnames=()):
+        """Create metric ; labelnames is a tuple of label names."""
+        self.name = name
+        self.helptext = helptext
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """Return list of (suffix, labelvalues, extra label, value)."""
+        with self._lock:
+            return [("", labels, None, value) for labels, value in self._values.items()]
+
+    def prometheus(self) -> str:
+        """Return metric in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.helptext}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, extra, value in self.samples():
+            label_text = _format_labels(self.labelnames, labels, extra)
+            lines.append(f"{self.name}{suffix}{label_text} {_format_value(value)}")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        """Return metric as a JSON serializable dict."""
+        with self._lock:
+            values = [
+                {"labels": dict(zip(self.labelnames, labels)), "value": value}
+                for labels, value in self._values.items()
+            ]
+        return {"type": self.kind, "help": self.helptext, "values": values}
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, labels=()):
+        """Add amount to the counter for labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        """Return current count for labels."""
+        return self._values.get(labels, 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down ; optionally read from a function when collected."""
+
+    kind = "gauge"
+
+    def __init__(self, name, helptext, labelnames=()):
+        """Create gauge."""
+        super().__init__(name, helptext, labelnames)
+        self._function = None
+
+    def set(self, value, labels=()):
+        """Set gauge for labels."""
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        """Add amount to gauge for labels."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_function(self, function):
+        """Read values from function() at collection time.
+
+        function returns a number, or a dict of labelvalues tuple -> number.
+        """
+        self._function = function
+
+    def collect(self):
+        """Refresh values from the gauge function."""
+        if self._function is None:
+            return
+        try:
+            values = self._function()
+        except Exception:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        with self._lock:
+            self._values = dict(values)
+
+    def samples(self):
+        """Return list of (suffix, labelvalues, extra label, value)."""
+        self.collect()
+        return super().samples()
+
+    def as_dict(self) -> dict:
+        """Return metric as a JSON serializable dict."""
+        self.collect()
+        return super().as_dict()
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, helptext, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Create histogram ; buckets are sorted upper bounds."""
+        super().__init__(name, helptext, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        """Record an observation for labels."""
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = state
+            state[0][bucket_index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, labels=()):
+        """Return context manager that observes the elapsed time of its block."""
+        return _HistogramTimer(self, labels)
+
+    def samples(self):
+        """Return list of (suffix, labelvalues, extra label, value)."""
+        samples = []
+        with self._lock:
+            values = [
+                (labels, list(state[0]), state[1], state[2])
+                for labels, state in self._values.items()
+            ]
+        for labels, bucket_counts, total, count in values:
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                bucket_label = ("le", _format_value(float(upper)))
+                samples.append(("_bucket", labels, bucket_label, cumulative))
+            samples.append(("_sum", labels, None, total))
+            samples.append(("_count", labels, None, count))
+        return samples
+
+    def as_dict(self) -> dict:
+        """Return metric as a JSON serializable dict ; per bucket (not cumulative) counts."""
+        with self._lock:
+            values = [
+                {
+                    "labels": dict(zip(self.labelnames, labels)),
+                    "count": state[2],
+                    "sum": state[1],
+                    "mean": state[1] / state[2] if state[2] else None,
+                    "buckets": dict(
+                        zip((str(upper) for upper in self.buckets), state[0])
+                    ),
+                    "overflow": state[0][-1],
+                }
+                for labels, state in self._values.items()
+            ]
+        return {"type": self.kind, "help": self.helptext, "values": values}
+
+
+class _HistogramTimer:
+    """Context manager for Histogram.time()."""
+
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._histogram.observe(time.perf_counter() - self._start, self._labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics ; creating a metric that already exists returns the existing one."""
+
+    def __init__(self):
+        """Create empty registry."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric_class, name, helptext, labelnames=(), **kwargs):
+        """Return metric called name, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, helptext, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def metrics(self):
+        """Return list of registered metrics sorted by name."""
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def prometheus(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        return "\n".join(metric.prometheus() for metric in self.metrics()) + "\n"
+
+    def as_dict(self) -> dict:
+        """Return all metrics as a JSON serializable dict."""
+        return {metric.name: metric.as_dict() for metric in self.metrics()}
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, helptext, labelnames=()):
+    """Return registered Counter."""
+    return REGISTRY.register(Counter, name, helptext, labelnames)
+
+
+def gauge(name, helptext, labelnames=()):
+    """Return registered Gauge."""
+    return REGISTRY.register(Gauge, name, helptext, labelnames)
+
+
+def histogram(name, helptext, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Return registered Histogram."""
+    return REGISTRY.register(Histogram, name, helptext, labelnames, buckets=buckets)
+
+
+# Shared cache hit / miss counter ; labels are (cache, result)
+CACHE_REQUESTS = counter(
+    "livemap_cache_requests_total",
+    "Cache lookups by cache and result",
+    ("cache", "result"),
+)
+
+
+def cache_result(cache_name, hit):
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.inc(1, (cache_name, "hit" if hit else "miss"))
@@ -146,6 +146,7 @@ def mos_analyze_datafile(
         return False, None
 
     mos_dict = parse_mos_data(lines)
+    mos_probability = app_conf.snapshot().metar.mos_probability
 
     result_dict = {}
     mos_forecast = {}
@@ -235,9 +236,7 @@ def mos_analyze_datafile(
 
                 if p06 == "" or p06 is None:
                     p06 = "0"
-                if wx_info == "RA" and int(p06) < app_conf.get_int(
-                    "metar", "mos_probability"
-                ):
+                if wx_info == "RA" and int(p06) < mos_probability:
                     if obv != "N":
                         wx_info = obv_wx[obv]
                     else:
@@ -246,16 +245,12 @@ def mos_analyze_datafile(
                 if pos == "" or pos is None:
                     pos = "0"
 
-                if wx_info == "SN" and int(pos) < app_conf.get_int(
-                    "metar", "mos_probability"
-                ):
+                if wx_info == "SN" and int(pos) < mos_probability:
                     wx_info = "NONE"
 
                 if poz == "" or poz is None:
                     poz = "0"
-                if wx_info == "FZRA" and int(poz) < app_conf.get_int(
-                    "metar", "mos_probability"
-                ):
+                if wx_info == "FZRA" and int(poz) < mos_probability:
                     wx_info = "NONE"
 
                 # TODO: Need to properly parse the T06 line
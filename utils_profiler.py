@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*- #
+
+"""Sampling profiler for the running app.
+
+A background thread periodically reads sys._current_frames() and counts the
+stack of every thread, keyed by thread name (the names given to the threads
+created in livemap.py). Nothing is hooked into the profiled threads, so the
+cost is one stack walk per thread per sample, and nothing at all when the
+profiler is stopped.
+
+Where per thread CPU clocks are available (Linux), a thread's stack is only
+counted when the thread used CPU since the previous sample ; threads blocked
+in sleep / I/O waits don't drown out the ones doing work.
+
+The result is exported in collapsed stack format, one line per distinct stack :
+    thread name;outer_func (file.py:12);inner_func (file.py:40) 17
+which flamegraph.pl, speedscope and inferno read directly.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import debugging
+
+# Deepest stack recorded ; outer frames beyond this are dropped
+MAX_STACK_DEPTH = 64
+
+
+class SamplingProfiler:
+    """Timer driven stack sampler ; start / stop at runtime."""
+
+    _interval = 0.01
+    _max_duration = 600
+    _stacks = None
+    _thread_samples = None
+    _thread_cpu = None
+    _cpu_clocks = None
+    _frame_labels = None
+    _sample_count = 0
+    _sample_time = 0.0
+    _started = None
+    _stopped = None
+    _stop_event = None
+    _thread = None
+    _lock = None
+
+    def __init__(self, interval=0.01, max_duration=600):
+        """Create profiler ; sample every interval seconds, stop after max_duration seconds."""
+        self._interval = interval
+        self._max_duration = max_duration
+        self._stacks = Counter()
+        self._thread_samples = Counter()
+        self._thread_cpu = Counter()
+        self._cpu_clocks = {}
+        self._frame_labels = {}
+        self._sample_count = 0
+        self._sample_time = 0.0
+        self._started = None
+        self._stopped = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def running(self) -> bool:
+        """Is the profiler sampling."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Clear previous samples and start sampling ; False if already running."""
+        with self._lock:
+            if self.running():
+                return False
+            self._stacks = Counter()
+            self._thread_samples = Counter()
+            self._thread_cpu = Counter()
+            self._cpu_clocks = {}
+            self._sample_count = 0
+            self._sample_time = 0.0
+            self._started = time.time()
+            self._stopped = None
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self.sample_loop, name="profiler", daemon=True
+            )
+            self._thread.start()
+        debugging.info(
+            f"Profiler: started ; interval {self._interval}s, max {self._max_duration}s"
+        )
+        return True
+
+    def stop(self) -> bool:
+        """Stop sampling ; False if not running."""
+        if not self.running():
+            return False
+        self._stop_event.set()
+        self._thread.join()
+        debugging.info(f"Profiler: stopped after {self._sample_count} samples")
+        return True
+
+    def frame_label(self, code) -> str:
+        """Return collapsed stack label for a code object ; cached per code object."""
+        label = self._frame_labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self._frame_labels[code] = label
+        return label
+
+    def thread_cpu_time(self, ident):
+        """Return CPU seconds used by thread ident ; None if not available."""
+        try:
+            clock_id = self._cpu_clocks.get(ident)
+            if clock_id is None:
+                clock_id = time.pthread_getcpuclockid(ident)
+                self._cpu_clocks[ident] = clock_id
+            return time.clock_gettime(clock_id)
+        except (AttributeError, OSError, OverflowError):
+            return None
+
+    def sample(self, thread_names, cpu_times):
+        """Record the current stack of every busy thread except the profiler itself.
+
+        cpu_times is a dict of thread ident -> CPU seconds at the previous sample ;
+        updated in place.
+        """
+        own_ident = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            thread_name = thread_names.get(ident)
+            if thread_name is None:
+                continue
+            cpu_time = self.thread_cpu_time(ident)
+            if cpu_time is not None:
+                previous_cpu_time = cpu_times.get(ident)
+                cpu_times[ident] = cpu_time
+                if previous_cpu_time is None:
+                    continue
+                if cpu_time <= previous_cpu_time:
+                    # Idle since the last sample
+                    continue
+                self._thread_cpu[thread_name] += cpu_time - previous_cpu_time
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(self.frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread_name)
+            stack.reverse()
+            self._stacks[";".join(stack)] += 1
+            self._thread_samples[thread_name] += 1
+        self._sample_count += 1
+
+    def sample_loop(self):
+        """Profiler thread ; samples until stopped or max_duration is reached."""
+        thread_names = {}
+        cpu_times = {}
+        while not self._stop_event.wait(self._interval):
+            if time.time() - self._started > self._max_duration:
+                debugging.info("Profiler: max duration reached")
+                break
+            sample_start = time.perf_counter()
+            previous_idents = thread_names.keys()
+            thread_names = {
+                thread_obj.ident: thread_obj.name for thread_obj in threading.enumerate()
+            }
+            if thread_names.keys() != previous_idents:
+                # Threads came or went ; forget clocks of threads that have exited
+                self._cpu_clocks = {
+                    ident: clock_id
+                    for ident, clock_id in self._cpu_clocks.items()
+                    if ident in thread_names
+                }
+                cpu_times = {
+                    ident: cpu_time
+                    for ident, cpu_time in cpu_times.items()
+                    if ident in thread_names
+                }
+            self.sample(thread_names, cpu_times)
+            self._sample_time += time.perf_counter() - sample_start
+        self._stopped = time.time()
+
+    def collapsed(self) -> str:
+        """Return samples in collapsed stack format."""
+        stacks = dict(self._stacks)
+        return "".join(
+            f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+        )
+
+    def thread_samples(self) -> dict:
+        """Return dict of thread name -> sample count, busiest first."""
+        return dict(self._thread_samples.most_common())
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        if self._started is None:
+            return "Profiler Stats:\n\tnot run"
+        end_time = time.time() if self._stopped is None else self._stopped
+        overhead = 0.0
+        if self._sample_count:
+            overhead = self._sample_time / self._sample_count * 1000
+        thread_stats = ""
+        for thread_name, count in self.thread_samples().items():
+            cpu_time = self._thread_cpu[thread_name]
+            thread_stats += f"\n\t\t{thread_name}: {count} samples / {cpu_time:.2f}s cpu"
+        return (
+            f"Profiler Stats:\n\trunning: {self.running()}"
+            f"\n\tduration: {end_time - self._started:.1f}s"
+            f"\n\tsamples: {self._sample_count} ({overhead:.2f}ms per sample)"
+            f"\n\tdistinct stacks: {len(self._stacks)}"
+            f"\n\tthread samples:{thread_stats}"
+        )
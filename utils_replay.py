@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*- #
+
+"""Replay archived datasets through the app against a simulated clock.
+
+An archive is a directory of dataset snapshots ; one sub directory per
+download, named for the UTC time it was taken. DataSets writes one when
+[filenames] dataset_archive is set :
+
+    archive/20250615T175312Z/metar.xml.gz
+    archive/20250615T175313Z/tafs.xml.gz
+    archive/20250616T000514Z/GFSMAV.t00z.gz
+
+ReplayDriver steps a utils_clock.ReplayClock from the first snapshot to the
+last. At each step the snapshots that have come due are written over the
+dataset files and announced to DataSets, AirportDB processes them as its
+update loop would, and LED (and optionally OLED) frames are rendered for the
+simulated time. Nothing sleeps, so a day of weather replays as fast as it can
+be processed. With a MemoryStrip recording the LED frames carry simulated
+timestamps ; utils_ledstrip.replay_recording() plays them back at any speed.
+"""
+
+import datetime
+import gzip
+import os
+import shutil
+import time
+
+import debugging
+import utils_clock
+from update_leds import LedMode
+
+SNAPSHOT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+# Datasets in the order they are loaded when several arrive in one step
+DATASET_NAMES = ("airports", "runways", "mos00", "metar", "tafs")
+
+
+def list_snapshots(archive_dir) -> list:
+    """Return sorted list of (UTC datetime, snapshot directory) in archive_dir."""
+    snapshots = []
+    for entry in os.scandir(archive_dir):
+        if not entry.is_dir():
+            continue
+        try:
+            snapshot_time = datetime.datetime.strptime(
+                entry.name, SNAPSHOT_TIME_FORMAT
+            ).replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            debugging.debug(f"Replay: ignoring {entry.path}")
+            continue
+        snapshots.append((snapshot_time, entry.path))
+    snapshots.sort()
+    return snapshots
+
+
+class ReplayDriver:
+    """Feed archived snapshots through DataSets -> AirportDB -> LEDs / OLEDs."""
+
+    _app_conf = None
+    _dataset = None
+    _airport_db = None
+    _led_mgmt = None
+    _oled_mgmt = None
+    _oled_plans = None
+    _step = 60
+    _frames = 6
+    _clock_tick = 0
+    _led_mode = None
+    _sleeping = False
+    _snapshot_count = 0
+    _step_count = 0
+    _led_frame_count = 0
+    _oled_frame_count = 0
+    _replay_start = None
+    _replay_end = None
+    _run_time = 0.0
+
+    def __init__(
+        self, app_conf, dataset, airport_db, led_mgmt, oled_mgmt=None, step=60, frames=6
+    ):
+        """Create driver ; every step seconds of simulated time, render frames LED frames."""
+        self._app_conf = app_conf
+        self._dataset = dataset
+        self._airport_db = airport_db
+        self._led_mgmt = led_mgmt
+        self._oled_mgmt = oled_mgmt
+        self._oled_plans = []
+        if oled_mgmt is not None:
+            self._oled_plans = oled_mgmt.build_panel_plans()
+        self._step = step
+        self._frames = frames
+        self._clock_tick = 0
+        self._led_mode = None
+        self._sleeping = False
+        self._snapshot_count = 0
+        self._step_count = 0
+        self._led_frame_count = 0
+        self._oled_frame_count = 0
+        self._replay_start = None
+        self._replay_end = None
+        self._run_time = 0.0
+
+    def snapshot_files(self, snapshot_dir) -> dict:
+        """Return dict of dataset name -> archived file in snapshot_dir."""
+        files = {}
+        for dataset_name in DATASET_NAMES:
+            basename = os.path.basename(self._dataset.source_file(dataset_name))
+            for candidate in (basename + ".gz", basename):
+                archived_file = os.path.join(snapshot_dir, candidate)
+                if os.path.isfile(archived_file):
+                    files[dataset_name] = archived_file
+                    break
+        return files
+
+    def load_snapshot(self, snapshot_dir):
+        """Install the files in a snapshot as the current datasets."""
+        for dataset_name, archived_file in self.snapshot_files(snapshot_dir).items():
+            source_file = self._dataset.source_file(dataset_name)
+            debugging.debug(f"Replay: {dataset_name} from {archived_file}")
+            if archived_file.endswith(".gz"):
+                with gzip.open(archived_file, "rb") as archive, open(
+                    source_file, "wb"
+                ) as dest:
+                    shutil.copyfileobj(archive, dest)
+            else:
+                shutil.copyfile(archived_file, source_file)
+            self._dataset.dataset_updated(dataset_name)
+        self._snapshot_count += 1
+
+    def render_leds(self):
+        """Render LED frames for the current simulated time."""
+        if self._app_conf.snapshot().schedule.usetimer:
+            self._sleeping = self._led_mgmt.check_for_sleep_time(
+                self._clock_tick, self._sleeping, self._led_mode
+            )
+        renderer = self._led_mgmt.mode_renderers().get(self._led_mgmt.ledmode())
+        for _ in range(self._frames):
+            self._clock_tick += 1
+            if renderer is None:
+                # OFF / SLEEP
+                self._led_mgmt.turnoff()
+                continue
+            self._led_mgmt.update_ledstring(renderer(self._clock_tick))
+            self._led_frame_count += 1
+
+    def render_oleds(self):
+        """Render and push OLED panels due at the current simulated time."""
+        replay_time = utils_clock.timestamp()
+        frames = []
+        for panel_plan in self._oled_plans:
+            if panel_plan["next_due"] > replay_time:
+                continue
+            panel_plan["next_due"] = replay_time + panel_plan["cadence"]
+            display_key, image = self._oled_mgmt.prepare_panel_frame(panel_plan)
+            if image is not None:
+                frames.append((panel_plan["oled_id"], display_key, image))
+        if frames:
+            self._oled_mgmt.push_frames(frames)
+            self._oled_frame_count += len(frames)
+
+    def run(self, archive_dir, start_time=None, end_time=None):
+        """Replay snapshots in archive_dir between start_time and end_time (UTC datetimes)."""
+        snapshots = list_snapshots(archive_dir)
+        if not snapshots:
+            debugging.warn(f"Replay: no snapshots in {archive_dir}")
+            return False
+        if start_time is None:
+            start_time = snapshots[0][0]
+        if end_time is None:
+            end_time = snapshots[-1][0]
+        # Snapshots from before the start make up the starting state
+        pending = [snapshot for snapshot in snapshots if snapshot[0] <= end_time]
+        self._replay_start = start_time
+        self._replay_end = end_time
+
+        replay_clock = utils_clock.ReplayClock(start_time)
+        previous_clock = utils_clock.set_clock(replay_clock)
+        run_start = time.perf_counter()
+        try:
+            # Mode to return to when the sleep schedule ends
+            self._led_mode = self._led_mgmt.ledmode()
+            if self._led_mode in (LedMode.OFF, LedMode.SLEEP):
+                self._led_mode = LedMode.METAR
+            self._led_mgmt.update_active_led_list()
+            self._led_mgmt.ledmode_radar_setup()
+            self._led_mgmt.ledmode_geometry_setup()
+            while True:
+                replay_time = replay_clock.now(datetime.timezone.utc)
+                loaded = False
+                while pending and pending[0][0] <= replay_time:
+                    self.load_snapshot(pending.pop(0)[1])
+                    loaded = True
+                if loaded:
+                    self._airport_db.process_datasets()
+                self.render_leds()
+                if self._oled_plans:
+                    self.render_oleds()
+                self._step_count += 1
+                if replay_time >= end_time:
+                    break
+                replay_clock.advance(self._step)
+        finally:
+            utils_clock.set_clock(previous_clock)
+            self._run_time = time.perf_counter() - run_start
+        return True
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        if self._replay_start is None:
+            return "Replay Stats:\n\tnot run"
+        simulated = (self._replay_end - self._replay_start).total_seconds()
+        speedup = simulated / self._run_time if self._run_time > 0 else 0.0
+        return (
+            f"Replay Stats:\n\tsimulated: {self._replay_start} - {self._replay_end}"
+            f"\n\tsnapshots: {self._snapshot_count}"
+            f"\n\tsteps: {self._step_count} ({self._step}s)"
+            f"\n\tled frames: {self._led_frame_count}"
+            f"\n\toled frames: {self._oled_frame_count}"
+            f"\n\trun time: {self._run_time:.1f}s ({speedup:.0f}x)"
+        )
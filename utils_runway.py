@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*- #
+
+"""Runway wind calculations.
+
+Runway rows from runways.csv are parsed once into numeric arrays with one
+entry per usable runway end. The best runway for the current wind, and the
+headwind / crosswind components on it, are then computed for any number of
+airports in a single vectorized pass.
+
+Headings and wind directions are degrees true ; wind deltas wrap at 360.
+"""
+
+import re
+
+import numpy as np
+
+import utils
+
+_IDENT_HEADING = re.compile(r"^(\d{1,2})")
+
+
+def parse_heading(heading_str, ident):
+    """Return runway heading in degrees ; falls back to the runway number, None if unknown."""
+    try:
+        heading = float(heading_str)
+        if not np.isnan(heading):
+            return heading % 360
+    except (ValueError, TypeError):
+        pass
+    # Runway 27L -> 270 ; 36 -> 0
+    ident_match = _IDENT_HEADING.match(ident or "")
+    if ident_match is None:
+        return None
+    return (int(ident_match.group(1)) * 10) % 360
+
+
+class RunwayEnds:
+    """Numeric arrays describing the usable runway ends at one airport."""
+
+    _ident = []
+    _heading = None
+    _length = None
+    _width = None
+
+    def __init__(self, runway_rows=()):
+        """Parse runway rows ; closed runways and ends without a usable heading are dropped."""
+        ident = []
+        heading = []
+        length = []
+        width = []
+        for runway in runway_rows:
+            if runway["closed"] == "1":
+                continue
+            __result, runway_length = utils.str2int(runway["length_ft"])
+            __result, runway_width = utils.str2int(runway["width_ft"])
+            for runway_end in ("le", "he"):
+                end_heading = parse_heading(
+                    runway[f"{runway_end}_heading_degT"], runway[f"{runway_end}_ident"]
+                )
+                if end_heading is None:
+                    continue
+                ident.append(runway[f"{runway_end}_ident"])
+                heading.append(end_heading)
+                length.append(max(runway_length, 0))
+                width.append(max(runway_width, 0))
+        self._ident = ident
+        self._heading = np.array(heading, dtype=float)
+        self._length = np.array(length, dtype=np.int32)
+        self._width = np.array(width, dtype=np.int32)
+
+    def __len__(self):
+        return len(self._ident)
+
+    def ident(self, runway_index) -> str:
+        """Return runway end identifier (eg. 27L)."""
+        return self._ident[runway_index]
+
+    def idents(self) -> list:
+        """Return list of runway end identifiers."""
+        return self._ident
+
+    def heading(self):
+        """Return array of runway end headings."""
+        return self._heading
+
+    def length(self):
+        """Return array of runway lengths (ft)."""
+        return self._length
+
+    def width(self):
+        """Return array of runway widths (ft)."""
+        return self._width
+
+
+def wind_delta(heading, wind_dir):
+    """Return angle between runway heading and wind direction, 0 - 180 ; wraps at 360."""
+    return np.abs((np.asarray(heading) - wind_dir + 180) % 360 - 180)
+
+
+def wind_components(heading, wind_dir, wind_speed):
+    """Return (headwind, crosswind) ; crosswind is positive from the right."""
+    angle = np.radians(np.asarray(wind_dir) - np.asarray(heading))
+    return wind_speed * np.cos(angle), wind_speed * np.sin(angle)
+
+
+def best_runways(runway_sets, wind_dirs, wind_speeds):
+    """Pick the best runway end for each airport.
+
+    runway_sets is a list of RunwayEnds, with matching lists of wind direction
+    and speed (None when there is no wind report).
+    Returns (best_index, headwind, crosswind) arrays ; best_index is -1 and the
+    wind components are NaN where no runway could be picked.
+    Runway ends are ranked by smallest wind delta, then longest runway.
+    """
+    airport_count = len(runway_sets)
+    best_index = np.full(airport_count, -1, dtype=np.intp)
+    headwind = np.full(airport_count, np.nan)
+    crosswind = np.full(airport_count, np.nan)
+    counts = np.array([len(runway_set) for runway_set in runway_sets], dtype=np.intp)
+    if counts.sum() == 0:
+        return best_index, headwind, crosswind
+
+    wind_dir = np.array(
+        [np.nan if value is None else value for value in wind_dirs], dtype=float
+    )
+    wind_speed = np.array(
+        [0 if value is None else value for value in wind_speeds], dtype=float
+    )
+    # Flatten every runway end into one set of arrays, tagged with the airport position
+    owner = np.repeat(np.arange(airport_count), counts)
+    first_end = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    heading = np.concatenate([runway_set.heading() for runway_set in runway_sets])
+    length = np.concatenate([runway_set.length() for runway_set in runway_sets])
+    delta = wind_delta(heading, wind_dir[owner])
+
+    # Sort by airport, then wind delta, then longest ; first entry per airport wins
+    order = np.lexsort((-length, delta, owner))
+    order_owner = owner[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = order_owner[1:] != order_owner[:-1]
+    winners = order[first]
+    winner_owner = order_owner[first]
+    valid = ~np.isnan(wind_dir[winner_owner])
+    winners = winners[valid]
+    winner_owner = winner_owner[valid]
+
+    best_index[winner_owner] = winners - first_end[winner_owner]
+    headwind[winner_owner], crosswind[winner_owner] = wind_components(
+        heading[winners], wind_dir[winner_owner], wind_speed[winner_owner]
+    )
+    return best_index, headwind, crosswind
+
+
+def runway_wind_table(runway_ends, wind_dir, wind_speed, wind_gust, best_index=-1):
+    """Return dict of headwind / crosswind / gust components for every runway end.
+
+    Crosswind is positive from the right ; components are rounded to 0.1 kt
+    and empty when there is no wind report.
+    """
+    wind_table = {
+        "wind_dir": wind_dir,
+        "wind_speed": wind_speed,
+        "wind_gust": wind_gust,
+        "best": int(best_index),
+        "runways": [],
+    }
+    if wind_dir is None or len(runway_ends) == 0:
+        return wind_table
+    wind_speed = max(wind_speed or 0, 0)
+    wind_gust = max(wind_gust or 0, wind_speed)
+    heading = runway_ends.heading()
+    headwind, crosswind = wind_components(heading, wind_dir, wind_speed)
+    gust_headwind, gust_crosswind = wind_components(heading, wind_dir, wind_gust)
+    for runway_index, runway_ident in enumerate(runway_ends.idents()):
+        wind_table["runways"].append(
+            {
+                "ident": runway_ident,
+                "heading": round(float(heading[runway_index]), 1),
+                "headwind": round(float(headwind[runway_index]), 1),
+                "crosswind": round(float(crosswind[runway_index]), 1),
+                "gust_headwind": round(float(gust_headwind[runway_index]), 1),
+                "gust_crosswind": round(float(gust_crosswind[runway_index]), 1),
+            }
+        )
+    return wind_table
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*- #
+
+"""Pre-rasterized sprites for 1-bit OLED frames.
+
+A SpriteAtlas is built once per panel size. It holds 1-bit bitmaps for
+  - printable ASCII glyphs in a font
+  - the wind arrow at every 10 degree step
+  - the runway at every 10 degree heading, for each drawn runway width
+
+Frames are composed by OR-ing sprites into a reusable numpy buffer, instead
+of building polygons and drawing text with PIL for every frame.
+"""
+
+import numpy as np
+
+from PIL import Image
+from PIL import ImageDraw
+
+import utils_gfx
+
+ANGLE_STEP = 10
+RUNWAY_WIDTHS = (4, 6, 8, 10, 12, 15)
+
+
+def _crop_sprite(image):
+    """Return (x, y, bitmap) for the lit part of a 1-bit image ; None if empty."""
+    bbox = image.getbbox()
+    if bbox is None:
+        return None
+    bitmap = np.array(image.crop(bbox), dtype=bool)
+    return (bbox[0], bbox[1], bitmap)
+
+
+def _angle_step(angle) -> int:
+    """Round angle to the nearest sprite step."""
+    return (int(round(angle / ANGLE_STEP)) * ANGLE_STEP) % 360
+
+
+class SpriteAtlas:
+    """1-bit glyph, wind arrow and runway sprites for one panel size."""
+
+    _width = 0
+    _height = 0
+    _font = None
+    _line_height = 0
+    _glyphs = {}
+    _wind_arrows = {}
+    _runways = {}
+    _frame = None
+
+    def __init__(self, width, height, font, runway_border=5):
+        """Pre-render all sprites for a width x height panel."""
+        self._width = width
+        self._height = height
+        self._font = font
+        self._frame = np.zeros((height, width), dtype=bool)
+
+        (__left, __top, __right, bottom) = font.getbbox("Ag")
+        self._line_height = bottom + 2
+        self._glyphs = {}
+        for char_code in range(32, 127):
+            char = chr(char_code)
+            advance = int(round(font.getlength(char)))
+            glyph_image = Image.new("1", (max(advance, 1) + 2, self._line_height))
+            ImageDraw.Draw(glyph_image).text((0, 0), char, font=font, fill="white")
+            self._glyphs[char] = (advance, _crop_sprite(glyph_image))
+
+        self._wind_arrows = {}
+        for angle in range(0, 360, ANGLE_STEP):
+            arrow_image = Image.new("1", (width, height))
+            ImageDraw.Draw(arrow_image).polygon(
+                utils_gfx.create_wind_arrow(angle, width, height),
+                fill="white",
+                outline="white",
+            )
+            self._wind_arrows[angle] = _crop_sprite(arrow_image)
+
+        self._runways = {}
+        for rway_width in RUNWAY_WIDTHS:
+            rway_y = int(height / 2 - rway_width / 2)
+            for angle in range(0, 360, ANGLE_STEP):
+                runway_image = Image.new("1", (width, height))
+                ImageDraw.Draw(runway_image).polygon(
+                    utils_gfx.create_runway(
+                        runway_border, rway_y, rway_width, angle, width, height
+                    ),
+                    fill=None,
+                    outline="white",
+                )
+                self._runways[(rway_width, angle)] = _crop_sprite(runway_image)
+
+    def size(self):
+        """Return (width, height) of the panel."""
+        return (self._width, self._height)
+
+    def clear(self):
+        """Blank the frame buffer."""
+        self._frame.fill(False)
+
+    def blit(self, sprite, x_pos=0, y_pos=0):
+        """OR a (x, y, bitmap) sprite into the frame at an offset ; clipped to the panel."""
+        if sprite is None:
+            return
+        (sprite_x, sprite_y, bitmap) = sprite
+        left = sprite_x + x_pos
+        top = sprite_y + y_pos
+        (bitmap_h, bitmap_w) = bitmap.shape
+        clip_left = max(0, -left)
+        clip_top = max(0, -top)
+        clip_right = min(bitmap_w, self._width - left)
+        clip_bottom = min(bitmap_h, self._height - top)
+        if clip_left >= clip_right or clip_top >= clip_bottom:
+            return
+        self._frame[
+            top + clip_top : top + clip_bottom, left + clip_left : left + clip_right
+        ] |= bitmap[clip_top:clip_bottom, clip_left:clip_right]
+
+    def text_size(self, text):
+        """Return (width, height) of text in pixels ; handles newlines."""
+        lines = text.split("\n")
+        text_width = 0
+        for line in lines:
+            line_width = 0
+            for char in line:
+                line_width += self._glyphs.get(char, self._glyphs["?"])[0]
+            text_width = max(text_width, line_width)
+        return (text_width, len(lines) * self._line_height)
+
+    def text(self, x_pos, y_pos, text):
+        """Draw text into the frame ; handles newlines."""
+        for line_number, line in enumerate(text.split("\n")):
+            cursor_x = int(x_pos)
+            cursor_y = int(y_pos) + line_number * self._line_height
+            for char in line:
+                (advance, sprite) = self._glyphs.get(char, self._glyphs["?"])
+                self.blit(sprite, cursor_x, cursor_y)
+                cursor_x += advance
+
+    def wind_arrow(self, wind_dir):
+        """Draw the wind arrow for a wind direction."""
+        self.blit(self._wind_arrows[_angle_step(wind_dir)])
+
+    def runway(self, heading, rway_width):
+        """Draw the runway for a heading ; rway_width is snapped to a pre-rendered width."""
+        rway_width = min(RUNWAY_WIDTHS, key=lambda width: abs(width - rway_width))
+        self.blit(self._runways[(rway_width, _angle_step(heading))])
+
+    def image(self):
+        """Return the frame as a new 1-bit PIL image."""
+        return Image.frombytes(
+            "1", (self._width, self._height), np.packbits(self._frame, axis=1).tobytes()
+        )
@@ -1,6 +1,8 @@
 import datetime
 import pytz
 
+import utils_clock
+
 
 # Compare current time plus offset to TAF's time period and return difference
 def comp_time(zulu_time, taf_time):
@@ -19,7 +21,7 @@ def comp_time(zulu_time, taf_time):
 
 def future_taf_time(app_conf, hr_increment):
     """Compute time hr_increment hours in the future"""
-    taf_time = datetime.datetime.now(pytz.utc) + datetime.timedelta(hours=hr_increment)
+    taf_time = utils_clock.now(pytz.utc) + datetime.timedelta(hours=hr_increment)
     return datetime.datetime(
         taf_time.year,
         taf_time.month,
@@ -32,6 +34,6 @@ def future_taf_time(app_conf, hr_increment):
 
 def current_time_taf_offset(app_conf):
     """Get time for TAF period selected (UTC)."""
-    offset = app_conf.get_int("rotaryswitch", "hour_to_display")
-    curr_time = datetime.datetime.now(pytz.utc) + datetime.timedelta(hours=offset)
+    offset = app_conf.snapshot().rotaryswitch.hour_to_display
+    curr_time = utils_clock.now(pytz.utc) + datetime.timedelta(hours=offset)
     return pytz.UTC.localize(curr_time)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*- #
+
+"""Production serving for the Flask web interface.
+
+The web interface can run on
+  - wsgi  : cheroot ; a threaded WSGI server with a bounded worker pool,
+            HTTP/1.1 keep-alive and TLS handled by the server
+  - flask : the Flask / werkzeug development server
+
+Responses are gzip compressed when the client accepts it, and static assets
+are sent with a cache policy.
+
+Streaming responses (live events, log viewer) hold a worker thread for as long
+as they are open ; StreamSlots caps how many can be open at once so the rest of
+the interface always has workers left.
+"""
+
+import gzip
+import threading
+
+from flask import request
+
+import debugging
+import utils_metrics
+
+try:
+    from cheroot import wsgi as cheroot_wsgi
+    from cheroot.ssl.builtin import BuiltinSSLAdapter
+except ImportError:
+    cheroot_wsgi = None
+    BuiltinSSLAdapter = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+MIN_COMPRESS_SIZE = 512
+# Compressed copies of static files ; keyed by (path, etag)
+MAX_STATIC_CACHE = 64
+
+
+class ResponseCompressor:
+    """Flask after_request handler ; gzip compresses responses."""
+
+    _compress_level = 6
+    _static_cache = {}
+    _compressed_count = 0
+    _bytes_in = 0
+    _bytes_out = 0
+
+    def __init__(self, app, compress_level=6, static_max_age=3600):
+        """Register with app ; static files are cached by browsers for static_max_age seconds."""
+        self._compress_level = compress_level
+        self._static_cache = {}
+        self._compressed_count = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        app.config["SEND_FILE_MAX_AGE_DEFAULT"] = static_max_age
+        app.after_request(self.after_request)
+
+    def compressible(self, response) -> bool:
+        """Is response worth compressing for this request."""
+        if response.status_code != 200:
+            return False
+        # Generators (eg. event streams) are left alone ; files are read in full
+        if response.is_streamed and not response.direct_passthrough:
+            return False
+        if "Content-Encoding" in response.headers:
+            return False
+        if "gzip" not in request.accept_encodings:
+            return False
+        mimetype = response.mimetype or ""
+        return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+    def after_request(self, response):
+        """Compress response body ; the ETag becomes weak as the encoding differs."""
+        response.vary.add("Accept-Encoding")
+        if not self.compressible(response):
+            return response
+        etag, __weak = response.get_etag()
+        cache_key = None
+        if response.direct_passthrough and etag is not None:
+            cache_key = (request.path, etag)
+        compressed = self._static_cache.get(cache_key) if cache_key else None
+        if cache_key:
+            utils_metrics.cache_result("static_gzip", compressed is not None)
+        if compressed is None:
+            response.direct_passthrough = False
+            data = response.get_data()
+            if len(data) < MIN_COMPRESS_SIZE:
+                return response
+            compressed = gzip.compress(data, compresslevel=self._compress_level)
+            self._bytes_in += len(data)
+            self._bytes_out += len(compressed)
+            if cache_key:
+                if len(self._static_cache) >= MAX_STATIC_CACHE:
+                    self._static_cache = {}
+                self._static_cache[cache_key] = compressed
+        response.direct_passthrough = False
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+        self._compressed_count += 1
+        return response
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        ratio = 0.0
+        if self._bytes_in > 0:
+            ratio = self._bytes_out / self._bytes_in * 100
+        return (
+            f"Web Compression Stats:\n\tcompressed responses: {self._compressed_count}"
+            f"\n\tcompressed size: {ratio:.1f}%\n\tstatic cache: {len(self._static_cache)}"
+        )
+
+
+class StreamSlots:
+    """Bounded count of open streaming responses, shared by every stream route."""
+
+    _limit = 0
+    _open = 0
+    _refused = 0
+    _lock = None
+
+    def __init__(self, limit):
+        """Allow up to limit streams open at once."""
+        self._limit = limit
+        self._open = 0
+        self._refused = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Claim a slot ; False if every slot is taken."""
+        with self._lock:
+            if self._open >= self._limit:
+                self._refused += 1
+                return False
+            self._open += 1
+            return True
+
+    def release(self):
+        """Give back a slot ; call when the stream response is closed."""
+        with self._lock:
+            self._open -= 1
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        return (
+            f"Web Stream Stats:\n\topen: {self._open} / {self._limit}"
+            f"\n\trefused: {self._refused}"
+        )
+
+
+def wsgi_available() -> bool:
+    """Is the production WSGI server installed."""
+    return cheroot_wsgi is not None
+
+
+def serve_wsgi(app, port, threads, queue_size, timeout, ssl_cert=None, ssl_key=None):
+    """Serve app with cheroot until shutdown ; threads is a fixed size worker pool."""
+    server = cheroot_wsgi.Server(
+        ("0.0.0.0", int(port)),  # nosec
+        app,
+        numthreads=threads,
+        max=threads,
+        request_queue_size=queue_size,
+        timeout=timeout,
+        server_name="livemap",
+    )
+    if ssl_cert and ssl_key:
+        server.ssl_adapter = BuiltinSSLAdapter(ssl_cert, ssl_key)
+    debugging.info(
+        f"Web: wsgi server on port {port} ; threads:{threads} queue:{queue_size} tls:{bool(ssl_cert)}"
+    )
+    try:
+        server.start()
+    finally:
+        server.stop()
@@ -10,7 +10,6 @@ Created on Mon Sept 5 08:01:44 2022.
 
 # It includes supporting utility functions
 
-from datetime import datetime
 from datetime import timedelta
 from enum import Enum, auto
 from urllib.request import urlopen
@@ -19,6 +18,7 @@ import socket
 
 from metar import Metar
 import debugging
+import utils_clock
 
 
 class WxConditions(Enum):
@@ -124,7 +124,7 @@ def get_usa_metar(airport_data):
     # full XML data.
     #
     transient_err = "Transient Error"
-    timenow = datetime.now()
+    timenow = utils_clock.now()
     if not airport_data.enabled:
         return True
     # TODO: Move this to config
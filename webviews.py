@@ -2,7 +2,9 @@
 """Flask Module for WEB Interface."""
 
 import time
+import functools
 import json
+import threading
 import secrets
 import pytz
 
@@ -12,6 +14,7 @@ from folium.features import DivIcon
 
 from flask import (
     Flask,
+    g,
     render_template,
     request,
     Response,
@@ -19,6 +22,7 @@ from flask import (
     redirect,
     send_file,
     url_for,
+    abort,
 )
 
 
@@ -34,6 +38,12 @@ import utils_mos
 import utils_colors
 import utils_certificates
 import utils_system
+import utils_mapcache
+import utils_api
+import utils_events
+import utils_metrics
+import utils_profiler
+import utils_webserver
 
 
 # import conf
@@ -41,6 +51,12 @@ from update_leds import LedMode
 import debugging
 from utils_colors import wx_fog
 
+WEB_REQUEST_TIME = utils_metrics.histogram(
+    "livemap_web_request_seconds",
+    "Web request handling time ; streamed bodies are not included",
+    ("endpoint", "status"),
+)
+
 
 # import sysinfo
 
@@ -69,6 +85,10 @@ class WebViews:
         "Rainbow",
         "Morse",
         "Radar",
+        "Square",
+        "Circle",
+        "Wheel",
+        "Checker",
         "TAF 1",
         "TAF 2",
         "TAF 3",
@@ -81,6 +101,19 @@ class WebViews:
 
     file_allowed_extensions = ["pem", "crt", "key"]
 
+    # standardtemplate_data() tiers
+    #  static : settings / version ; rebuilt when the config cache serial changes
+    #  slow   : system info / neighbors ; refreshed in the background
+    #  fast   : time / airports ; per request, airports cached per data version
+    TEMPLATE_SLOW_REFRESH = 30
+    _template_static = None
+    _template_static_serial = -1
+    _template_slow = None
+    _template_slow_time = 0.0
+    _template_slow_lock = None
+    _template_airports = None
+    _template_airports_version = None
+
     def __init__(self, config, sysdata, airport_database, appinfo, led_mgmt, zeroconf):
         self._app_conf = config
         self._sysdata = sysdata
@@ -89,11 +122,41 @@ class WebViews:
         self._zeroconf = zeroconf
         self._clean_reboot_request = False
 
+        self._template_static = None
+        self._template_static_serial = -1
+        self._template_slow = None
+        self._template_slow_time = 0.0
+        self._template_slow_lock = threading.Lock()
+        self._template_airports = None
+        self._template_airports_version = None
+
         self.app = Flask(__name__)
         self.app.secret_key = secrets.token_hex(16)
 
         self.app.config["TEMPLATES_AUTO_RELOAD"] = True
 
+        # Registered before the compressor so the timing includes compression
+        self.app.before_request(self.request_started)
+        self.app.after_request(self.request_finished)
+
+        # Serving mode ; see utils_webserver
+        self._web_server = self._app_conf.get_string("webserver", "server")
+        self._web_threads = max(self._app_conf.get_int("webserver", "threads"), 2)
+        # Streams hold a worker each ; keep at least half the pool for other requests
+        self._stream_slots = utils_webserver.StreamSlots(
+            min(
+                self._app_conf.get_int("webserver", "sse_clients"),
+                max(self._web_threads // 2, 1),
+            )
+        )
+        self._compressor = None
+        if self._app_conf.get_bool("webserver", "gzip"):
+            self._compressor = utils_webserver.ResponseCompressor(
+                self.app,
+                self._app_conf.get_int("webserver", "gzip_level"),
+                self._app_conf.get_int("webserver", "static_max_age"),
+            )
+
         self.__http_port = self._app_conf.get_string("default", "http_port")
         self.ssl_enabled = False
         self.__ssl_cert = None
@@ -118,6 +181,16 @@ class WebViews:
         )
         self.app.add_url_rule("/taf/<airport>", view_func=self.gettaf, methods=["GET"])
         self.app.add_url_rule("/wx/<airport>", view_func=self.getwx, methods=["GET"])
+        self.app.add_url_rule(
+            "/api/v1/airports", view_func=self.api_airports, methods=["GET"]
+        )
+        self.app.add_url_rule(
+            "/api/v1/events", view_func=self.api_events, methods=["GET"]
+        )
+        self.app.add_url_rule("/metrics", view_func=self.metrics, methods=["GET"])
+        self.app.add_url_rule(
+            "/api/v1/metrics", view_func=self.api_metrics, methods=["GET"]
+        )
         self.app.add_url_rule(
             "/airport/<airport>", view_func=self.getairport, methods=["GET"]
         )
@@ -132,6 +205,7 @@ class WebViews:
         self.app.add_url_rule(
             "/heat_map", view_func=self.heat_map, methods=["GET", "POST"]
         )
+        self.app.add_url_rule("/map/<mapname>", view_func=self.map_page, methods=["GET"])
         # self.app.add_url_rule("/touchscr", view_func=self.touchscr, methods=["GET", "POST"])
         self.app.add_url_rule(
             "/open_console", view_func=self.open_console, methods=["GET", "POST"]
@@ -199,6 +273,14 @@ class WebViews:
 
         self.app.add_url_rule("/changelog", view_func=self.changelog, methods=["GET"])
         self.app.add_url_rule("/debug", view_func=self.debuginfo, methods=["GET"])
+        self.app.add_url_rule(
+            "/debug/profiler", view_func=self.debug_profiler, methods=["POST"]
+        )
+        self.app.add_url_rule(
+            "/debug/profiler.collapsed",
+            view_func=self.debug_profiler_collapsed,
+            methods=["GET"],
+        )
 
         self.app.add_url_rule(
             "/releaseinfo", view_func=self.releaseinfo, methods=["GET"]
@@ -208,10 +290,102 @@ class WebViews:
 
         self.num = self._app_conf.get_int("default", "led_count")
 
+        # Opt-in sampling profiler ; started / stopped from /debug
+        self._profiler = utils_profiler.SamplingProfiler(
+            self._app_conf.get_float("logging", "profiler_interval"),
+            self._app_conf.get_int("logging", "profiler_max_duration"),
+        )
+
+        # Serialized airport data for /api/v1/airports
+        self._api_snapshot = utils_api.AirportSnapshot(self._airport_database)
+
+        # Live update push channel ; deltas published from DB / LED change notifications
+        self._event_hub = utils_events.EventHub()
+        self._live_categories = self.live_categories()
+        self._live_lock = threading.Lock()
+        self._airport_database.add_change_listener(self.publish_airport_change)
+        self._led_strip.add_change_listener(self.publish_led_change)
+
+        # Generated folium maps ; rebuilt when the airport set or weather changes
+        self._map_cache = utils_mapcache.MapCache()
+        self._map_cache.register(
+            "led_map",
+            self._app_conf.get_string("filenames", "led_map_html"),
+            self.build_led_map,
+        )
+        self._map_cache.register(
+            "heat_map",
+            self._app_conf.get_string("filenames", "heat_map_html"),
+            self.build_heat_map,
+        )
+
+    def stats(self):
+        """Return string containing pertinent stats."""
+        web_stats = (
+            f"{self._map_cache.stats()}\n{self._api_snapshot.stats()}"
+            f"\n{self._event_hub.stats()}\n{self._stream_slots.stats()}"
+        )
+        if self._compressor is not None:
+            web_stats = f"{web_stats}\n{self._compressor.stats()}"
+        return web_stats
+
+    def live_categories(self):
+        """Return dict of flight category for each LED airport."""
+        return {
+            icao: airport_obj.flightcategory()
+            for icao, airport_obj in self._airport_database.get_airport_dict_led().items()
+        }
+
+    def live_state(self):
+        """Return full state sent to SSE clients when they connect."""
+        return {
+            "airports": self.live_categories(),
+            "ledmode": self._led_strip.ledmode().name,
+            "brightness": self._led_strip.get_brightness_level(),
+            "metar_update_time": utils.time_format(
+                self._airport_database.get_metar_update_time()
+            ),
+        }
+
+    def publish_airport_change(self, change_type):
+        """AirportDB change listener ; publish flight category deltas and data freshness."""
+        if change_type == "metar":
+            self._event_hub.publish(
+                "datasets",
+                {
+                    "metar_update_time": utils.time_format(
+                        self._airport_database.get_metar_update_time()
+                    )
+                },
+            )
+            return
+        with self._live_lock:
+            categories = self.live_categories()
+            changed = {
+                icao: category
+                for icao, category in categories.items()
+                if self._live_categories.get(icao) != category
+            }
+            removed = sorted(set(self._live_categories).difference(categories))
+            self._live_categories = categories
+        if changed or removed:
+            self._event_hub.publish("airports", {"changed": changed, "removed": removed})
+
+    def publish_led_change(self, change_type):
+        """UpdateLEDs change listener ; publish LED mode and brightness."""
+        if change_type == "ledmode":
+            self._event_hub.publish(
+                "ledmode", {"ledmode": self._led_strip.ledmode().name}
+            )
+        elif change_type == "brightness":
+            self._event_hub.publish(
+                "brightness", {"brightness": self._led_strip.get_brightness_level()}
+            )
+
     def check_auth(self, username, password):
         """Check if a username/password combination is valid."""
-        adminuser = self._app_conf.cache["adminuser"]
-        adminpass = self._app_conf.cache["adminpass"]
+        adminuser = self._app_conf.snapshot().default.adminuser
+        adminpass = self._app_conf.snapshot().default.adminpass
         if adminuser is not None and adminpass is not None:
             return username == adminuser and utils_system.match_password(
                 password, adminpass
@@ -231,6 +405,8 @@ class WebViews:
     def requires_auth(f):
         """Decorator to prompt for basic auth credentials."""
 
+        # functools.wraps keeps the view name ; Flask uses it as the endpoint name
+        @functools.wraps(f)
         def decorated(self, *args, **kwargs):
             auth = request.authorization
             if not auth or not self.check_auth(auth.username, auth.password):
@@ -250,61 +426,120 @@ class WebViews:
         else:
             context = None
             active_port = self.__http_port
+        if self._web_server == "wsgi":
+            if utils_webserver.wsgi_available():
+                utils_webserver.serve_wsgi(
+                    self.app,
+                    active_port,
+                    self._web_threads,
+                    self._app_conf.get_int("webserver", "queue_size"),
+                    self._app_conf.get_int("webserver", "timeout"),
+                    self.__ssl_cert,
+                    self.__ssl_key,
+                )
+                return
+            debugging.warn("Web: cheroot not installed ; using flask server")
         self.app.run(
-            debug=False, host="0.0.0.0", ssl_context=context, port=active_port
-        )  # nosec
+            debug=False,
+            host="0.0.0.0",  # nosec
+            ssl_context=context,
+            port=active_port,
+            threaded=True,
+        )
 
-    def standardtemplate_data(self):
-        """Generate a standardized template_data."""
-        # For performance reasons we should do the minimum of data generation now
-        # This gets executed for every page load
-        if self._zeroconf is not None:
-            self.machines = self._zeroconf.get_neighbors()
-        airport_dict_data = {}
-
-        for (
-            airport_icao,
-            airport_obj,
-        ) in self._airport_database.get_airport_dict_led().items():
-            airport_record = {
-                "ledindex": airport_obj.get_led_index(),
-                "active": airport_obj.active(),
-                "icaocode": airport_icao,
-                "metarsrc": airport_obj.wxsrc(),
-                "rawmetar": airport_obj.raw_metar(),
-                "purpose": airport_obj.purpose(),
-                "hmindex": airport_obj.heatmap_index(),
+    def template_static_data(self):
+        """Return template data that only changes when the config is saved."""
+        conf_serial = self._app_conf.cache_serial()
+        stale = (
+            self._template_static is None
+            or self._template_static_serial != conf_serial
+        )
+        utils_metrics.cache_result("template_static", not stale)
+        if stale:
+            self._template_static = {
+                "title": "NOT SET - " + self._appinfo.running_version(),
+                "settings": self._app_conf.gen_settings_dict(),
+                "current_timezone": self._app_conf.get_string("default", "timezone"),
+                "num": self.num,
+                "version": self._appinfo.running_version(),
             }
-            airport_dict_data[airport_icao] = airport_record
-
-        current_ledmode = self._led_strip.ledmode()
-        fresh_daily = utils_system.fresh_daily(self._app_conf)
-        cpu_usage, mem_usage = self._sysdata.system_load()
+            self._template_static_serial = conf_serial
+        return self._template_static
+
+    def refresh_template_slow_data(self):
+        """Rebuild template data that is expensive to collect."""
+        with self._template_slow_lock:
+            if self._zeroconf is not None:
+                self.machines = self._zeroconf.get_neighbors()
+            cpu_usage, mem_usage = self._sysdata.system_load()
+            self._template_slow = {
+                "cpu_usage": cpu_usage,
+                "mem_usage": mem_usage,
+                "ipadd": self._sysdata.local_ip(),
+                "update_available": self._appinfo.update_available(),
+                "restart_to_upgrade": self._appinfo.update_ready(),
+                "update_vers": self._appinfo.available_version(),
+                "current_version": self._appinfo.current_version(),
+                "machines": self.machines,
+                "sysinfo": self._sysdata.query_system_information(),
+                "fresh_daily": utils_system.fresh_daily(self._app_conf),
+            }
+            self._template_slow_time = time.time()
+
+    def template_slow_data(self):
+        """Return system info / neighbor template data ; stale data triggers a background refresh."""
+        if self._template_slow is None:
+            self.refresh_template_slow_data()
+        elif (
+            time.time() - self._template_slow_time > self.TEMPLATE_SLOW_REFRESH
+            and not self._template_slow_lock.locked()
+        ):
+            threading.Thread(
+                target=self.refresh_template_slow_data,
+                name="template refresh",
+                daemon=True,
+            ).start()
+        return self._template_slow
+
+    def template_airport_data(self):
+        """Return dict of LED airports for templates ; rebuilt when airport data changes."""
+        data_version = self.map_version()
+        stale = self._template_airports_version != data_version
+        utils_metrics.cache_result("template_airports", not stale)
+        if stale:
+            airport_dict_data = {}
+            for (
+                airport_icao,
+                airport_obj,
+            ) in self._airport_database.get_airport_dict_led().items():
+                airport_record = {
+                    "ledindex": airport_obj.get_led_index(),
+                    "active": airport_obj.active(),
+                    "icaocode": airport_icao,
+                    "metarsrc": airport_obj.wxsrc(),
+                    "rawmetar": airport_obj.raw_metar(),
+                    "purpose": airport_obj.purpose(),
+                    "hmindex": airport_obj.heatmap_index(),
+                }
+                airport_dict_data[airport_icao] = airport_record
+            self._template_airports = airport_dict_data
+            self._template_airports_version = data_version
+        return self._template_airports
 
+    def standardtemplate_data(self):
+        """Generate a standardized template_data."""
+        # This gets executed for every page load ; only the fast tier is built here
         template_data = {
-            "title": "NOT SET - " + self._appinfo.running_version(),
-            "airports": airport_dict_data,
-            "cpu_usage": cpu_usage,
-            "mem_usage": mem_usage,
-            "settings": self._app_conf.gen_settings_dict(),
-            "ipadd": self._sysdata.local_ip(),
+            **self.template_static_data(),
+            **self.template_slow_data(),
+            "airports": self.template_airport_data(),
             "strip": self._led_strip,
             "timestr": utils.time_format(utils.current_time(self._app_conf)),
             "timestrutc": utils.time_format(utils.current_time_utc(self._app_conf)),
             "timemetarage": utils.time_format(
                 self._airport_database.get_metar_update_time()
             ),
-            "current_timezone": self._app_conf.get_string("default", "timezone"),
-            "current_ledmode": current_ledmode,
-            "num": self.num,
-            "version": self._appinfo.running_version(),
-            "update_available": self._appinfo.update_available(),
-            "restart_to_upgrade": self._appinfo.update_ready(),
-            "update_vers": self._appinfo.available_version(),
-            "current_version": self._appinfo.current_version(),
-            "machines": self.machines,
-            "sysinfo": self._sysdata.query_system_information(),
-            "fresh_daily": fresh_daily,
+            "current_ledmode": self._led_strip.ledmode(),
         }
         return template_data
 
@@ -316,7 +551,7 @@ class WebViews:
         admin_pass = None
 
         if (request.method == "POST") and not (
-            self._app_conf.cache["first_setup_complete"]
+            self._app_conf.snapshot().default.first_setup_complete
         ):
             form_data = request.form
             if "adminuser" in form_data:
@@ -411,17 +646,42 @@ class WebViews:
         self._sysdata.refresh()
         template_data = self.standardtemplate_data()
 
-        debug_output = "Selections of useful internal debug info"
+        debug_output = "Selections of useful internal debug info\n"
 
         debug_output += "=-=-=-=-=-=-=-=-=-=-=-=-\n"
         debug_output += debugging.internal_debug()
-        debug_output = "=-=-=-=-=-=-=-=-=-=-=-=-\n"
-        debug_output += f"{self._app_conf.cache}\n"
+        debug_output += "=-=-=-=-=-=-=-=-=-=-=-=-\n"
+        debug_output += f"{self._app_conf.snapshot()}\n"
 
         template_data["title"] = "Debugging Data"
         template_data["showfile"] = debug_output
+        template_data["profiler_running"] = self._profiler.running()
+        template_data["profiler_stats"] = self._profiler.stats()
         debugging.info("Displaying Debugging Info")
-        return render_template("showfile.html", **template_data)
+        return render_template("debug.html", **template_data)
+
+    @requires_auth
+    def debug_profiler(self):
+        """Flask Route: /debug/profiler - Start or stop the sampling profiler."""
+        action = request.form.get("action")
+        if action == "start":
+            if self._profiler.start():
+                flash("Profiler started")
+        elif action == "stop":
+            if self._profiler.stop():
+                flash("Profiler stopped")
+        else:
+            abort(400)
+        return redirect(url_for("debuginfo"))
+
+    @requires_auth
+    def debug_profiler_collapsed(self):
+        """Flask Route: /debug/profiler.collapsed - Download profile for flamegraph tools."""
+        response = Response(self._profiler.collapsed(), mimetype="text/plain")
+        response.headers["Content-Disposition"] = (
+            "attachment; filename=livemap-profile.collapsed"
+        )
+        return response
 
     def oled_display(self):
         """Flask Route: /oleddisplay - Display System Info."""
@@ -488,6 +748,14 @@ class WebViews:
                 self._led_strip.set_ledmode(LedMode.RAINBOW)
             if newledmode_upper == "RADAR":
                 self._led_strip.set_ledmode(LedMode.RADARWIPE)
+            if newledmode_upper == "SQUARE":
+                self._led_strip.set_ledmode(LedMode.SQUAREWIPE)
+            if newledmode_upper == "CIRCLE":
+                self._led_strip.set_ledmode(LedMode.CIRCLEWIPE)
+            if newledmode_upper == "WHEEL":
+                self._led_strip.set_ledmode(LedMode.WHEELWIPE)
+            if newledmode_upper == "CHECKER":
+                self._led_strip.set_ledmode(LedMode.CHECKERWIPE)
             if newledmode_upper == "TAF 1":
                 self._led_strip.set_ledmode(LedMode.TAF_1)
             if newledmode_upper == "TAF 2":
@@ -582,21 +850,76 @@ class WebViews:
 
     # @app.route('/stream_log1', methods=["GET", "POST"])
     def stream_log1(self):
-        """Flask Route: /stream_log1 - UNUSED ALTERNATE LOGS ROUTE."""
+        """Flask Route: /stream_log1 - Stream recent and new log lines from memory."""
+        log_ring = debugging.log_ring()
+        if log_ring is None:
+            return Response("Logging not initialized", status=503, mimetype="text/plain")
+        if not self._stream_slots.acquire():
+            return Response("Too many open streams", status=503, mimetype="text/plain")
 
         def generate():
-            # FIXME: Move logfile name to config file
-            with open("/opt/NeoSectional/logs/debugging.log", encoding="utf-8") as file:
-                while True:
-                    yield "{}\n".format(file.read())
-                    time.sleep(1)
+            line_id, lines = log_ring.lines_since(0)
+            if lines:
+                yield "\n".join(lines) + "\n"
+            while True:
+                line_id, lines = log_ring.lines_since(
+                    line_id, utils_events.KEEPALIVE_INTERVAL
+                )
+                if lines:
+                    yield "\n".join(lines) + "\n"
 
-        return self.app.response_class(generate(), mimetype="text/plain")
+        response = self.app.response_class(generate(), mimetype="text/plain")
+        # Released when the server closes the response, even if never iterated
+        response.call_on_close(self._stream_slots.release)
+        return response
 
     # Route to display map's airports on a digital map.
     # @app.route('/led_map', methods=["GET", "POST"])
+    def map_version(self):
+        """Return data version for generated maps ; (airport set version, wx version)."""
+        return (
+            self._airport_database.airport_set_version(),
+            self._airport_database.wx_version(),
+        )
+
+    def map_page(self, mapname):
+        """Flask Route: /map/<mapname> - Serve cached folium map page."""
+        if mapname not in ("led_map", "heat_map"):
+            abort(404)
+        map_artifact = self._map_cache.artifact(mapname, self.map_version())
+        if map_artifact is None:
+            abort(503)
+        response = self.app.response_class(map_artifact.html, mimetype="text/html")
+        response.set_etag(map_artifact.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def map_template_data(self, title):
+        """Generate template_data for map pages."""
+        self.max_lon, self.min_lon, self.max_lat, self.min_lat = (
+            utils_coord.airport_boundary_calc(self._airport_database)
+        )
+        template_data = self.standardtemplate_data()
+        template_data["title"] = title
+        template_data["led_map_dict"] = self.led_map_dict
+        template_data["max_lat"] = self.max_lat
+        template_data["min_lat"] = self.min_lat
+        template_data["max_lon"] = self.max_lon
+        template_data["min_lon"] = self.min_lon
+        return template_data
+
     def led_map(self):
         """Flask Route: /led_map - Display LED Map with existing airports."""
+        template_data = self.map_template_data("LEDmap")
+        return render_template("led_map.html", **template_data)
+
+    def heat_map(self):
+        """Flask Route: /heat_map - Display HEAT Map with existing airports."""
+        template_data = self.map_template_data("HEATmap")
+        return render_template("heat_map.html", **template_data)
+
+    def build_led_map(self):
+        """Generate LED Map html with existing airports."""
         # Update Airport Boundary data based on set of airports
         self.max_lon, self.min_lon, self.max_lat, self.min_lat = (
             utils_coord.airport_boundary_calc(self._airport_database)
@@ -720,23 +1043,10 @@ class WebViews:
 
         folium.LayerControl().add_to(folium_map)
 
-        # FIXME: Move filename to config.ini
-        folium_map.save("/opt/NeoSectional/static/led_map.html")
-        debugging.debug("Opening led_map in separate window")
+        return folium_map.get_root().render()
 
-        template_data = self.standardtemplate_data()
-        template_data["title"] = "LEDmap"
-        template_data["led_map_dict"] = self.led_map_dict
-        template_data["max_lat"] = self.max_lat
-        template_data["min_lat"] = self.min_lat
-        template_data["max_lon"] = self.max_lon
-        template_data["min_lon"] = self.min_lon
-        return render_template("led_map.html", **template_data)
-
-    # Route to display map's airports on a digital map.
-    # @app.route('/led_map', methods=["GET", "POST"])
-    def heat_map(self):
-        """Flask Route: /heat_map - Display HEAT Map with existing airports."""
+    def build_heat_map(self):
+        """Generate HEAT Map html with existing airports."""
         # Update Airport Boundary data based on set of airports
 
         points = []
@@ -858,19 +1168,7 @@ class WebViews:
 
         folium.LayerControl().add_to(folium_map)
 
-        # FIXME: Move filename to config.ini
-        folium_map.save("/opt/NeoSectional/static/heat_map.html")
-        debugging.info("Opening led_map in separate window")
-
-        template_data = self.standardtemplate_data()
-        template_data["title"] = "HEATmap"
-        template_data["led_map_dict"] = self.led_map_dict
-        template_data["max_lat"] = self.max_lat
-        template_data["min_lat"] = self.min_lat
-        template_data["max_lon"] = self.max_lon
-        template_data["min_lon"] = self.min_lon
-
-        return render_template("heat_map.html", **template_data)
+        return folium_map.get_root().render()
 
     def gen_qrcode(self):
         """Flask Route: /qrcode - Generate QRcode for site URL."""
@@ -902,13 +1200,10 @@ class WebViews:
 
     def getwx(self, airport):
         """Flask Route: /wx - Get WX JSON for Airport."""
-        template_data = self.standardtemplate_data()
-
         # debugging.info(f"getwx: airport = {airport}")
         wx_data = {}
 
         airport = airport.lower()
-        template_data["airport"] = airport
 
         if airport == "debug":
             # Debug request - dumping DB info
@@ -936,6 +1231,104 @@ class WebViews:
 
         return json.dumps(wx_data)
 
+    def api_airports(self):
+        """Flask Route: /api/v1/airports - JSON state of all tracked airports.
+
+        Optional ?fields=icao,flightcategory,... selects fields ; supports
+        If-None-Match and gzip Content-Encoding.
+        """
+        fields = None
+        fields_arg = request.args.get("fields")
+        if fields_arg:
+            fields = tuple(
+                field for field in (part.strip() for part in fields_arg.split(",")) if field
+            )
+            unknown_fields = set(fields).difference(utils_api.AIRPORT_FIELDS)
+            if unknown_fields:
+                return Response(
+                    json.dumps(
+                        {
+                            "error": f"unknown fields: {sorted(unknown_fields)}",
+                            "fields": utils_api.AIRPORT_FIELDS,
+                        }
+                    ),
+                    status=400,
+                    mimetype="application/json",
+                )
+        use_gzip = "gzip" in request.accept_encodings
+        etag, body = self._api_snapshot.response(fields, use_gzip)
+        response = self.app.response_class(body, mimetype="application/json")
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def request_started(self):
+        """Flask before_request - note request start time."""
+        g.request_start = time.perf_counter()
+
+    def request_finished(self, response):
+        """Flask after_request - record request latency by endpoint and status."""
+        request_start = g.get("request_start")
+        if request_start is not None:
+            WEB_REQUEST_TIME.observe(
+                time.perf_counter() - request_start,
+                (request.endpoint or "unmatched", f"{response.status_code // 100}xx"),
+            )
+        return response
+
+    def metrics(self):
+        """Flask Route: /metrics - Runtime metrics in Prometheus text format."""
+        return Response(
+            utils_metrics.REGISTRY.prometheus(),
+            mimetype="text/plain; version=0.0.4",
+        )
+
+    def api_metrics(self):
+        """Flask Route: /api/v1/metrics - Runtime metrics as JSON."""
+        return Response(
+            json.dumps(utils_metrics.REGISTRY.as_dict(), separators=(",", ":")),
+            mimetype="application/json",
+        )
+
+    def api_events(self):
+        """Flask Route: /api/v1/events - Server-Sent Events stream of live map changes.
+
+        Sends a "state" event with the full state on connect (or after falling
+        too far behind), then "airports", "ledmode", "brightness" and
+        "datasets" delta events.
+        """
+        event_hub = self._event_hub
+        last_event_id = event_hub.last_id()
+        initial_state = json.dumps(self.live_state(), separators=(",", ":"))
+        # Each stream holds a web server worker thread for as long as it is open
+        if not self._stream_slots.acquire():
+            return Response("Too many open streams", status=503, mimetype="text/plain")
+
+        def generate():
+            event_id = last_event_id
+            yield utils_events.sse_format(event_id, "state", initial_state)
+            while True:
+                events, missed = event_hub.events_since(event_id)
+                if missed:
+                    event_id = event_hub.last_id()
+                    live_state = json.dumps(self.live_state(), separators=(",", ":"))
+                    yield utils_events.sse_format(event_id, "state", live_state)
+                    continue
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for event_id, event_text in events:
+                    yield event_text
+
+        response = self.app.response_class(generate(), mimetype="text/event-stream")
+        response.call_on_close(self._stream_slots.release)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
     def airport_datadump(self, airport_obj):
         """Generate dict of useful airport data."""
         dbdump = {
@@ -970,18 +1363,16 @@ class WebViews:
         dbdump["wxsrc"] = airport_obj.wxsrc()
         dbdump["heatmap_index"] = airport_obj.heatmap_index()
         dbdump["best_runway"] = airport_obj.best_runway()
+        dbdump["runway_wind"] = airport_obj.runway_wind()
         dbdump["runway_dataset"] = airport_obj.runway_data()
         return dbdump
 
     def getairport(self, airport):
         """Flask Route: /airport - Get WX JSON for Airport - primarily for debugging the details of the what's in the Airport"""
-        template_data = self.standardtemplate_data()
-
         html_response = {}
 
         debugging.info(f"getairport: airport = {airport}")
         airport = airport.lower()
-        template_data["airport"] = airport
 
         if airport == "debug":
             # Debug request - dumping DB info
@@ -1087,7 +1478,7 @@ class WebViews:
         template_data["title"] = "Intro"
 
         # Check for initial setup state
-        if not self._app_conf.cache["first_setup_complete"]:
+        if not self._app_conf.snapshot().default.first_setup_complete:
             template_data["title"] = "First Time Setup"
             return render_template("initial_setup.html", **template_data)
 